@@ -0,0 +1,41 @@
+"""Time the Request API URL lookup done by every RequestHelper constructor
+
+Usage:
+    python benchmark/api_url_benchmark.py [environment] [cache file]
+
+The first lookup goes to SSM (or the cache file when one is given), every
+later lookup in the same process is served from the process wide cache.
+Needs AWS credentials that can read /id-verification/{environment}/request-api-url.
+"""
+import os
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from id_verification_python_requesthelper.api_url import clearApiUrlCache, getApiUrl
+
+ITERATIONS = 1000
+
+def main() -> None:
+    environment = sys.argv[1] if len(sys.argv) > 1 else "Development"
+    cacheFile = sys.argv[2] if len(sys.argv) > 2 else None
+
+    start = time.perf_counter()
+    getApiUrl(environment, cacheFile=cacheFile)
+    print(f"First lookup ({'cache file' if cacheFile and os.path.exists(cacheFile) else 'SSM'}): {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        getApiUrl(environment, cacheFile=cacheFile)
+    print(f"Cached lookup: {(time.perf_counter() - start) * 1000000 / ITERATIONS:.2f} us")
+
+    if cacheFile:
+        clearApiUrlCache()
+        start = time.perf_counter()
+        getApiUrl(environment, cacheFile=cacheFile)
+        print(f"New process (cache file): {(time.perf_counter() - start) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
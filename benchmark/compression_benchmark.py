@@ -0,0 +1,148 @@
+"""Measure what compressed transfer saves against the local stub Request API over a slow link
+
+Usage:
+    python benchmark/compression_benchmark.py [--latency 0.02] [--bandwidth 1000000] [--elements 5000] [--reads 10] [--writes 200] [--value-size 4096] [--workers 8] [--json results.json]
+
+Runs the same workload with the stub server (benchmark/stub_server.py, in a separate process)
+answering uncompressed, with gzip and, when zstandard is installed, with zstd.  The stub transfers
+every body at --bandwidth bytes per second, like a link between regions, so the bytes saved show
+on the clock.  The workload reads a Bulk Request with --elements Data Elements --reads times with
+getBulkRequestDataElementsByBulkRequestId and as many times with
+iterBulkRequestDataElementsByBulkRequestId, then creates --writes Request Data Elements of
+--value-size bytes over --workers threads, with request bodies compressed (compressRequests) in
+the compressed runs.
+Each run prints the seconds per read, the writes per second, the bytes on the wire and the time
+spent decoding.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from id_verification_python_requesthelper.compression import zstandard
+from id_verification_python_requesthelper.id_verification_python_requesthelper import RequestHelper
+
+from request_benchmark import BenchmarkUserHelper
+from stub_server import StubServer, StubSettings
+
+LATENCY = 0.02
+BANDWIDTH = 1000000
+ELEMENTS = 5000
+READS = 10
+WRITES = 200
+VALUE_SIZE = 4096
+WORKERS = 8
+FIELDS = ('FirstName', 'LastName', 'DateOfBirth', 'Address', 'City', 'State', 'PostalCode', 'Filename')
+
+def serve(settings: dict, connection) -> None:
+    """
+    Run the stub server (in the server process) until the benchmark hangs up
+    """
+    server = StubServer(0, StubSettings(**settings)).start()
+    connection.send(server.apiUrl)
+    try:
+        connection.recv()
+    except EOFError:
+        pass
+
+def measure(name: str, encodings: tuple, options: dict, args) -> dict:
+    """
+    Run the workload with the stub answering with encodings
+
+    Parameters:
+        name (str): Name of the setup
+        encodings (tuple): Content-Encodings of the stub's replies (empty for uncompressed)
+        options (dict): RequestHelper options
+
+    Returns:
+        dict: Results
+    """
+    connection, serverConnection = multiprocessing.Pipe()
+    settings = {'latency': args.latency, 'bandwidth': args.bandwidth, 'encodings': encodings}
+    server = multiprocessing.Process(target=serve, args=(settings, serverConnection), daemon=True)
+    server.start()
+    apiUrl = connection.recv()
+    requestHelper = RequestHelper(BenchmarkUserHelper(), apiUrl=apiUrl, maxWorkers=args.workers, concurrencyLimit=False, cache=False, compression=True, **options)
+    try:
+        bulkRequest = requestHelper.createBulkRequest("benchmark-customer", "benchmark-workflow")
+        dataElements = [(FIELDS[index % len(FIELDS)], f"value {index} of {FIELDS[index % len(FIELDS)].lower()}") for index in range(args.elements)]
+        failed = [result for result in requestHelper.createBulkRequestDataElements(bulkRequest.bulkRequestId, dataElements) if isinstance(result, Exception)]
+        if failed:
+            raise RuntimeError(f"{name}: {failed[0]}")
+        before = requestHelper.transferStats()
+
+        started = time.perf_counter()
+        for _ in range(args.reads):
+            if len(requestHelper.getBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId)) != args.elements:
+                raise RuntimeError(f"{name}: getBulkRequestDataElementsByBulkRequestId returned the wrong number of elements")
+        readSeconds = (time.perf_counter() - started) / args.reads
+        started = time.perf_counter()
+        for _ in range(args.reads):
+            if sum(1 for _ in requestHelper.iterBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId)) != args.elements:
+                raise RuntimeError(f"{name}: iterBulkRequestDataElementsByBulkRequestId returned the wrong number of elements")
+        streamSeconds = (time.perf_counter() - started) / args.reads
+        afterReads = requestHelper.transferStats()
+
+        request = requestHelper.createRequest("benchmark-customer", bulkRequest.bulkRequestId, "benchmark-workflow")
+        line = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt. "
+        value = (line * (args.valueSize // len(line) + 1))[:args.valueSize]
+        started = time.perf_counter()
+        failed = [result for result in requestHelper.createRequestDataElements(request.requestId, {f"note{index}": value for index in range(args.writes)}) if isinstance(result, Exception)]
+        if failed:
+            raise RuntimeError(f"{name}: {failed[0]}")
+        writeSeconds = time.perf_counter() - started
+        after = requestHelper.transferStats()
+    finally:
+        requestHelper.close()
+        connection.close()
+        server.join(5)
+    result = {
+        'readSeconds': readSeconds,
+        'streamSeconds': streamSeconds,
+        'writesPerSecond': args.writes / writeSeconds,
+        'bytesReceived': afterReads['bytesReceived'] - before['bytesReceived'],
+        'wireBytesReceived': afterReads['wireBytesReceived'] - before['wireBytesReceived'],
+        'decodeSeconds': afterReads['decodeSeconds'] - before['decodeSeconds'],
+        'bytesSent': after['bytesSent'] - afterReads['bytesSent'],
+        'wireBytesSent': after['wireBytesSent'] - afterReads['wireBytesSent'],
+    }
+    print(f"{name:<14} read {result['readSeconds'] * 1000:>7.1f} ms  stream {result['streamSeconds'] * 1000:>7.1f} ms  {result['writesPerSecond']:>7,.0f} writes/s"
+          f"  received {result['wireBytesReceived'] / 1e6:>6.2f} of {result['bytesReceived'] / 1e6:>6.2f} MB  sent {result['wireBytesSent'] / 1e6:>5.2f} of {result['bytesSent'] / 1e6:>5.2f} MB"
+          f"  decode {result['decodeSeconds'] * 1000:>6.1f} ms")
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure what compressed transfer saves over a slow link")
+    parser.add_argument("--latency", type=float, default=LATENCY, help=f"Seconds the stub waits before answering (default {LATENCY})")
+    parser.add_argument("--bandwidth", type=float, default=BANDWIDTH, help=f"Bytes per second at which the stub transfers each body (default {BANDWIDTH})")
+    parser.add_argument("--elements", type=int, default=ELEMENTS, help=f"Data Elements of the Bulk Request that is read (default {ELEMENTS})")
+    parser.add_argument("--reads", type=int, default=READS, help=f"Times the Bulk Request is read each way (default {READS})")
+    parser.add_argument("--writes", type=int, default=WRITES, help=f"Request Data Elements created (default {WRITES})")
+    parser.add_argument("--value-size", dest="valueSize", type=int, default=VALUE_SIZE, help=f"Bytes in each created Data Value (default {VALUE_SIZE})")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Worker threads of the batch calls (default {WORKERS})")
+    parser.add_argument("--json", help="Save the results to this file")
+    args = parser.parse_args()
+
+    setups = [
+        ("uncompressed", (), {}),
+        ("gzip", ('gzip',), {'compressRequests': True}),
+    ]
+    if zstandard is not None:
+        setups.append(("zstd", ('zstd',), {'compressRequests': True}))
+    print(f"Stub latency {args.latency * 1000:.0f} ms, {args.bandwidth / 1e6:.1f} MB/s per call, {args.elements:,} elements, Python {sys.version.split()[0]}, {os.cpu_count()} cores")
+    results = {}
+    for name, encodings, options in setups:
+        results[name] = measure(name, encodings, options, args)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
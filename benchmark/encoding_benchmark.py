@@ -0,0 +1,84 @@
+"""Measure the cost of building request bodies and headers
+
+Usage:
+    python benchmark/encoding_benchmark.py [count]
+
+Builds count (default 200,000) CreateRequestDataElement bodies plus their request headers the way
+the helpers used to (an f-string body and a new headers dict per call) and the way they do now (a
+fixed template with the strings escaped by the json module's C escaper, and headers reused while
+the token does not change), compares them with encoding.dumps of the whole body (orjson when it is
+installed, otherwise the standard library json), and checks which bodies are valid JSON for values
+with quotes, backslashes and control characters.
+"""
+import json
+from pathlib import Path
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from id_verification_python_requesthelper import encoding
+
+REQUEST_ID = "669b7fb6-9f8c-46df-b0d6-89203f1ddd0b"
+TOKEN = "eyJraWQiOiJrZXkiLCJhbGciOiJSUzI1NiJ9." + "x" * 800
+VALUES = ["Mary", "O\"Brien", "12 Main St\\Apt 4", "Line 1\nLine 2", "Zoë"]
+
+def legacyBody(requestId: str, dataField: str, dataValue: str) -> str:
+    return f'{{"requestId": "{requestId}", "dataField": "{dataField}", "dataValue": "{dataValue}"}}'
+
+def legacyCall(dataField: str, dataValue: str) -> tuple:
+    headers = {'Authorization': f'Bearer {TOKEN}', 'accept': 'application/json', 'Content-Type': 'application/json'}
+    return legacyBody(REQUEST_ID, dataField, dataValue), headers
+
+cachedHeaders = (None, None)
+
+def currentCall(dataField: str, dataValue: str) -> tuple:
+    global cachedHeaders
+    if cachedHeaders[0] != TOKEN:
+        cachedHeaders = (TOKEN, {'Authorization': f'Bearer {TOKEN}', 'accept': 'application/json', 'Content-Type': 'application/json'})
+    return encoding.requestDataElementBody(REQUEST_ID, dataField, dataValue), cachedHeaders[1]
+
+def dumpsCall(dataField: str, dataValue: str) -> tuple:
+    global cachedHeaders
+    if cachedHeaders[0] != TOKEN:
+        cachedHeaders = (TOKEN, {'Authorization': f'Bearer {TOKEN}', 'accept': 'application/json', 'Content-Type': 'application/json'})
+    return encoding.dumps({'requestId': REQUEST_ID, 'dataField': dataField, 'dataValue': dataValue}), cachedHeaders[1]
+
+def valid(body) -> bool:
+    try:
+        json.loads(body)
+        return True
+    except ValueError:
+        return False
+
+def measure(name: str, call, count: int) -> float:
+    fields = [(f"field{index % 20}", VALUES[index % len(VALUES)]) for index in range(count)]
+    start = time.perf_counter()
+    for dataField, dataValue in fields:
+        call(dataField, dataValue)
+    elapsed = time.perf_counter() - start
+    validBodies = sum(valid(call("field", value)[0]) for value in VALUES)
+    print(f"{name:<40} {elapsed / count * 1e9:>7,.0f} ns/call  valid JSON for {validBodies}/{len(VALUES)} sample values")
+    return elapsed
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    legacy = measure("f-string body, new headers per call", legacyCall, count)
+    current = measure("escaped template, cached headers", currentCall, count)
+    orjson = encoding.orjson
+    if orjson is not None:
+        measure("encoding.dumps (orjson), cached headers", dumpsCall, count)
+        encoding.orjson = None
+    measure("encoding.dumps (json), cached headers", dumpsCall, count)
+    encoding.orjson = orjson
+    print(f"Escaped template: {current / legacy:.2f}x the time of the f-strings")
+
+    dataElements = {f"field{index}": VALUES[index % len(VALUES)] for index in range(50)}
+    start = time.perf_counter()
+    for _ in range(count // 50):
+        encoding.encodeRequestDataElements(REQUEST_ID, dataElements)
+    elapsed = time.perf_counter() - start
+    print(f"{'encodeRequestDataElements x50':<40} {elapsed / (count // 50 * 50) * 1e9:>7,.0f} ns/element")
+
+if __name__ == "__main__":
+    main()
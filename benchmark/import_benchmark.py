@@ -0,0 +1,60 @@
+"""Guard the import time of the package against regressions
+
+Usage:
+    python benchmark/import_benchmark.py
+
+Each target is imported in a fresh interpreter.  The time of the whole import statement is
+printed (so names the package loads lazily on first use are counted), and the script exits with
+an error when a target loads a dependency it should not, or takes longer than its budget.
+"""
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+SOURCE_DIRECTORY = Path(__file__).resolve().parent.parent / "src"
+HEAVY_MODULES = ("boto3", "botocore", "requests", "httpx", "multipledispatch", "id_verification_python_userhelper")
+RUNS = 5
+
+# (import statement, budget in milliseconds or None for no budget, modules it must not load)
+TARGETS = [
+    ("import id_verification_python_requesthelper", 5, HEAVY_MODULES),
+    ("import id_verification_python_requesthelper.enums", 10, HEAVY_MODULES),
+    ("import id_verification_python_requesthelper.models", 15, HEAVY_MODULES),
+    ("from id_verification_python_requesthelper import BulkRequest, RequestStatus", 15, HEAVY_MODULES),
+    # boto3 is only needed to look up the API URL, and httpx only by AsyncRequestHelper and HTTP/2
+    ("from id_verification_python_requesthelper import RequestHelper", None, ("boto3", "botocore", "httpx")),
+    ("from id_verification_python_requesthelper import AsyncRequestHelper", None, ("boto3", "botocore", "requests")),
+]
+
+def measure(statement: str, forbidden: tuple) -> tuple:
+    """
+    Run an import statement in a fresh interpreter
+
+    Returns:
+        tuple: (time taken by the statement in milliseconds, forbidden modules that were loaded)
+    """
+    check = f"import time; started = time.perf_counter(); {statement}; elapsed = time.perf_counter() - started; import sys; print(elapsed * 1000); print(','.join(m for m in {forbidden!r} if m in sys.modules))"
+    # The source directory first, then wherever the dependencies were put on the path
+    path = os.pathsep.join(filter(None, [str(SOURCE_DIRECTORY), os.environ.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=path), check=True)
+    milliseconds, loaded = (result.stdout.splitlines() + [""])[:2]
+    return float(milliseconds), [name for name in loaded.split(",") if name]
+
+def main() -> int:
+    failures = 0
+    for statement, budget, forbidden in TARGETS:
+        runs = [measure(statement, forbidden) for _ in range(RUNS)]
+        best = min(milliseconds for milliseconds, _ in runs)
+        loaded = runs[0][1]
+        status = "ok"
+        if loaded:
+            status = f"FAIL loaded {', '.join(loaded)}"
+        elif budget is not None and best > budget:
+            status = f"FAIL over budget of {budget} ms"
+        failures += status != "ok"
+        print(f"{statement}: {best:.2f} ms ({status})")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Measure decode speed and memory of the model classes
+
+Usage:
+    python benchmark/model_benchmark.py [count]
+
+Decodes a getBulkRequestDataElementsByBulkRequestId style response with count
+elements (default 1,000,000) into BulkRequestDataElement objects, and compares
+the slotted model with the previous plain class that had a __dict__ per instance.
+"""
+import gc
+import json
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from id_verification_python_requesthelper.encoding import loads
+from id_verification_python_requesthelper.models import BulkRequestDataElement
+
+class LegacyBulkRequestDataElement:
+    """The model as it was before it was slotted: a plain class populated field by field"""
+    pass
+
+def decodeLegacy(body: bytes) -> list:
+    elements = []
+    for record in json.loads(body)['bulkRequestDataElement']:
+        element = LegacyBulkRequestDataElement()
+        element.BulkRequestDataElementId = record['bulkRequestDataElementId']
+        element.BulkRequestId = record['bulkRequestId']
+        element.DataField = record['dataField']
+        element.DataValue = record['dataValue']
+        element.CreatedOn = record['createdOn']
+        element.UpdatedOn = record['updatedOn']
+        element.DeletedOn = record['deletedOn']
+        elements.append(element)
+    return elements
+
+def decodeModel(body: bytes) -> list:
+    return [BulkRequestDataElement.fromJson(record) for record in loads(body)['bulkRequestDataElement']]
+
+def buildBody(count: int) -> bytes:
+    records = ({
+        'bulkRequestDataElementId': f'{index:08d}-0000-0000-0000-000000000000',
+        'bulkRequestId': '669b7fb6-9f8c-46df-b0d6-89203f1ddd0b',
+        'dataField': f'field{index % 20}',
+        'dataValue': f'value {index}',
+        'createdOn': '2024-05-01T12:34:56.1234567Z',
+        'updatedOn': '2024-05-01T12:34:56.1234567Z',
+        'deletedOn': None,
+    } for index in range(count))
+    return json.dumps({'bulkRequestDataElement': list(records)}).encode()
+
+def measure(name: str, decode, body: bytes, count: int) -> None:
+    gc.collect()
+    start = time.perf_counter()
+    elements = decode(body)
+    elapsed = time.perf_counter() - start
+    del elements
+    gc.collect()
+    tracemalloc.start()
+    elements = decode(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del elements
+    print(f"{name}: {elapsed:.2f} s ({count / elapsed:,.0f} elements/s), retained {retained / 1048576:,.0f} MiB ({retained / count:.0f} bytes/element), peak {peak / 1048576:,.0f} MiB")
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    body = buildBody(count)
+    print(f"Response body: {len(body) / 1048576:,.0f} MiB, {count:,} elements")
+    measure("Plain class (timestamps left as strings)", decodeLegacy, body, count)
+    measure("Slotted model (timestamps parsed)", decodeModel, body, count)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Measure RequestHelper throughput, latency and memory against the local stub Request API
+
+Usage:
+    python benchmark/request_benchmark.py [--latency 0.01] [--rows 2000] [--memory] [--json results.json] [--baseline baseline.json]
+
+Starts benchmark/stub_server.py in a separate process (so it does not compete with the helper for
+the GIL) and runs each scenario against it:
+    - single calls: getBulkRequest and createRequest one after the other
+    - batches: createRequestDataElements and getBulkRequests fanned out over the helper's worker threads
+    - ingestion: ingestBulkFile of a generated CSV file
+Each scenario prints its operations per second and p50 / p95 / p99 latency, and with --memory the
+peak memory traced while it ran.  Results can be saved with --json, and compared with a saved run
+with --baseline: the script exits with an error when a scenario's throughput drops by more than
+--tolerance.  No credentials or network access are needed.
+"""
+import argparse
+import csv
+from datetime import datetime, timezone
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from id_verification_python_userhelper import UserHelper
+from id_verification_python_requesthelper.id_verification_python_requesthelper import RequestHelper
+
+from stub_server import StubServer, StubSettings
+
+SINGLE_CALLS = 200
+BATCH_SIZE = 50
+BATCHES = 20
+INGESTION_ROWS = 2000
+INGESTION_FIELDS = 5
+INGESTION_WORKERS = 16
+TOLERANCE = 0.15
+
+class BenchmarkUserHelper(UserHelper):
+    """UserHelper that hands out a fixed token instead of signing in"""
+    def __init__(self) -> None:
+        self.token = None
+        self.tokenRefreshed = None
+
+    def getToken(self) -> str:
+        self.token = "benchmark-token"
+        self.tokenRefreshed = datetime.now(timezone.utc)
+        return self.token
+
+    def close(self) -> None:
+        pass
+
+def serve(port: int, settings: dict, ready) -> None:
+    """
+    Run the stub server (in the server process)
+    """
+    server = StubServer(port, StubSettings(**settings))
+    ready.put(server.apiUrl)
+    server.serve_forever()
+
+def percentile(latencies: list, percent: float) -> float:
+    """
+    Get a percentile of the sorted latencies in milliseconds
+    """
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(len(latencies) * percent / 100))] * 1000
+
+def run(name: str, scenario, memory: bool) -> dict:
+    """
+    Run a scenario and print its results
+
+    Parameters:
+        name (str): Scenario name
+        scenario: Function returning (operations, latencies in seconds)
+        memory (bool): Trace the peak memory
+
+    Returns:
+        dict: Scenario results
+    """
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    operations, latencies = scenario()
+    elapsed = time.perf_counter() - started
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    latencies.sort()
+    result = {
+        'operations': operations,
+        'seconds': elapsed,
+        'perSecond': operations / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'peakMiB': peak / 1048576 if peak is not None else None,
+    }
+    line = f"{name:<32} {operations:>7} ops {elapsed:>7.2f} s {result['perSecond']:>9,.0f} ops/s  p50 {result['p50']:>7.1f} ms  p95 {result['p95']:>7.1f} ms  p99 {result['p99']:>7.1f} ms"
+    if peak is not None:
+        line += f"  peak {result['peakMiB']:,.1f} MiB"
+    print(line)
+    return result
+
+def timed(call) -> float:
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+def singleGetBulkRequest(requestHelper: RequestHelper, bulkRequestId: str):
+    def scenario():
+        latencies = [timed(lambda: requestHelper.getBulkRequest(bulkRequestId)) for _ in range(SINGLE_CALLS)]
+        return SINGLE_CALLS, latencies
+    return scenario
+
+def singleCreateRequest(requestHelper: RequestHelper, bulkRequestId: str):
+    def scenario():
+        latencies = [timed(lambda: requestHelper.createRequest("benchmark-customer", bulkRequestId, "benchmark-workflow")) for _ in range(SINGLE_CALLS)]
+        return SINGLE_CALLS, latencies
+    return scenario
+
+def batchCreateRequestDataElements(requestHelper: RequestHelper, requestId: str):
+    def scenario():
+        dataElements = {f"field{index}": f"value {index}" for index in range(BATCH_SIZE)}
+        latencies = [timed(lambda: requestHelper.createRequestDataElements(requestId, dataElements)) for _ in range(BATCHES)]
+        return BATCH_SIZE * BATCHES, latencies
+    return scenario
+
+def batchGetBulkRequests(requestHelper: RequestHelper, bulkRequestIds: list):
+    def scenario():
+        latencies = [timed(lambda: requestHelper.getBulkRequests(bulkRequestIds, useCache=False)) for _ in range(BATCHES)]
+        return len(bulkRequestIds) * BATCHES, latencies
+    return scenario
+
+def ingestion(requestHelper: RequestHelper, path: str, workers: int):
+    def scenario():
+        latencies = []
+        for result in requestHelper.ingestBulkFile("benchmark-customer", "benchmark-workflow", path, workers=workers, checkFileExists=False):
+            if not result.succeeded:
+                raise RuntimeError(f"Row {result.rowNumber} failed: {result.error}")
+            latencies.append(result.elapsed)
+        return len(latencies), latencies
+    return scenario
+
+def writeBulkFile(path: str, rows: int, fields: int) -> None:
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow([f"field{index}" for index in range(fields)])
+        for row in range(rows):
+            writer.writerow([f"value {row}.{index}" for index in range(fields)])
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """
+    Print the change in throughput against a baseline
+
+    Returns:
+        bool: False if a scenario is slower than the baseline by more than tolerance
+    """
+    passed = True
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result['perSecond'] / baseline[name]['perSecond'] - 1 if baseline[name]['perSecond'] else 0.0
+        regressed = change < -tolerance
+        passed = passed and not regressed
+        print(f"{name:<32} {change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    return passed
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark RequestHelper against the local stub Request API")
+    parser.add_argument("--port", type=int, default=0, help="Port of the stub server (default any free port)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds the stub waits before answering (default 0.01)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub wait of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the stub calls answered with 503")
+    parser.add_argument("--rows", type=int, default=INGESTION_ROWS, help=f"Rows in the ingested file (default {INGESTION_ROWS})")
+    parser.add_argument("--fields", type=int, default=INGESTION_FIELDS, help=f"Fields per row (default {INGESTION_FIELDS})")
+    parser.add_argument("--workers", type=int, default=INGESTION_WORKERS, help=f"Ingestion workers (default {INGESTION_WORKERS})")
+    parser.add_argument("--memory", action="store_true", help="Trace the peak memory of each scenario (slower)")
+    parser.add_argument("--json", help="Save the results to this file")
+    parser.add_argument("--baseline", help="Compare the throughput with results saved by --json")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help=f"Largest allowed drop in throughput against the baseline (default {TOLERANCE})")
+    args = parser.parse_args()
+
+    settings = {'latency': args.latency, 'jitter': args.jitter, 'errorRate': args.error_rate}
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(args.port, settings, ready), daemon=True)
+    server.start()
+    apiUrl = ready.get(timeout=30)
+    print(f"Stub Request API on {apiUrl}, latency {args.latency * 1000:.0f} ms, Python {sys.version.split()[0]}, {os.cpu_count()} cores")
+
+    poolMaxSize = args.workers * 3
+    requestHelper = RequestHelper(BenchmarkUserHelper(), apiUrl=apiUrl, poolMaxSize=poolMaxSize, maxWorkers=args.workers * 2)
+    results = {}
+    try:
+        bulkRequest = requestHelper.createBulkRequest("benchmark-customer", "benchmark-workflow")
+        request = requestHelper.createRequest("benchmark-customer", bulkRequest.bulkRequestId, "benchmark-workflow")
+        bulkRequestIds = [requestHelper.createBulkRequest("benchmark-customer", "benchmark-workflow").bulkRequestId for _ in range(BATCH_SIZE)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.csv")
+            writeBulkFile(path, args.rows, args.fields)
+            scenarios = [
+                ("getBulkRequest", singleGetBulkRequest(requestHelper, bulkRequest.bulkRequestId)),
+                ("createRequest", singleCreateRequest(requestHelper, bulkRequest.bulkRequestId)),
+                (f"createRequestDataElements x{BATCH_SIZE}", batchCreateRequestDataElements(requestHelper, request.requestId)),
+                (f"getBulkRequests x{BATCH_SIZE}", batchGetBulkRequests(requestHelper, bulkRequestIds)),
+                (f"ingestBulkFile {args.rows}x{args.fields}", ingestion(requestHelper, path, args.workers)),
+            ]
+            for name, scenario in scenarios:
+                results[name] = run(name, scenario, args.memory)
+    finally:
+        requestHelper.close()
+        server.terminate()
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print(f"\nThroughput against {args.baseline}:")
+        if not compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
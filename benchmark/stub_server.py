@@ -0,0 +1,538 @@
+"""Local stub of the Request API for benchmarks and offline runs
+
+Usage:
+    python benchmark/stub_server.py [--port 8765] [--latency 0.02] [--jitter 0.005] [--error-rate 0.01] [--drop-rate 0.001] [--http2] [--encodings zstd,gzip] [--bandwidth 1000000]
+
+Implements the /BulkRequest/*, /BulkRequestDataElement/*, /Request/* and /RequestDataElement/*
+endpoints used by RequestHelper, keeping everything in memory.  Every call waits latency seconds
+(plus up to jitter), then a share of the calls fail: errorRate answer with errorStatus (and a
+Retry-After header when retryAfter is set) and dropRate close the connection without answering.
+With encodings set, replies are compressed with the first of them the client accepts, and
+gzip or zstd request bodies are decompressed.  bandwidth slows the transfer of the bodies to that
+many bytes per second per call, like a link between regions, so compression shows on the clock.
+Point a helper at it with the apiUrl option:
+
+    requestHelper = RequestHelper(userHelper, apiUrl="127.0.0.1:8765")
+
+StubServer speaks HTTP/1.1 from a thread per connection.  With --http2 the stub is an
+Http2StubServer instead, which speaks HTTP/2 without TLS (h2c with prior knowledge, as used by
+RequestHelper(http2=True)) and answers every call on its own stream (requires pip install h2).
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:
+    h2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_CONCURRENT_STREAMS = 128
+MIN_COMPRESSED_SIZE = 256
+
+class StubSettings:
+    """Behaviour of the stub server (can be changed while it runs)
+
+    Properties:
+        latency: Seconds every call waits before it is answered
+        jitter: Extra random wait of up to this many seconds
+        errorRate: Share of the calls answered with errorStatus
+        errorStatus: HTTP status code of the injected errors
+        retryAfter: Retry-After header sent with the injected errors (None for no header)
+        dropRate: Share of the calls whose connection is closed without an answer
+        encodings: Content-Encodings of the replies in order of preference (gzip and zstd), used when the client accepts them
+        bandwidth: Bytes per second at which the request and reply bodies of each call are transferred (0 for no limit)
+    """
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, errorRate: float = 0.0, errorStatus: int = 503, retryAfter: str = None, dropRate: float = 0.0, encodings: tuple = (), bandwidth: float = 0.0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.errorRate = errorRate
+        self.errorStatus = errorStatus
+        self.retryAfter = retryAfter
+        self.dropRate = dropRate
+        self.encodings = tuple(encodings)
+        self.bandwidth = bandwidth
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+class StubStore:
+    """In memory Bulk Requests, Requests and their Data Elements"""
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.bulkRequests = {}
+        self.bulkRequestDataElements = {}
+        self.requests = {}
+        self.requestDataElements = {}
+        self.calls = 0
+        self.connections = 0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.bulkRequests.clear()
+            self.bulkRequestDataElements.clear()
+            self.requests.clear()
+            self.requestDataElements.clear()
+            self.calls = 0
+            self.connections = 0
+
+    def connected(self) -> None:
+        with self.lock:
+            self.connections += 1
+
+    def delay(self, settings: StubSettings) -> float:
+        """
+        Count a call and get the seconds it waits before it is answered
+        """
+        with self.lock:
+            self.calls += 1
+        return settings.latency + (random.uniform(0, settings.jitter) if settings.jitter else 0)
+
+    @staticmethod
+    def transferTime(settings: StubSettings, size: int) -> float:
+        """
+        Get the seconds a body of size bytes takes to transfer at the settings' bandwidth
+        """
+        return size / settings.bandwidth if settings.bandwidth else 0.0
+
+    @staticmethod
+    def encode(settings: StubSettings, acceptEncoding: str, content: bytes) -> tuple:
+        """
+        Compress a reply with the first of the settings' encodings the client accepts
+
+        Returns:
+            tuple: (content, Content-Encoding or None if not compressed)
+        """
+        if len(content) < MIN_COMPRESSED_SIZE or not settings.encodings or not acceptEncoding:
+            return content, None
+        accepted = set()
+        for part in acceptEncoding.split(','):
+            name, _, parameters = part.strip().partition(';')
+            if parameters.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(name.strip().lower())
+        for encoding in settings.encodings:
+            if encoding in accepted or '*' in accepted:
+                if encoding == 'gzip':
+                    return gzip.compress(content, mtime=0), encoding
+                if encoding == 'zstd' and zstandard is not None:
+                    return zstandard.ZstdCompressor().compress(content), encoding
+        return content, None
+
+    def answer(self, settings: StubSettings, path: str, authorization: str, body: bytes, contentEncoding: str = None) -> tuple:
+        """
+        Answer a call after its delay
+
+        Returns:
+            tuple: (status, reply, headers), or None to drop the call without an answer
+        """
+        chance = random.random()
+        if chance < settings.dropRate:
+            return None
+        if chance < settings.dropRate + settings.errorRate:
+            headers = {'Retry-After': settings.retryAfter} if settings.retryAfter is not None else {}
+            return settings.errorStatus, {'error': 'Injected error'}, headers
+        if not (authorization or '').startswith('Bearer '):
+            return 401, {'error': 'Missing token'}, {}
+        try:
+            if contentEncoding == 'gzip':
+                body = gzip.decompress(body)
+            elif contentEncoding == 'zstd' and zstandard is not None:
+                body = zstandard.ZstdDecompressor().decompress(body)
+            elif contentEncoding not in (None, 'identity'):
+                return 415, {'error': f'Unsupported Content-Encoding {contentEncoding}'}, {}
+        except Exception:
+            return 400, {'error': f'Invalid {contentEncoding} body'}, {}
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return 400, {'error': 'Invalid JSON'}, {}
+        route = self.ROUTES.get(path.split('?', 1)[0])
+        if route is None:
+            return 404, {'error': 'Unknown endpoint'}, {}
+        try:
+            status, reply = route(self, data)
+        except KeyError as ex:
+            status, reply = 400, {'error': f'Missing {ex}'}
+        return status, reply, {}
+
+    def getBulkRequest(self, data: dict) -> tuple:
+        bulkRequest = self.bulkRequests.get(data['bulkRequestId'])
+        return (200, {'bulkRequest': bulkRequest}) if bulkRequest is not None else (404, {})
+
+    def createBulkRequest(self, data: dict) -> tuple:
+        now = _now()
+        bulkRequest = {'bulkRequestId': str(uuid.uuid4()), 'customerId': data['customerId'], 'workflowId': data['workflowId'], 'status': data.get('status', 1), 'createdOn': now, 'updatedOn': now, 'completedOn': None, 'deletedOn': None}
+        with self.lock:
+            self.bulkRequests[bulkRequest['bulkRequestId']] = bulkRequest
+            self.bulkRequestDataElements[bulkRequest['bulkRequestId']] = []
+        return 201, {'bulkRequest': bulkRequest}
+
+    def getBulkRequestDataElements(self, data: dict) -> tuple:
+        with self.lock:
+            dataElements = self.bulkRequestDataElements.get(data['bulkRequestId'])
+            dataElements = list(dataElements) if dataElements is not None else None
+        return (200, {'bulkRequestDataElement': dataElements}) if dataElements is not None else (404, {})
+
+    def createBulkRequestDataElement(self, data: dict) -> tuple:
+        now = _now()
+        dataElement = {'bulkRequestDataElementId': str(uuid.uuid4()), 'bulkRequestId': data['bulkRequestId'], 'dataField': data['dataField'], 'dataValue': data['dataValue'], 'createdOn': now, 'updatedOn': now, 'deletedOn': None}
+        with self.lock:
+            if data['bulkRequestId'] not in self.bulkRequests:
+                return 404, {}
+            self.bulkRequestDataElements[data['bulkRequestId']].append(dataElement)
+        return 201, {'bulkRequestDataElement': dataElement}
+
+    def bulkRequestFileExists(self, data: dict) -> tuple:
+        customerId, workflowId, filename = data['customerId'], data['workflowId'], data['filename']
+        with self.lock:
+            exists = any(
+                dataElement['dataValue'] == filename
+                for bulkRequest in self.bulkRequests.values() if (bulkRequest['customerId'], bulkRequest['workflowId']) == (customerId, workflowId)
+                for dataElement in self.bulkRequestDataElements[bulkRequest['bulkRequestId']] if dataElement['dataField'].lower() == 'filename'
+            )
+        return 200, {'exists': exists}
+
+    def createRequest(self, data: dict) -> tuple:
+        now = _now()
+        request = {'requestId': str(uuid.uuid4()), 'customerId': data['customerId'], 'workflowId': data['workflowId'], 'status': data.get('status', 1), 'createdOn': now, 'updatedOn': now, 'completedOn': None, 'deletedOn': None}
+        with self.lock:
+            self.requests[request['requestId']] = dict(request, bulkRequestId=data.get('bulkRequestId'))
+            self.requestDataElements[request['requestId']] = []
+        return 201, {'request': request}
+
+    def createRequestDataElement(self, data: dict) -> tuple:
+        now = _now()
+        dataElement = {'requestDataElementId': str(uuid.uuid4()), 'requestId': data['requestId'], 'dataField': data['dataField'], 'dataValue': data['dataValue'], 'createdOn': now, 'updatedOn': now, 'deletedOn': None}
+        with self.lock:
+            if data['requestId'] not in self.requests:
+                return 404, {}
+            self.requestDataElements[data['requestId']].append(dataElement)
+        return 201, {'requestDataElement': dataElement}
+
+    ROUTES = {
+        '/BulkRequest/GetBulkRequestByBulkRequestId': getBulkRequest,
+        '/BulkRequest/CreateBulkRequest': createBulkRequest,
+        '/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId': getBulkRequestDataElements,
+        '/BulkRequestDataElement/CreateBulkRequestDataElement': createBulkRequestDataElement,
+        '/BulkRequestDataElement/BulkRequestFileExists': bulkRequestFileExists,
+        '/Request/CreateRequest': createRequest,
+        '/RequestDataElement/CreateRequestDataElement': createRequestDataElement,
+    }
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers the Request API calls over HTTP/1.1 from the server's StubStore"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body are written separately, so without this every answer waits for a delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.store.connected()
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_PUT(self) -> None:
+        self.__handle()
+
+    def do_POST(self) -> None:
+        self.__handle()
+
+    def __handle(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        store = self.server.store
+        settings = self.server.settings
+        delay = store.delay(settings) + store.transferTime(settings, len(body))
+        if delay > 0:
+            time.sleep(delay)
+        answer = store.answer(settings, self.path, self.headers.get('Authorization'), body, self.headers.get('Content-Encoding'))
+        if answer is None:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        status, reply, headers = answer
+        content, encoding = store.encode(settings, self.headers.get('Accept-Encoding'), json.dumps(reply).encode())
+        transferTime = store.transferTime(settings, len(content))
+        if transferTime > 0:
+            time.sleep(transferTime)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+class StubServer(ThreadingHTTPServer):
+    """Stub Request API server
+
+    Args:
+        port (int): Port to listen on (0 for any free port)
+        settings (StubSettings): Latency and error injection (defaults to no latency and no errors)
+
+    Properties:
+        apiUrl: Value for the apiUrl option of the helpers
+        settings: StubSettings of the server
+        store: StubStore holding everything created
+
+    Example:
+        with StubServer(settings=StubSettings(latency=0.02)) as server:
+            requestHelper = RequestHelper(userHelper, apiUrl=server.apiUrl)
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, port: int = DEFAULT_PORT, settings: StubSettings = None) -> None:
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.settings = settings or StubSettings()
+        self.store = StubStore()
+        self.__thread = None
+
+    @property
+    def apiUrl(self) -> str:
+        return f"{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> 'StubServer':
+        """
+        Serve from a background thread
+        """
+        self.__thread = threading.Thread(target=self.serve_forever, name="StubServer", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving and close the socket
+        """
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self.stop()
+
+class _Http2Connection(asyncio.Protocol):
+    """One HTTP/2 connection of an Http2StubServer.  Each stream is answered by its own task"""
+    def __init__(self, server: 'Http2StubServer') -> None:
+        self.server = server
+        self.transport = None
+        self.connection = None
+        self.streams = {}
+        self.pending = {}
+        self.closed = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        self.server.store.connected()
+        self.connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8'))
+        self.connection.local_settings = h2.settings.Settings(client=False, initial_values={h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self.server.maxConcurrentStreams})
+        self.connection.initiate_connection()
+        self.transport.write(self.connection.data_to_send())
+
+    def connection_lost(self, exc) -> None:
+        self.closed = True
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            events = self.connection.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            # Not HTTP/2 (for example an HTTP/1.1 client): send GOAWAY and hang up
+            self.transport.write(self.connection.data_to_send())
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self.streams[event.stream_id] = (dict(event.headers), bytearray())
+            elif isinstance(event, h2.events.DataReceived):
+                self.streams[event.stream_id][1].extend(event.data)
+                self.connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                headers, body = self.streams.pop(event.stream_id)
+                asyncio.ensure_future(self.handle(event.stream_id, headers, bytes(body)))
+            elif isinstance(event, h2.events.WindowUpdated):
+                self.sendPending(event.stream_id)
+            elif isinstance(event, h2.events.StreamReset):
+                self.streams.pop(event.stream_id, None)
+                self.pending.pop(event.stream_id, None)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.connection.data_to_send())
+
+    async def handle(self, streamId: int, headers: dict, body: bytes) -> None:
+        store = self.server.store
+        settings = self.server.settings
+        delay = store.delay(settings) + store.transferTime(settings, len(body))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.closed:
+            return
+        answer = store.answer(settings, headers.get(':path', ''), headers.get('authorization'), body, headers.get('content-encoding'))
+        content = encoding = None
+        if answer is not None:
+            content, encoding = store.encode(settings, headers.get('accept-encoding'), json.dumps(answer[1]).encode())
+            transferTime = store.transferTime(settings, len(content))
+            if transferTime > 0:
+                await asyncio.sleep(transferTime)
+            if self.closed:
+                return
+        try:
+            if answer is None:
+                self.connection.reset_stream(streamId)
+            else:
+                status, reply, extraHeaders = answer
+                responseHeaders = [(':status', str(status)), ('content-type', 'application/json'), ('content-length', str(len(content)))]
+                if encoding is not None:
+                    responseHeaders.append(('content-encoding', encoding))
+                responseHeaders.extend((name.lower(), value) for name, value in extraHeaders.items())
+                self.connection.send_headers(streamId, responseHeaders)
+                self.pending[streamId] = content
+                self.sendPending(streamId)
+        except h2.exceptions.StreamClosedError:
+            self.pending.pop(streamId, None)
+        self.transport.write(self.connection.data_to_send())
+
+    def sendPending(self, streamId: int) -> None:
+        """
+        Send as much of the waiting response bodies as flow control allows (streamId 0 for every stream)
+        """
+        for pendingId in (list(self.pending) if streamId == 0 else [streamId]):
+            content = self.pending.get(pendingId)
+            if content is None:
+                continue
+            try:
+                while content:
+                    size = min(len(content), self.connection.local_flow_control_window(pendingId), self.connection.max_outbound_frame_size)
+                    if size <= 0:
+                        break
+                    self.connection.send_data(pendingId, content[:size])
+                    content = content[size:]
+                if content:
+                    self.pending[pendingId] = content
+                else:
+                    self.connection.end_stream(pendingId)
+                    del self.pending[pendingId]
+            except h2.exceptions.StreamClosedError:
+                self.pending.pop(pendingId, None)
+        self.transport.write(self.connection.data_to_send())
+
+class Http2StubServer:
+    """Stub Request API server speaking HTTP/2 without TLS (h2c with prior knowledge)
+
+    Serves the same endpoints, settings and store as StubServer from an asyncio event loop.
+    Every call is answered on its own stream, so one connection carries up to
+    maxConcurrentStreams calls at once.  Dropped calls have their stream reset.
+
+    Args:
+        port (int): Port to listen on (0 for any free port)
+        settings (StubSettings): Latency and error injection (defaults to no latency and no errors)
+        maxConcurrentStreams (int): Concurrent streams allowed per connection
+
+    Properties:
+        apiUrl: Value for the apiUrl option of the helpers
+        settings: StubSettings of the server
+        store: StubStore holding everything created (store.connections counts the connections)
+
+    Example:
+        with Http2StubServer(0, StubSettings(latency=0.02)) as server:
+            requestHelper = RequestHelper(userHelper, apiUrl=server.apiUrl, http2=True)
+    """
+    def __init__(self, port: int = DEFAULT_PORT, settings: StubSettings = None, maxConcurrentStreams: int = DEFAULT_MAX_CONCURRENT_STREAMS) -> None:
+        if h2 is None:
+            raise ImportError("Http2StubServer requires h2. Install it with: pip install h2")
+        self.settings = settings or StubSettings()
+        self.store = StubStore()
+        self.maxConcurrentStreams = maxConcurrentStreams
+        self.__loop = asyncio.new_event_loop()
+        self.__server = self.__loop.run_until_complete(self.__loop.create_server(lambda: _Http2Connection(self), '127.0.0.1', port, backlog=1024))
+        self.server_address = self.__server.sockets[0].getsockname()[:2]
+        self.__thread = None
+
+    @property
+    def apiUrl(self) -> str:
+        return f"{self.server_address[0]}:{self.server_address[1]}"
+
+    def serve_forever(self) -> None:
+        """
+        Serve until stop is called (or KeyboardInterrupt)
+        """
+        self.__loop.run_forever()
+
+    def start(self) -> 'Http2StubServer':
+        """
+        Serve from a background thread
+        """
+        self.__thread = threading.Thread(target=self.serve_forever, name="Http2StubServer", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop serving and close the socket
+        """
+        if self.__thread is not None:
+            self.__loop.call_soon_threadsafe(self.__loop.stop)
+            self.__thread.join()
+            self.__thread = None
+        self.server_close()
+
+    def server_close(self) -> None:
+        if not self.__loop.is_closed():
+            self.__server.close()
+            self.__loop.run_until_complete(self.__server.wait_closed())
+            self.__loop.close()
+
+    def __enter__(self) -> 'Http2StubServer':
+        return self.start()
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self.stop()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stub of the Request API")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every call waits")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random wait of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the calls answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503, help="Status code of the injected errors (default 503)")
+    parser.add_argument("--retry-after", help="Retry-After header sent with the injected errors")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of the calls whose connection is closed without an answer")
+    parser.add_argument("--http2", action="store_true", help="Speak HTTP/2 without TLS (h2c) instead of HTTP/1.1")
+    parser.add_argument("--encodings", default="", help="Comma separated Content-Encodings of the replies in order of preference (gzip, zstd)")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Bytes per second at which the bodies of each call are transferred")
+    args = parser.parse_args()
+    encodings = tuple(encoding.strip() for encoding in args.encodings.split(',') if encoding.strip())
+    settings = StubSettings(args.latency, args.jitter, args.error_rate, args.error_status, args.retry_after, args.drop_rate, encodings, args.bandwidth)
+    server = Http2StubServer(args.port, settings) if args.http2 else StubServer(args.port, settings)
+    print(f"Stub Request API listening on {server.apiUrl}{' (HTTP/2)' if args.http2 else ''}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Compare the HTTP/1.1 and HTTP/2 transports of RequestHelper against the local stub Request API
+
+Usage:
+    python benchmark/transport_benchmark.py [--latency 0.05] [--workers 64] [--sockets 4] [--connections 1] [--json results.json]
+
+Runs the same workload through three transports, each against a fresh stub server in a separate
+process (benchmark/stub_server.py, speaking HTTP/1.1 or h2c):
+    - HTTP/1.1 with one pooled connection per worker thread (the default RequestHelper setup)
+    - HTTP/1.1 limited to --sockets pooled connections (poolBlock=True)
+    - HTTP/2 (Http2Transport) with --connections connections
+The workload is createRequestDataElements batches fanned out over the worker threads and an
+ingestBulkFile of a generated CSV file.  Each run prints its operations per second, the p50 / p99
+latency of the ingested rows and the number of connections the stub server accepted.  The
+adaptive concurrency limit is off, so only the transport differs.  HTTP/2 needs
+pip install id_verification_python_requesthelper[http2].
+"""
+import argparse
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from id_verification_python_requesthelper.id_verification_python_requesthelper import RequestHelper
+from id_verification_python_requesthelper.http2_transport import Http2Transport
+
+from request_benchmark import BenchmarkUserHelper, percentile, writeBulkFile
+from stub_server import Http2StubServer, StubServer, StubSettings
+
+WORKERS = 64
+SOCKETS = 4
+CONNECTIONS = 1
+BATCH_SIZE = 500
+BATCHES = 4
+INGESTION_ROWS = 1000
+INGESTION_FIELDS = 5
+
+def serve(http2: bool, settings: dict, connection) -> None:
+    """
+    Run the stub server (in the server process) and answer requests for its connection count
+    """
+    server = (Http2StubServer if http2 else StubServer)(0, StubSettings(**settings)).start()
+    connection.send(server.apiUrl)
+    while True:
+        try:
+            connection.recv()
+        except EOFError:
+            break
+        connection.send(server.store.connections)
+
+def measure(name: str, http2: bool, options: dict, settings: dict, path: str, args) -> dict:
+    """
+    Run the workload through one transport
+
+    Parameters:
+        name (str): Name of the transport setup
+        http2 (bool): Serve h2c instead of HTTP/1.1
+        options (dict): RequestHelper options selecting the transport
+        settings (dict): StubSettings of the server
+        path (str): CSV file to ingest
+
+    Returns:
+        dict: Results
+    """
+    connection, serverConnection = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve, args=(http2, settings, serverConnection), daemon=True)
+    server.start()
+    apiUrl = connection.recv()
+    requestHelper = RequestHelper(BenchmarkUserHelper(), apiUrl=apiUrl, maxWorkers=args.workers, concurrencyLimit=False, **options)
+    try:
+        bulkRequest = requestHelper.createBulkRequest("benchmark-customer", "benchmark-workflow")
+        request = requestHelper.createRequest("benchmark-customer", bulkRequest.bulkRequestId, "benchmark-workflow")
+        dataElements = {f"field{index}": f"value {index}" for index in range(BATCH_SIZE)}
+        started = time.perf_counter()
+        for _ in range(BATCHES):
+            failed = [result for result in requestHelper.createRequestDataElements(request.requestId, dataElements) if isinstance(result, Exception)]
+            if failed:
+                raise RuntimeError(f"{name}: {failed[0]}")
+        batchSeconds = time.perf_counter() - started
+
+        latencies = []
+        started = time.perf_counter()
+        for result in requestHelper.ingestBulkFile("benchmark-customer", "benchmark-workflow", path, workers=args.workers, checkFileExists=False):
+            if not result.succeeded:
+                raise RuntimeError(f"{name}: row {result.rowNumber} failed: {result.error}")
+            latencies.append(result.elapsed)
+        ingestionSeconds = time.perf_counter() - started
+        latencies.sort()
+        connection.send('connections')
+        connections = connection.recv()
+    finally:
+        requestHelper.close()
+        connection.close()
+        server.terminate()
+    result = {
+        'dataElementsPerSecond': BATCH_SIZE * BATCHES / batchSeconds,
+        'rowsPerSecond': len(latencies) / ingestionSeconds,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'connections': connections,
+    }
+    print(f"{name:<36} {result['dataElementsPerSecond']:>9,.0f} elements/s {result['rowsPerSecond']:>7,.0f} rows/s  p50 {result['p50']:>7.1f} ms  p99 {result['p99']:>7.1f} ms  {connections:>4} connections")
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the HTTP/1.1 and HTTP/2 transports of RequestHelper")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stub waits before answering (default 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub wait of up to this many seconds")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Worker threads (default {WORKERS})")
+    parser.add_argument("--sockets", type=int, default=SOCKETS, help=f"Connections of the limited HTTP/1.1 pool (default {SOCKETS})")
+    parser.add_argument("--connections", type=int, default=CONNECTIONS, help=f"HTTP/2 connections (default {CONNECTIONS})")
+    parser.add_argument("--rows", type=int, default=INGESTION_ROWS, help=f"Rows in the ingested file (default {INGESTION_ROWS})")
+    parser.add_argument("--json", help="Save the results to this file")
+    args = parser.parse_args()
+
+    settings = {'latency': args.latency, 'jitter': args.jitter}
+    setups = [
+        (f"HTTP/1.1, {args.workers} sockets", False, lambda: {'poolMaxSize': args.workers}),
+        (f"HTTP/1.1, {args.sockets} sockets", False, lambda: {'poolMaxSize': args.sockets, 'poolBlock': True}),
+        (f"HTTP/2, {args.connections} connections", True, lambda: {'transport': Http2Transport(maxConnections=args.connections)}),
+    ]
+    print(f"Stub latency {args.latency * 1000:.0f} ms, {args.workers} workers, Python {sys.version.split()[0]}, {os.cpu_count()} cores")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.csv")
+        writeBulkFile(path, args.rows, INGESTION_FIELDS)
+        for name, http2, options in setups:
+            results[name] = measure(name, http2, options(), settings, path, args)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,7 +16,7 @@ packages = setuptools.find_packages(
 
 setuptools.setup(
     name="id_verification_python_requesthelper",
-    version="0.0.20",
+    version="0.0.44",
     author="Sam D Ware",
     author_email="sware@tritelph.com",
     description="A library to interact with the ID Verification Request APIs",
@@ -35,7 +35,17 @@ setuptools.setup(
         'multipledispatch',
         'id_verification_python_userhelper'
     ],
+    entry_points={
+        "console_scripts": [
+            "idv-bulk-load=id_verification_python_requesthelper.bulk_load:main"
+        ]
+    },
     extras_require={
-        "dev": ["pytest>=7.0", "twine>=5.0.0"]
+        "dev": ["pytest>=7.0", "twine>=5.0.0"],
+        "async": ["httpx"],
+        "prometheus": ["prometheus_client"],
+        "opentelemetry": ["opentelemetry-api"],
+        "http2": ["httpx[http2]"],
+        "zstd": ["zstandard"]
     }
 )
\ No newline at end of file
@@ -1 +1,60 @@
-from id_verification_python_requesthelper.id_verification_python_requesthelper import RequestHelper
\ No newline at end of file
+"""ID Verification Python Request Helper
+
+Names are imported on first use, so importing the models or enums does not load
+requests, httpx, multipledispatch or the UserHelper.
+"""
+import importlib
+
+_lazyImports = {
+    'RequestHelper': 'id_verification_python_requesthelper.id_verification_python_requesthelper',
+    'AsyncRequestHelper': 'id_verification_python_requesthelper.async_request_helper',
+    'BulkIngestion': 'id_verification_python_requesthelper.ingestion',
+    'IngestionResult': 'id_verification_python_requesthelper.ingestion',
+    'IngestionJournal': 'id_verification_python_requesthelper.journal',
+    'RetryPolicy': 'id_verification_python_requesthelper.retry',
+    'RetryBudget': 'id_verification_python_requesthelper.retry',
+    'CircuitBreaker': 'id_verification_python_requesthelper.circuit_breaker',
+    'CircuitBreakerRegistry': 'id_verification_python_requesthelper.circuit_breaker',
+    'CircuitOpenError': 'id_verification_python_requesthelper.circuit_breaker',
+    'CircuitState': 'id_verification_python_requesthelper.circuit_breaker',
+    'AdaptiveConcurrencyLimit': 'id_verification_python_requesthelper.concurrency_limit',
+    'RateLimiter': 'id_verification_python_requesthelper.rate_limit',
+    'RateLimitTimeout': 'id_verification_python_requesthelper.rate_limit',
+    'MemoryBucketStore': 'id_verification_python_requesthelper.rate_limit',
+    'SharedBucketStore': 'id_verification_python_requesthelper.rate_limit',
+    'SingleFlight': 'id_verification_python_requesthelper.coalescing',
+    'ResponseCache': 'id_verification_python_requesthelper.cache',
+    'BulkRequestWatcher': 'id_verification_python_requesthelper.watcher',
+    'BulkRequestStatusChange': 'id_verification_python_requesthelper.watcher',
+    'RequestDataElementWriter': 'id_verification_python_requesthelper.writer',
+    'WriteFailure': 'id_verification_python_requesthelper.writer',
+    'MetricsRecorder': 'id_verification_python_requesthelper.metrics',
+    'MetricsCollector': 'id_verification_python_requesthelper.metrics',
+    'CallbackMetrics': 'id_verification_python_requesthelper.metrics',
+    'PrometheusMetrics': 'id_verification_python_requesthelper.metrics',
+    'OpenTelemetryMetrics': 'id_verification_python_requesthelper.metrics',
+    'Transport': 'id_verification_python_requesthelper.transport',
+    'RequestsTransport': 'id_verification_python_requesthelper.transport',
+    'Http2Transport': 'id_verification_python_requesthelper.http2_transport',
+    'TokenManager': 'id_verification_python_requesthelper.token_manager',
+    'getApiUrl': 'id_verification_python_requesthelper.api_url',
+    'BulkRequest': 'id_verification_python_requesthelper.models',
+    'BulkRequestDataElement': 'id_verification_python_requesthelper.models',
+    'Request': 'id_verification_python_requesthelper.models',
+    'RequestDataElement': 'id_verification_python_requesthelper.models',
+    'BulkRequestStatus': 'id_verification_python_requesthelper.enums',
+    'RequestStatus': 'id_verification_python_requesthelper.enums',
+    'TERMINAL_BULK_REQUEST_STATUSES': 'id_verification_python_requesthelper.enums',
+}
+
+__all__ = list(_lazyImports)
+
+def __getattr__(name: str):
+    if name in _lazyImports:
+        value = getattr(importlib.import_module(_lazyImports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> list:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import threading
+import time
+
+API_URL_ENVIRONMENT_VARIABLE = "ID_VERIFICATION_REQUEST_API_URL"
+API_URL_CACHE_FILE_ENVIRONMENT_VARIABLE = "ID_VERIFICATION_REQUEST_API_URL_CACHE"
+API_URL_CACHE_TTL = 3600
+
+log = logging.getLogger(__name__)
+
+_cache = {}
+_cacheLock = threading.Lock()
+
+def getApiUrl(environment: str, apiUrl: str = None, cacheFile: str = None, cacheTtl: int = API_URL_CACHE_TTL) -> str:
+    """
+    Get the Request API URL for an environment
+
+    The URL is taken from the first of these that has it:
+        1. apiUrl
+        2. The ID_VERIFICATION_REQUEST_API_URL environment variable
+        3. The process wide cache (shared by every RequestHelper)
+        4. The on-disk cache file (cacheFile or the ID_VERIFICATION_REQUEST_API_URL_CACHE environment variable)
+        5. SSM parameter /id-verification/{environment}/request-api-url (boto3 is only imported here)
+
+    Parameters:
+        environment (str): Environment to run the API Requests
+        apiUrl (str): API URL to use instead of looking it up
+        cacheFile (str): Path of the on-disk cache file
+        cacheTtl (int): Seconds a cached URL is used before it is looked up again
+
+    Returns:
+        str: API URL
+    """
+    if apiUrl:
+        return apiUrl
+    apiUrl = os.environ.get(API_URL_ENVIRONMENT_VARIABLE)
+    if apiUrl:
+        return apiUrl
+
+    now = time.time()
+    with _cacheLock:
+        cached = _cache.get(environment)
+        if cached is not None and now - cached[1] < cacheTtl:
+            return cached[0]
+
+        cacheFile = cacheFile or os.environ.get(API_URL_CACHE_FILE_ENVIRONMENT_VARIABLE)
+        cached = _readCacheFile(cacheFile, environment) if cacheFile else None
+        if cached is None or now - cached[1] >= cacheTtl:
+            cached = (_getApiUrlFromSsm(environment), now)
+            if cacheFile:
+                _writeCacheFile(cacheFile, environment, cached)
+        _cache[environment] = cached
+        return cached[0]
+
+def clearApiUrlCache() -> None:
+    """
+    Clear the process wide API URL cache
+    """
+    with _cacheLock:
+        _cache.clear()
+
+def _getApiUrlFromSsm(environment: str) -> str:
+    """
+    Get the Request API URL for an environment from SSM
+
+    Parameters:
+        environment (str): Environment to run the API Requests
+
+    Returns:
+        str: API URL
+    """
+    import boto3
+
+    # Setup AWS Client
+    ssmSession = None
+    try:
+        ssmSession = boto3.Session(profile_name='tritel')
+    except Exception as ex:
+        log.warning(f"Error trying to use the Tritel Profile (using Default instead): {ex}")
+        ssmSession = boto3.Session()
+
+    ssmClient = ssmSession.client('ssm')
+
+    # Get the API URL
+    apiUrl = ssmClient.get_parameter(Name=F'/id-verification/{environment}/request-api-url')['Parameter']['Value']
+
+    return apiUrl
+
+def _readCacheFile(cacheFile: str, environment: str):
+    """
+    Read the cached URL for an environment from the cache file
+
+    Returns:
+        tuple: (API URL, time cached) or None if it is not cached
+    """
+    try:
+        with open(cacheFile) as file:
+            entry = json.load(file).get(environment)
+        return (entry['apiUrl'], entry['cachedAt']) if entry else None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as ex:
+        log.debug(f"API URL cache file {cacheFile} not used: {ex}")
+        return None
+
+def _writeCacheFile(cacheFile: str, environment: str, cached: tuple) -> None:
+    """
+    Write the cached URL for an environment to the cache file
+    """
+    try:
+        try:
+            with open(cacheFile) as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            entries = {}
+        entries[environment] = {'apiUrl': cached[0], 'cachedAt': cached[1]}
+        temporaryFile = f"{cacheFile}.{os.getpid()}.tmp"
+        with open(temporaryFile, 'w') as file:
+            json.dump(entries, file)
+        os.replace(temporaryFile, cacheFile)
+    except OSError as ex:
+        log.warning(f"Error writing the API URL cache file {cacheFile}: {ex}")
@@ -0,0 +1,656 @@
+import asyncio
+from id_verification_python_userhelper import UserHelper
+import logging
+import time
+from multipledispatch import dispatch
+
+from id_verification_python_requesthelper.api_url import API_URL_CACHE_TTL, getApiUrl
+from id_verification_python_requesthelper.circuit_breaker import CircuitBreakerRegistry, CircuitOpenError, isFailureStatus
+from id_verification_python_requesthelper.defaults import CONNECT_TIMEOUT, DEFAULT_POOL_MAXSIZE, READ_TIMEOUT, STREAM_CHUNK_SIZE
+from id_verification_python_requesthelper.encoding import JsonArrayReader, bulkRequestDataElementBody, bulkRequestFileExistsBody, bulkRequestIdBody, createBulkRequestBody, createRequestBody, encodeBulkRequestDataElements, encodeRequestDataElements, loads, requestDataElementBody
+from id_verification_python_requesthelper.metrics import API_URL_LOOKUP_SECONDS, BYTES_RECEIVED, BYTES_SENT, IN_FLIGHT, MetricsRecorder, POOL_UTILIZATION, REQUEST_SECONDS, REQUESTS, RETRIES
+from id_verification_python_requesthelper.models import BulkRequest, BulkRequestDataElement, Request, RequestDataElement
+from id_verification_python_requesthelper.rate_limit import MemoryBucketStore, RateLimiter
+from id_verification_python_requesthelper.retry import RetryPolicy, callFailed
+from id_verification_python_requesthelper.token_manager import MAX_TOKEN_AGE, TOKEN_REFRESH_MARGIN, TokenManager
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+log = logging.getLogger(__name__)
+
+class AsyncRequestHelper:
+    """AsyncRequestHelper class to handle Request related operations for the Id Verification APIs from asyncio code
+
+    Every API method is a coroutine.  Token refreshes and the SSM lookup run in a worker thread
+    and retries wait with asyncio.sleep, so the event loop is never blocked.  As with RequestHelper,
+    the API methods return an Exception instead of raising when a call fails (its __cause__ is the
+    httpx exception or CircuitOpenError when the call got no answer), except the iterator.
+
+    Args:
+        userHelper: UserHelper
+
+    Properties:
+        userHelper: UserHelper object
+        environment: Environment to run the API Requests
+
+    Returns:
+        AsyncRequestHelper object
+
+    Example:
+        async with AsyncRequestHelper(userHelper) as requestHelper:
+            bulkRequest = await requestHelper.getBulkRequest(bulkRequestId)
+    """
+    # Constructor
+    @dispatch(UserHelper)
+    def __init__(self, userHelper: UserHelper, **options) -> None:
+        """Initialize the AsyncRequestHelper
+
+        Parameters:
+            userHelper: UserHelper
+            **options: Client options (see __setup)
+
+        Returns:
+            AsyncRequestHelper object
+        """
+        log.debug("AsyncRequestHelper.__init__")
+        self.userHelper = userHelper
+        self.__setup(**options)
+
+    @dispatch(UserHelper, str)
+    def __init__(self, userHelper: UserHelper, environment: str, **options) -> None:
+        """Initialize the AsyncRequestHelper
+
+        Parameters:
+            userHelper: UserHelper
+            environment (str): Environment to run the API Requests
+            **options: Client options (see __setup)
+
+        Returns:
+            AsyncRequestHelper object
+        """
+        self.userHelper = userHelper
+        self.environment = environment
+        self.__setup(**options)
+
+    @dispatch(str, str)
+    def __init__(self, username: str, password: str, **options) -> None:
+        """Initialize the AsyncRequestHelper
+
+        Parameters:
+            username (str): Username to authenticate the API Requests
+            password (str): Password to authenticate the API Requests
+            **options: Client options (see __setup)
+
+        Returns:
+            AsyncRequestHelper object
+        """
+        self.userHelper = UserHelper(username, password)
+        self.__setup(**options)
+
+    @dispatch(str, str, str)
+    def __init__(self, username: str, password: str, environment: str, **options) -> None:
+        """Initialize the AsyncRequestHelper
+
+        Parameters:
+            username (str): Username to authenticate the API Requests
+            password (str): Password to authenticate the API Requests
+            environment (str): Environment to run the API Requests
+            **options: Client options (see __setup)
+
+        Returns:
+            AsyncRequestHelper object
+        """
+        self.userHelper = UserHelper(username, password)
+        self.environment = environment
+        self.__setup(**options)
+
+    # Properties
+    userHelper: UserHelper
+    """userHelper: UserHelper object"""
+    environment:str = "Development"
+    """environment: Environment to run the API Requests"""
+    __apiUrl = None
+    """__apiUrl: Request API URL"""
+    __client = None
+    """__client: Pooled asynchronous HTTP client shared by all API calls"""
+    __tokenManager = None
+    """__tokenManager: Keeps the UserHelper token fresh"""
+    __retryPolicy = None
+    """__retryPolicy: Decides which failed calls are retried and how long to wait"""
+    __circuitBreakers = None
+    """__circuitBreakers: One circuit breaker per endpoint (None if disabled)"""
+    __rateLimiter = None
+    """__rateLimiter: Limits the rate of the create calls, overall and per customer (None if not limited)"""
+    __metrics = None
+    """__metrics: Receives the request, retry, byte, token and pool measurements (None if not measured)"""
+    __inFlight = 0
+    """__inFlight: Number of API calls in flight (only counted when measured)"""
+    __headers = (None, None)
+    """__headers: Token and the request headers built for it"""
+
+    def __setup(self, apiUrl: str = None, apiUrlCacheFile: str = None, apiUrlCacheTtl: int = API_URL_CACHE_TTL, maxConcurrency: int = None, poolMaxSize: int = DEFAULT_POOL_MAXSIZE, keepAlive: bool = True, maxTokenAge: int = MAX_TOKEN_AGE, tokenRefreshMargin: int = TOKEN_REFRESH_MARGIN, backgroundTokenRefresh: bool = True, retryPolicy: RetryPolicy = None, circuitBreakers: CircuitBreakerRegistry = None, rateLimiter: RateLimiter = None, metrics: MetricsRecorder = None) -> None:
+        """
+        Store the client options.  No API calls are made until the first API call (or open)
+
+        Parameters:
+            apiUrl (str): API URL to use instead of looking it up (see getApiUrl)
+            apiUrlCacheFile (str): Path of a file used to cache the API URL between processes
+            apiUrlCacheTtl (int): Seconds a cached API URL is used before it is looked up again
+            maxConcurrency (int): Maximum number of API calls in flight at once (at most poolMaxSize, the default, so calls queue here instead of waiting for a connection)
+            poolMaxSize (int): Maximum number of connections kept open
+            keepAlive (bool): Reuse connections between calls
+            maxTokenAge (int): Age in seconds after which the token is no longer used
+            tokenRefreshMargin (int): Seconds before maxTokenAge at which the token is renewed
+            backgroundTokenRefresh (bool): Renew the token from a background thread so API calls never wait for it
+            retryPolicy (RetryPolicy): Retry policy for every API call (can be shared with a RequestHelper)
+            circuitBreakers (CircuitBreakerRegistry): Circuit breakers for the endpoints (True for a CircuitBreakerRegistry with the default settings, can be shared with a RequestHelper, default none)
+            rateLimiter (RateLimiter): Rate limit for createBulkRequest, createRequest and createRequestDataElement (can be shared with a RequestHelper)
+            metrics (MetricsRecorder): Receives per endpoint request counts, latencies, retries and bytes, token refresh and API URL lookup times and pool utilization (can be shared with a RequestHelper)
+        """
+        if httpx is None:
+            raise ImportError("AsyncRequestHelper requires httpx. Install it with: pip install id_verification_python_requesthelper[async]")
+        self.__apiUrlOptions = (apiUrl, apiUrlCacheFile, apiUrlCacheTtl)
+        self.__maxConcurrency = min(maxConcurrency or poolMaxSize, poolMaxSize)
+        self.__poolMaxSize = poolMaxSize
+        self.__keepAlive = keepAlive
+        self.__semaphore = asyncio.Semaphore(self.__maxConcurrency)
+        self.__openLock = asyncio.Lock()
+        self.__tokenManager = TokenManager(self.userHelper, maxTokenAge, tokenRefreshMargin, backgroundTokenRefresh, metrics)
+        self.__metrics = metrics
+        self.__retryPolicy = retryPolicy or RetryPolicy()
+        self.__circuitBreakers = CircuitBreakerRegistry() if circuitBreakers is True else (circuitBreakers or None)
+        self.__rateLimiter = rateLimiter
+
+    async def open(self) -> 'AsyncRequestHelper':
+        """
+        Get the token, look up the API URL and open the connection pool
+
+        Returns:
+            AsyncRequestHelper object
+        """
+        if self.__client is not None:
+            return self
+        async with self.__openLock:
+            if self.__client is None:
+                await asyncio.to_thread(self.__tokenManager.getToken)
+                lookupStarted = time.perf_counter()
+                self.__apiUrl = await asyncio.to_thread(getApiUrl, self.environment, *self.__apiUrlOptions)
+                if self.__metrics is not None:
+                    self.__metrics.observe(API_URL_LOOKUP_SECONDS, time.perf_counter() - lookupStarted)
+                limits = httpx.Limits(max_connections=self.__poolMaxSize, max_keepalive_connections=self.__poolMaxSize if self.__keepAlive else 0)
+                # The same connect and read timeouts as RequestHelper, and no pool timeout: the semaphore keeps the calls in flight within the pool
+                timeout = httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, pool=None)
+                self.__client = httpx.AsyncClient(base_url=f'http://{self.__apiUrl}', limits=limits, timeout=timeout)
+        return self
+
+    async def __aenter__(self) -> 'AsyncRequestHelper':
+        return await self.open()
+
+    async def __aexit__(self, excType, excValue, traceback) -> None:
+        await self.close()
+
+    async def __getHeaders(self) -> dict:
+        """
+        Get the request headers.  Only waits (in a worker thread) when the token has expired
+
+        Returns:
+            dict: Request headers (rebuilt only when the token changes, must not be changed)
+        """
+        if self.__tokenManager.isExpired():
+            token = await asyncio.to_thread(self.__tokenManager.getToken)
+        else:
+            token = self.__tokenManager.getToken()
+        headers = self.__headers
+        if headers[0] != token:
+            headers = self.__headers = (token, {'Authorization': f'Bearer {token}', 'accept': 'application/json', 'Content-Type': 'application/json'})
+        return headers[1]
+
+    async def __waitForRateLimit(self, customerId: str) -> None:
+        """
+        Wait with asyncio.sleep until the rate limiter lets a call for the customer go ahead.  Buckets kept
+        anywhere but in memory (a SharedBucketStore can wait for another process's lock) are taken in a worker thread
+        """
+        rateLimiter = self.__rateLimiter
+        if rateLimiter is None:
+            return
+        inMemory = isinstance(rateLimiter.store, MemoryBucketStore)
+        while True:
+            wait = rateLimiter.tryAcquire(customerId) if inMemory else await asyncio.to_thread(rateLimiter.tryAcquire, customerId)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def __send(self, method: str, path: str, data: str, idempotent: bool = True, stream: bool = False):
+        """
+        Send an API request, retrying connection errors and retryable status codes as the retry policy allows.
+        Waits between retries with asyncio.sleep, so the event loop is never blocked, and refuses calls while
+        the endpoint's circuit breaker is open
+
+        Parameters:
+            method (str): HTTP method
+            path (str): API path including the query string
+            data (str): JSON request body
+            idempotent (bool): Whether sending the request twice is harmless.  When False a connection error is only retried
+                if the request never reached the API, and only the status codes that say the API did not process it (429, 503)
+            stream (bool): Return as soon as the headers arrive and leave the body to be read (the caller must aclose the response)
+
+        Returns:
+            httpx.Response (the last response if the retries run out)
+
+        Raises:
+            httpx.TransportError if the last attempt could not connect
+            CircuitOpenError if the endpoint's circuit breaker is open
+        """
+        await self.open()
+        log.debug("AsyncRequestHelper URL: http://%s%s", self.__apiUrl, path)
+        endpoint = path.split('?', 1)[0]
+        breaker = self.__circuitBreakers.get(endpoint) if self.__circuitBreakers is not None else None
+        metrics = self.__metrics
+        self.__retryPolicy.recordRequest()
+        started = time.monotonic()
+        retries = 0
+        response = None
+        error = None
+        while True:
+            # Headers first: a failed token refresh must not use up one of the breaker's half open trial calls
+            headers = await self.__getHeaders()
+            if breaker is not None and not breaker.allow():
+                # Stop retrying once the breaker opens, and give the caller what the last attempt returned
+                if response is not None:
+                    return response
+                if error is not None:
+                    raise error
+                raise CircuitOpenError(breaker.endpoint, breaker.retryIn())
+            attemptStarted = None
+            try:
+                async with self.__semaphore:
+                    if metrics is not None:
+                        attemptStarted = self.__startMeasuring()
+                    response = await self.__client.send(self.__client.build_request(method, path, headers=headers, content=data), stream=stream)
+            except httpx.TransportError as te:
+                if breaker is not None:
+                    breaker.recordFailure()
+                if attemptStarted is not None:
+                    self.__measure(endpoint, method, data, attemptStarted, te)
+                response = None
+                error = te
+                # Only a failure to connect proves the API did not receive the request
+                if not idempotent and not isinstance(te, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+                    raise
+                retries += 1
+                delay = self.__retryPolicy.nextDelay(retries, started, te)
+                if delay is None:
+                    raise
+                if metrics is not None:
+                    metrics.increment(RETRIES, labels={'endpoint': endpoint, 'reason': type(te).__name__})
+                await asyncio.sleep(delay)
+                continue
+            except httpx.HTTPError as ex:
+                # The body could not be read or decoded: the call failed, but it is not retried
+                if breaker is not None:
+                    breaker.recordFailure()
+                if attemptStarted is not None:
+                    self.__measure(endpoint, method, data, attemptStarted, ex)
+                raise
+            except BaseException as ex:
+                # Cancelled or interrupted: says nothing about the API, so only the breaker trial is given back
+                if breaker is not None:
+                    breaker.release()
+                if attemptStarted is not None:
+                    self.__measure(endpoint, method, data, attemptStarted, ex)
+                raise
+            if breaker is not None:
+                if isFailureStatus(response.status_code):
+                    breaker.recordFailure()
+                else:
+                    breaker.recordSuccess()
+            if attemptStarted is not None:
+                self.__measure(endpoint, method, data, attemptStarted, response, stream)
+            if not self.__retryPolicy.isRetryableStatus(response.status_code, idempotent):
+                return response
+            retries += 1
+            delay = self.__retryPolicy.nextDelay(retries, started, response.status_code, response.headers.get('Retry-After'))
+            if delay is None:
+                return response
+            if metrics is not None:
+                metrics.increment(RETRIES, labels={'endpoint': endpoint, 'reason': str(response.status_code)})
+            await response.aclose()
+            error = None
+            await asyncio.sleep(delay)
+
+    def __startMeasuring(self) -> float:
+        """
+        Count a call as in flight and report the pool utilization (calls only run on the event loop, so no lock is needed)
+
+        Returns:
+            float: Start time of the call (perf_counter)
+        """
+        self.__inFlight += 1
+        self.__metrics.setGauge(IN_FLIGHT, self.__inFlight)
+        self.__metrics.setGauge(POOL_UTILIZATION, self.__inFlight / self.__poolMaxSize)
+        return time.perf_counter()
+
+    def __measure(self, endpoint: str, method: str, data, attemptStarted: float, outcome, stream: bool = False) -> None:
+        """
+        Report the latency, status and bytes of one call, and count it as no longer in flight
+
+        Parameters:
+            endpoint (str): API path without the query string
+            method (str): HTTP method
+            data: Request body
+            attemptStarted (float): Value returned by __startMeasuring
+            outcome: httpx.Response, or the exception the call raised
+            stream (bool): Whether the response body is streamed (it is then only counted if the API sent its length)
+        """
+        metrics = self.__metrics
+        latency = time.perf_counter() - attemptStarted
+        self.__inFlight -= 1
+        metrics.setGauge(IN_FLIGHT, self.__inFlight)
+        metrics.setGauge(POOL_UTILIZATION, self.__inFlight / self.__poolMaxSize)
+        isResponse = isinstance(outcome, httpx.Response)
+        metrics.increment(REQUESTS, labels={'endpoint': endpoint, 'method': method, 'status': str(outcome.status_code) if isResponse else type(outcome).__name__})
+        metrics.observe(REQUEST_SECONDS, latency, {'endpoint': endpoint, 'method': method})
+        if data:
+            metrics.increment(BYTES_SENT, len(data.encode()) if isinstance(data, str) else len(data), {'endpoint': endpoint})
+        if isResponse:
+            length = outcome.headers.get('Content-Length')
+            if length is not None:
+                metrics.increment(BYTES_RECEIVED, int(length), {'endpoint': endpoint})
+            elif not stream:
+                metrics.increment(BYTES_RECEIVED, len(outcome.content), {'endpoint': endpoint})
+
+    async def getBulkRequest(self, bulkRequestId: str):
+        """
+        Get Bulk Request
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+
+        Returns:
+            Bulk Request
+            or
+            None if not found
+            or
+            Exception if error
+        """
+        data = bulkRequestIdBody(bulkRequestId)
+        try:
+            response = await self.__send('PUT', '/BulkRequest/GetBulkRequestByBulkRequestId?api-version=0.1', data)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 200:
+            return BulkRequest.fromJson(loads(response.content)['bulkRequest'])
+        if response.status_code == 404:
+            return None
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def createBulkRequest(self, customerId: str, workflowId: str, retrySent: bool = True):
+        """
+        Create a new Bulk Request
+
+        Parameters:
+            customerId (str): Customer Id
+            workflowId (str): Workflow Id
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            Bulk Request
+            or
+            Exception if error
+        """
+        data = createBulkRequestBody(customerId, workflowId)
+        await self.__waitForRateLimit(customerId)
+        try:
+            response = await self.__send('POST', '/BulkRequest/CreateBulkRequest?api-version=0.2', data, idempotent=retrySent)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 201:
+            return BulkRequest.fromJson(loads(response.content)['bulkRequest'])
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def getBulkRequestDataElementsByBulkRequestId(self, bulkRequestId: str):
+        """
+        Get Bulk Request Data Elements by Bulk Request Id
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+
+        Returns:
+            List of Bulk Request Data Element
+            or
+            None if not found
+            or
+            Exception if error
+        """
+        data = bulkRequestIdBody(bulkRequestId)
+        try:
+            response = await self.__send('PUT', '/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId?api-version=0.1', data)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 200:
+            return [BulkRequestDataElement.fromJson(record) for record in loads(response.content).get('bulkRequestDataElement') or ()]
+        if response.status_code == 404:
+            return None
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def iterBulkRequestDataElementsByBulkRequestId(self, bulkRequestId: str, chunkSize: int = STREAM_CHUNK_SIZE):
+        """
+        Iterate the Bulk Request Data Elements of a Bulk Request as the response streams in
+
+        The response is decoded incrementally, so memory use does not grow with the number of elements
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+            chunkSize (int): Number of bytes read from the response at a time
+
+        Yields:
+            Bulk Request Data Element
+            (nothing if the Bulk Request is not found)
+
+        Raises:
+            Exception if error
+        """
+        data = bulkRequestIdBody(bulkRequestId)
+        response = await self.__send('PUT', '/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId?api-version=0.1', data, stream=True)
+        try:
+            if response.status_code == 404:
+                return
+            if response.status_code != 200:
+                raise Exception(f"Error: {response.status_code} - {await response.aread()}")
+            reader = JsonArrayReader('bulkRequestDataElement')
+            async for chunk in response.aiter_bytes(chunkSize):
+                for record in reader.feed(chunk):
+                    yield BulkRequestDataElement.fromJson(record)
+            reader.close()
+        finally:
+            await response.aclose()
+
+    async def createBulkRequestDataElement(self, bulkRequestId: str, dataField: str, dataValue: str, retrySent: bool = True):
+        """
+        Create Bulk Request Data Element
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+            dataField (str): Data Field
+            dataValue (str): Data Value
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            Bulk Request Data Element
+            or
+            Exception if error
+        """
+        return await self.__postBulkRequestDataElement(bulkRequestDataElementBody(bulkRequestId, dataField, dataValue), retrySent)
+
+    async def __postBulkRequestDataElement(self, data: bytes, retrySent: bool = True):
+        """
+        Create a Bulk Request Data Element from its encoded body
+
+        Returns:
+            Bulk Request Data Element
+            or
+            Exception if error
+        """
+        try:
+            response = await self.__send('POST', '/BulkRequestDataElement/CreateBulkRequestDataElement?api-version=0.2', data, idempotent=retrySent)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 201:
+            return BulkRequestDataElement.fromJson(loads(response.content)['bulkRequestDataElement'])
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def createBulkRequestDataElements(self, bulkRequestId: str, dataElements, retrySent: bool = True) -> list:
+        """
+        Create many Bulk Request Data Elements for one Bulk Request concurrently
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+            dataElements (dict or list): Data Field to Data Value, or a list of (Data Field, Data Value) pairs
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            List of Bulk Request Data Element, in the same order as dataElements
+            (an item that failed is returned as an Exception)
+        """
+        return list(await asyncio.gather(*[self.__postBulkRequestDataElement(data, retrySent) for dataField, data in encodeBulkRequestDataElements(bulkRequestId, dataElements)], return_exceptions=True))
+
+    async def checkBulkRequestFileExists(self, customerId: str, workflowId: str, filename: str):
+        """
+        Check if the Filename has already been used to create a Bulk Request for the Customer and Workflow
+
+        Args:
+            customerId (str): Customer Id
+            workflowId (str): Workflow Id
+            filename (str): Filename to be checked
+
+        Returns:
+            bool: whether or not the filename exists
+            or
+            Exception if error
+        """
+        data = bulkRequestFileExistsBody(customerId, workflowId, filename)
+        try:
+            response = await self.__send('PUT', '/BulkRequestDataElement/BulkRequestFileExists?api-version=0.2', data)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 200:
+            reply: bool = loads(response.content)['exists']
+            return reply
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def checkBulkRequestFilesExist(self, customerId: str, workflowId: str, filenames) -> dict:
+        """
+        Check many Filenames for one Customer and Workflow concurrently (each distinct Filename is checked once)
+
+        Args:
+            customerId (str): Customer Id
+            workflowId (str): Workflow Id
+            filenames: Filenames to be checked
+
+        Returns:
+            dict: Filename to whether or not the filename exists
+            (a Filename that could not be checked maps to an Exception)
+        """
+        uniqueFilenames = list(dict.fromkeys(filenames))
+        replies = await asyncio.gather(*[self.checkBulkRequestFileExists(customerId, workflowId, filename) for filename in uniqueFilenames], return_exceptions=True)
+        return dict(zip(uniqueFilenames, replies))
+
+    async def createRequest(self, customerId: str, bulkRequestId: str, workflowId: str, retrySent: bool = True):
+        """
+        Create a new Request
+
+        Parameters:
+            customerId (str): Customer Id
+            bulkRequestId (str): Bulk Request Id
+            workflowId (str): Workflow Id
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            Request
+            or
+            Exception if error
+        """
+        data = createRequestBody(customerId, bulkRequestId, workflowId)
+        await self.__waitForRateLimit(customerId)
+        try:
+            response = await self.__send('POST', '/Request/CreateRequest?api-version=0.1', data, idempotent=retrySent)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 201:
+            return Request.fromJson(loads(response.content)['request'])
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def createRequestDataElement(self, requestId: str, dataField: str, dataValue: str, customerId: str = None, retrySent: bool = True):
+        """
+        Create Request Data Element
+
+        Args:
+            requestId (str): Request Id
+            dataField (str): Data Field
+            dataValue (str): Data Value
+            customerId (str): Customer Id of the Request, used by the rate limiter (optional)
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            RequestDataElement: The Data Element that was created
+            or
+            Exception if error
+        """
+        return await self.__postRequestDataElement(requestDataElementBody(requestId, dataField, dataValue), customerId, retrySent)
+
+    async def __postRequestDataElement(self, data: bytes, customerId: str = None, retrySent: bool = True):
+        """
+        Create a Request Data Element from its encoded body
+
+        Returns:
+            RequestDataElement
+            or
+            Exception if error
+        """
+        await self.__waitForRateLimit(customerId)
+        try:
+            response = await self.__send('POST', '/RequestDataElement/CreateRequestDataElement?api-version=0.1', data, idempotent=retrySent)
+        except (httpx.HTTPError, CircuitOpenError) as he:
+            return callFailed(he)
+        if response.status_code == 201:
+            return RequestDataElement.fromJson(loads(response.content)['requestDataElement'])
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+
+    async def createRequestDataElements(self, requestId: str, dataElements, customerId: str = None, retrySent: bool = True) -> list:
+        """
+        Create many Request Data Elements for one Request concurrently
+
+        Args:
+            requestId (str): Request Id
+            dataElements (dict or list): Data Field to Data Value, or a list of (Data Field, Data Value) pairs
+            customerId (str): Customer Id of the Request, used by the rate limiter (optional)
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            list: RequestDataElement for each item, in the same order as dataElements
+            (an item that failed is returned as an Exception)
+        """
+        return list(await asyncio.gather(*[self.__postRequestDataElement(data, customerId, retrySent) for dataField, data in encodeRequestDataElements(requestId, dataElements)], return_exceptions=True))
+
+    async def close(self) -> None:
+        """
+        Close the connection pool and the UserHelper
+        """
+        if self.__client is not None:
+            await self.__client.aclose()
+            self.__client = None
+        if self.__tokenManager is not None:
+            self.__tokenManager.close()
+            self.__tokenManager = None
+        if getattr(self, 'userHelper', None) is not None:
+            self.userHelper.close()
@@ -0,0 +1,429 @@
+"""Load a CSV bulk file into a new Bulk Request using every core of the machine
+
+Usage:
+    idv-bulk-load FILE --customer CUSTOMER_ID --workflow WORKFLOW_ID [options]
+
+The Bulk Request is created once, then the file is cut at row boundaries into one part per worker
+process (the parent finds the cuts in a single pass), so each process only reads and parses its own
+part.  Each process has its own RequestHelper, connection pool and worker threads.
+Completed rows are written to a checkpoint file, so running the same command again after a crash or
+an error only loads the rows that are missing.  Rows that failed are not checkpointed and are retried
+on the next run.  The checkpoint is only saved every few seconds; with --journal every create call is
+also recorded, so the rows that were in flight are not created twice either, and a rerun continues the
+same Bulk Request even if the checkpoint was lost.
+
+The username and password are read from the ID_VERIFICATION_USERNAME and ID_VERIFICATION_PASSWORD
+environment variables unless --username / --password are given.
+"""
+import argparse
+import csv
+import io
+from itertools import islice
+import json
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from id_verification_python_requesthelper.ingestion import CSV_ENCODING, DEFAULT_INGESTION_WORKERS
+from id_verification_python_requesthelper.journal import IngestionJournal
+
+USERNAME_ENVIRONMENT_VARIABLE = "ID_VERIFICATION_USERNAME"
+PASSWORD_ENVIRONMENT_VARIABLE = "ID_VERIFICATION_PASSWORD"
+CHECKPOINT_INTERVAL = 5
+CHECKPOINT_VERSION = 1
+MAX_REPORTED_ERRORS = 10
+LATENCY_RESOLUTION = 0.001
+LATENCY_BUCKET_GROWTH = 1.05
+
+log = logging.getLogger(__name__)
+
+class LoadStats:
+    """Running totals for a bulk load
+
+    Properties:
+        succeeded: Number of rows loaded
+        failed: Number of rows that failed
+        latencyBuckets: Number of rows per latency bucket (bucket i holds the rows that took up to
+            LATENCY_RESOLUTION * LATENCY_BUCKET_GROWTH ** i seconds, so memory does not grow with the rows
+            and percentiles are within 5%)
+        errors: First few errors (row number, error)
+    """
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.succeeded = 0
+        self.failed = 0
+        self.latencyBuckets = {}
+        self.errors = []
+
+    def add(self, rowNumber: int, succeeded: bool, elapsed: float, error: str) -> None:
+        """
+        Record the result of one row
+        """
+        bucket = math.ceil(math.log(elapsed / LATENCY_RESOLUTION, LATENCY_BUCKET_GROWTH)) if elapsed > LATENCY_RESOLUTION else 0
+        self.latencyBuckets[bucket] = self.latencyBuckets.get(bucket, 0) + 1
+        if succeeded:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append((rowNumber, error))
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get a latency percentile
+
+        Returns:
+            float: Seconds, the upper bound of the bucket the percentile falls in (0 if no rows were loaded)
+        """
+        rows = sum(self.latencyBuckets.values())
+        if not rows:
+            return 0.0
+        rank = min(rows - 1, int(rows * percent / 100))
+        seen = 0
+        for bucket in sorted(self.latencyBuckets):
+            seen += self.latencyBuckets[bucket]
+            if seen > rank:
+                return LATENCY_RESOLUTION * LATENCY_BUCKET_GROWTH ** bucket
+        return 0.0
+
+    def summary(self) -> str:
+        """
+        Get the one line summary of the load so far
+        """
+        elapsed = time.perf_counter() - self.started
+        rows = self.succeeded + self.failed
+        return f"{rows} rows ({self.succeeded} succeeded, {self.failed} failed) in {elapsed:.1f}s, {rows / elapsed if elapsed else 0:.1f} rows/s, p50 {self.percentile(50) * 1000:.0f} ms, p99 {self.percentile(99) * 1000:.0f} ms"
+
+class Checkpoint:
+    """Checkpoint file recording the Bulk Request and the rows already loaded for a bulk file
+
+    Completed rows are kept as [first, last] ranges, so the file stays small when rows complete
+    roughly in order.  The file is replaced atomically, so a crash never leaves it half written.
+
+    Args:
+        path (str): Path of the checkpoint file
+        file (str): Path of the bulk file
+        customerId (str): Customer Id
+        workflowId (str): Workflow Id
+
+    Properties:
+        bulkRequestId: Bulk Request the rows are loaded into (None until it is created)
+        completedRows: Row numbers already loaded
+    """
+    def __init__(self, path: str, file: str, customerId: str, workflowId: str) -> None:
+        self.path = path
+        self.file = os.path.abspath(file)
+        self.customerId = customerId
+        self.workflowId = workflowId
+        self.bulkRequestId = None
+        self.completedRows = set()
+
+    def load(self) -> bool:
+        """
+        Read the checkpoint file if it exists and is for the same file, Customer and Workflow
+
+        Returns:
+            bool: whether or not a checkpoint was loaded
+        """
+        try:
+            with open(self.path) as checkpointFile:
+                checkpoint = json.load(checkpointFile)
+        except FileNotFoundError:
+            return False
+        if (checkpoint.get('version'), checkpoint.get('file'), checkpoint.get('customerId'), checkpoint.get('workflowId')) != (CHECKPOINT_VERSION, self.file, self.customerId, self.workflowId):
+            raise ValueError(f"Checkpoint {self.path} is for a different file, Customer or Workflow (use --restart to ignore it)")
+        self.bulkRequestId = checkpoint['bulkRequestId']
+        self.completedRows = set(row for first, last in checkpoint['completedRows'] for row in range(first, last + 1))
+        return True
+
+    def save(self) -> None:
+        """
+        Write the checkpoint file
+        """
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'file': self.file,
+            'customerId': self.customerId,
+            'workflowId': self.workflowId,
+            'bulkRequestId': self.bulkRequestId,
+            'completedRows': _toRanges(self.completedRows),
+        }
+        temporaryFile = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporaryFile, 'w') as checkpointFile:
+            json.dump(checkpoint, checkpointFile)
+        os.replace(temporaryFile, self.path)
+
+def _toRanges(rows: set) -> list:
+    """
+    Convert row numbers to a list of [first, last] ranges
+    """
+    ranges = []
+    for row in sorted(rows):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
+def _rowOffsets(file):
+    """
+    Yield the byte offset at which each row of a CSV file opened in binary mode starts (the header row first).
+    A row ends at the first line end outside double quotes, so quoted values may hold line breaks.  Blank
+    lines are not rows, as with csv.DictReader.  Quotes and line ends are single bytes in UTF-8 (CSV_ENCODING), so
+    they are found without decoding
+    """
+    offset = 0
+    rowStart = 0
+    quotes = 0
+    for line in file:
+        if quotes == 0:
+            rowStart = offset
+        offset += len(line)
+        quotes += line.count(b'"')
+        if quotes % 2 or (quotes == 0 and not line.strip(b'\r\n')):
+            continue
+        quotes = 0
+        yield rowStart
+
+def _splitFile(path: str, parts: int) -> list:
+    """
+    Cut a CSV file into about equally sized parts at row boundaries, reading it once
+
+    Returns:
+        list: (byte offset, number of the first row, number of rows) of each part that has rows
+    """
+    size = os.path.getsize(path)
+    cuts = []
+    with open(path, 'rb') as file:
+        rowStarts = _rowOffsets(file)
+        next(rowStarts, None)
+        for rowNumber, rowStart in enumerate(rowStarts, start=1):
+            # A part starts with the first row that starts past its share of the file
+            if not cuts or rowStart >= size * len(cuts) / parts:
+                cuts.append([rowStart, rowNumber, 0])
+            cuts[-1][2] += 1
+    return [tuple(cut) for cut in cuts]
+
+def _readPart(file, fieldnames: list, rows: int):
+    """
+    Read the rows of a part of a CSV file (file is positioned at the start of the part), decoded as ingestBulkFile decodes a whole file
+
+    Returns:
+        iterator: dict (Data Field to Data Value) for each row
+    """
+    return islice(csv.DictReader(io.TextIOWrapper(file, encoding=CSV_ENCODING, newline=''), fieldnames), rows)
+
+def _createRequestHelper(settings: dict):
+    """
+    Create the RequestHelper for a process
+    """
+    from id_verification_python_requesthelper.id_verification_python_requesthelper import RequestHelper
+
+    # Each of the workers row threads makes its createRequest call, then waits while the helper's
+    # maxWorkers threads create the Request Data Elements, so up to workers * 3 calls can be in flight
+    options = {'poolMaxSize': settings['workers'] * 3, 'maxWorkers': settings['workers'] * 2}
+    if settings['apiUrl']:
+        options['apiUrl'] = settings['apiUrl']
+    if settings['http2']:
+        options['http2'] = True
+    return RequestHelper(settings['username'], settings['password'], settings['environment'], **options)
+
+def _loadShard(settings: dict, shard: int, part: tuple, completedRows: set, results) -> None:
+    """
+    Load every row of a part of the file (see _splitFile) that is not in completedRows (runs in a worker process)
+    """
+    logging.basicConfig(level=settings['logLevel'])
+    offset, firstRowNumber, rows = part
+    try:
+        requestHelper = _createRequestHelper(settings)
+        journal = IngestionJournal(settings['journal']) if settings['journal'] else None
+        try:
+            with open(settings['file'], 'rb') as file:
+                file.seek(offset)
+                ingestion = requestHelper.ingestBulkFile(settings['customerId'], settings['workflowId'], _readPart(file, settings['fieldnames'], rows), workers=settings['workers'], bulkRequestId=settings['bulkRequestId'], rowFilter=lambda rowNumber: rowNumber not in completedRows, journal=journal, firstRowNumber=firstRowNumber)
+                for result in ingestion:
+                    results.put(('row', result.rowNumber, result.succeeded, result.elapsed, None if result.succeeded else str(result.error)))
+        finally:
+            requestHelper.close()
+            if journal is not None:
+                journal.close()
+    except Exception as ex:
+        results.put(('error', shard, f"{type(ex).__name__}: {ex}"))
+    results.put(('done', shard, None))
+
+def _startBulkRequest(settings: dict, checkpoint: Checkpoint, journal: IngestionJournal) -> None:
+    """
+    Find the Bulk Request to load into (from the checkpoint, then the journal) or create it, and record it in both
+    """
+    if checkpoint.bulkRequestId is None and journal is not None:
+        checkpoint.bulkRequestId = journal.getBulkRequestId(checkpoint.file, settings['customerId'], settings['workflowId'])
+        if checkpoint.bulkRequestId is not None:
+            log.info(f"Resuming Bulk Request {checkpoint.bulkRequestId} from the journal")
+    if checkpoint.bulkRequestId is None:
+        requestHelper = _createRequestHelper(settings)
+        try:
+            if settings['checkFileExists']:
+                filename = os.path.basename(settings['file'])
+                exists = requestHelper.checkBulkRequestFileExists(settings['customerId'], settings['workflowId'], filename)
+                if isinstance(exists, Exception):
+                    raise exists
+                if exists:
+                    raise FileExistsError(f"A Bulk Request already exists for {filename}")
+            bulkRequest = requestHelper.createBulkRequest(settings['customerId'], settings['workflowId'])
+            if isinstance(bulkRequest, Exception):
+                raise bulkRequest
+        finally:
+            requestHelper.close()
+        checkpoint.bulkRequestId = bulkRequest.bulkRequestId
+    if journal is not None:
+        # Recorded before any worker starts, so a rerun finds it even if the checkpoint is lost
+        if journal.getBulkRequestId(checkpoint.file, settings['customerId'], settings['workflowId']) != checkpoint.bulkRequestId:
+            journal.setBulkRequestId(checkpoint.file, settings['customerId'], settings['workflowId'], checkpoint.bulkRequestId)
+        checkpoint.completedRows.update(journal.completedRows(checkpoint.bulkRequestId))
+    checkpoint.save()
+
+def load(settings: dict,processes: int, checkpoint: Checkpoint, stats: LoadStats, progressInterval: float = CHECKPOINT_INTERVAL) -> bool:
+    """
+    Load the bulk file described by settings, using processes worker processes
+
+    Parameters:
+        settings (dict): file, customerId, workflowId, username, password, environment, apiUrl, workers, checkFileExists, journal, http2 and logLevel
+        processes (int): Number of worker processes
+        checkpoint (Checkpoint): Checkpoint (loaded if resuming), updated as rows complete
+        stats (LoadStats): Updated as rows complete
+        progressInterval (float): Seconds between checkpoint saves and progress reports
+
+    Returns:
+        bool: whether or not every worker process finished
+    """
+    journal = IngestionJournal(settings['journal']) if settings['journal'] else None
+    try:
+        _startBulkRequest(settings, checkpoint, journal)
+    finally:
+        if journal is not None:
+            journal.close()
+    with open(settings['file'], newline='', encoding=CSV_ENCODING) as file:
+        fieldnames = csv.DictReader(file).fieldnames
+    settings = dict(settings, bulkRequestId=checkpoint.bulkRequestId, fieldnames=fieldnames)
+    parts = _splitFile(settings['file'], processes) if fieldnames else []
+    print(f"Loading {settings['file']} into Bulk Request {checkpoint.bulkRequestId} with {len(parts)} processes ({len(checkpoint.completedRows)} rows already loaded)", file=sys.stderr)
+
+    # spawn rather than fork: the parent may have threads (token renewal, connection pools) that must not be copied
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = []
+    for shard, part in enumerate(parts):
+        offset, firstRowNumber, rows = part
+        completedRows = {row for row in checkpoint.completedRows if firstRowNumber <= row < firstRowNumber + rows}
+        worker = context.Process(target=_loadShard, args=(settings, shard, part, completedRows, results), name=f"idv-bulk-load-{shard}")
+        worker.start()
+        workers.append(worker)
+
+    running = len(parts)
+    finished = True
+    nextReport = time.monotonic() + progressInterval
+    try:
+        while running:
+            try:
+                message = results.get(timeout=1)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    log.error("Worker processes exited without reporting")
+                    finished = False
+                    break
+                message = None
+            if message is not None:
+                kind, value, *rest = message
+                if kind == 'row':
+                    succeeded, elapsed, error = rest
+                    stats.add(value, succeeded, elapsed, error)
+                    if succeeded:
+                        checkpoint.completedRows.add(value)
+                elif kind == 'error':
+                    log.error(f"Worker process {value} failed: {rest[0]}")
+                    finished = False
+                elif kind == 'done':
+                    running -= 1
+            if time.monotonic() >= nextReport:
+                checkpoint.save()
+                print(stats.summary(), file=sys.stderr)
+                nextReport = time.monotonic() + progressInterval
+    finally:
+        checkpoint.save()
+        for worker in workers:
+            worker.join()
+    return finished
+
+def main(argv: list = None) -> int:
+    """
+    Entry point of the idv-bulk-load command
+
+    Returns:
+        int: Exit code (0 if every row was loaded)
+    """
+    parser = argparse.ArgumentParser(prog="idv-bulk-load", description="Load a CSV bulk file (one identity per row, one column per Data Field) into a new Bulk Request")
+    parser.add_argument("file", help="CSV file with a header row")
+    parser.add_argument("--customer", required=True, help="Customer Id")
+    parser.add_argument("--workflow", required=True, help="Workflow Id")
+    parser.add_argument("--environment", default="Development", help="Environment to run the API Requests (default Development)")
+    parser.add_argument("--username", default=os.environ.get(USERNAME_ENVIRONMENT_VARIABLE), help=f"Username (default ${USERNAME_ENVIRONMENT_VARIABLE})")
+    parser.add_argument("--password", default=os.environ.get(PASSWORD_ENVIRONMENT_VARIABLE), help=f"Password (default ${PASSWORD_ENVIRONMENT_VARIABLE})")
+    parser.add_argument("--api-url", help="Request API URL to use instead of looking it up in SSM")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default one per core)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_INGESTION_WORKERS, help=f"Rows loaded concurrently by each process (default {DEFAULT_INGESTION_WORKERS})")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default FILE.checkpoint.json)")
+    parser.add_argument("--journal", help="Journal file recording every create call, so a rerun never creates a row's Request or Request Data Elements twice")
+    parser.add_argument("--http2", action="store_true", help="Multiplex each process's calls over a few HTTP/2 connections instead of one connection per call in flight")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and load the file into a new Bulk Request")
+    parser.add_argument("--no-check-file-exists", dest="checkFileExists", action="store_false", help="Do not fail if the filename was already used for the Customer and Workflow")
+    parser.add_argument("--progress-interval", type=float, default=CHECKPOINT_INTERVAL, help=f"Seconds between progress reports and checkpoint saves (default {CHECKPOINT_INTERVAL})")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level (default WARNING)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level)
+    if not args.username or not args.password:
+        parser.error(f"a username and password are required (--username / --password or ${USERNAME_ENVIRONMENT_VARIABLE} / ${PASSWORD_ENVIRONMENT_VARIABLE})")
+    if not os.path.isfile(args.file):
+        parser.error(f"{args.file} not found")
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.file}.checkpoint.json", args.file, args.customer, args.workflow)
+    try:
+        resuming = not args.restart and checkpoint.load()
+    except ValueError as ex:
+        parser.error(str(ex))
+    settings = {
+        'file': checkpoint.file,
+        'customerId': args.customer,
+        'workflowId': args.workflow,
+        'username': args.username,
+        'password': args.password,
+        'environment': args.environment,
+        'apiUrl': args.api_url,
+        'workers': max(1, args.workers),
+        # A resumed load goes into the Bulk Request it started, which already has the filename
+        'checkFileExists': args.checkFileExists and not resuming,
+        'journal': args.journal,
+        'http2': args.http2,
+        'logLevel': args.log_level,
+    }
+    stats = LoadStats()
+    try:
+        finished = load(settings, max(1, args.processes), checkpoint, stats, args.progress_interval)
+    except (Exception, KeyboardInterrupt) as ex:
+        print(f"Error: {ex}", file=sys.stderr)
+        print(stats.summary(), file=sys.stderr)
+        return 1
+    print(stats.summary())
+    for rowNumber, error in stats.errors:
+        print(f"Row {rowNumber}: {error}")
+    if stats.failed or not finished:
+        print(f"Not every row was loaded.  Run the same command again to retry the missing rows (checkpoint {checkpoint.path})", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+import threading
+import time
+
+CACHE_MAX_SIZE = 1024
+CACHE_TTL = 30
+CACHE_TERMINAL_TTL = 3600
+
+class ResponseCache:
+    """ResponseCache class to keep recent API replies in memory (least recently used, with a time to live)
+
+    Used by RequestHelper for getBulkRequest and checkBulkRequestFileExists.  Entries expire after
+    ttl seconds, or terminalTtl seconds for a Bulk Request that can no longer change (Completed,
+    Failed, Cancelled or Archived).  When more than maxSize entries are kept the least recently used
+    is dropped.  The cache is thread safe and can be shared between helpers.
+
+    A reply fetched while its entry was invalidated (by a write) may be stale, so callers take a
+    version before they fetch and pass it to put, which then drops the reply if the key was
+    invalidated in the meantime.
+
+    Args:
+        maxSize (int): Maximum number of entries
+        ttl (float): Seconds an entry is used
+        terminalTtl (float): Seconds a Bulk Request with a terminal status is used
+
+    Returns:
+        ResponseCache object
+    """
+    def __init__(self, maxSize: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL, terminalTtl: float = CACHE_TERMINAL_TTL) -> None:
+        self.maxSize = max(1, maxSize)
+        self.ttl = ttl
+        self.terminalTtl = terminalTtl
+        self.__entries = OrderedDict()
+        self.__invalidated = OrderedDict()
+        self.__version = 0
+        self.__floor = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
+    def lookup(self, key: tuple) -> tuple:
+        """
+        Look up an entry
+
+        Parameters:
+            key (tuple): Entry key
+
+        Returns:
+            tuple: (True, value) if there is a live entry, otherwise (False, None)
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return (True, entry[0])
+                del self.__entries[key]
+                self.__expirations += 1
+            self.__misses += 1
+            return (False, None)
+
+    def version(self) -> int:
+        """
+        Get the version to pass to put for a reply about to be fetched
+
+        Returns:
+            int: Number of invalidations so far
+        """
+        with self.__lock:
+            return self.__version
+
+    def put(self, key: tuple, value, ttl: float = None, version: int = None) -> None:
+        """
+        Add or replace an entry
+
+        Parameters:
+            key (tuple): Entry key
+            value: Value to keep (can be None)
+            ttl (float): Seconds the entry is used (defaults to the ttl of the cache)
+            version (int): Value of version() before the value was fetched.  The value is not kept if the key
+                was invalidated since (None to always keep it)
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.__lock:
+            if version is not None and max(self.__floor, self.__invalidated.get(key, 0)) > version:
+                return
+            self.__entries[key] = (value, expires)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxSize:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def invalidate(self, key: tuple) -> None:
+        """
+        Remove an entry if it is there
+
+        Parameters:
+            key (tuple): Entry key
+        """
+        with self.__lock:
+            self.__entries.pop(key, None)
+            self.__markInvalidated(key)
+
+    def pop(self, key: tuple) -> tuple:
+        """
+        Remove an entry and return it (without counting a hit or a miss)
+
+        Parameters:
+            key (tuple): Entry key
+
+        Returns:
+            tuple: (True, value) if there was a live entry, otherwise (False, None)
+        """
+        with self.__lock:
+            entry = self.__entries.pop(key, None)
+            self.__markInvalidated(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return (False, None)
+            return (True, entry[0])
+
+    def invalidateWhere(self, predicate) -> int:
+        """
+        Remove every entry for which predicate(key, value) is true.  Replies being fetched cannot be matched, so none
+        that were fetched before this call are kept by put
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self.__lock:
+            keys = [key for key, (value, expires) in self.__entries.items() if predicate(key, value)]
+            for key in keys:
+                del self.__entries[key]
+            self.__version += 1
+            self.__floor = self.__version
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+        Remove every entry
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.__invalidated.clear()
+            self.__version += 1
+            self.__floor = self.__version
+
+    def __markInvalidated(self, key: tuple) -> None:
+        """
+        Record the version at which a key was invalidated.  Only the last maxSize keys are recorded, replies
+        fetched before a record that was dropped are not kept for any key
+        """
+        self.__version += 1
+        self.__invalidated[key] = self.__version
+        self.__invalidated.move_to_end(key)
+        while len(self.__invalidated) > self.maxSize:
+            dropped, version = self.__invalidated.popitem(last=False)
+            self.__floor = max(self.__floor, version)
+
+    def stats(self) -> dict:
+        """
+        Get the cache statistics
+
+        Returns:
+            dict: size, hits, misses, hitRate, evictions and expirations
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                'size': len(self.__entries),
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hitRate': self.__hits / lookups if lookups else 0.0,
+                'evictions': self.__evictions,
+                'expirations': self.__expirations,
+            }
@@ -0,0 +1,201 @@
+from collections import deque
+from enum import Enum
+import logging
+import threading
+import time
+
+CIRCUIT_FAILURE_RATE = 0.5
+CIRCUIT_MINIMUM_CALLS = 20
+CIRCUIT_WINDOW_SIZE = 50
+CIRCUIT_RESET_TIMEOUT = 30
+CIRCUIT_HALF_OPEN_CALLS = 3
+
+log = logging.getLogger(__name__)
+
+def isFailureStatus(statusCode: int) -> bool:
+    """
+    Check if a status code shows the API is failing or overloaded
+
+    Returns:
+        bool: True for 429, 499 and 5xx
+    """
+    return statusCode == 429 or statusCode == 499 or statusCode >= 500
+
+class CircuitState(Enum):
+    Closed = 1
+    Open = 2
+    HalfOpen = 3
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+    def __init__(self, endpoint: str, retryIn: float) -> None:
+        super().__init__(f"Circuit breaker for {endpoint} is open, calls resume in {retryIn:.1f} seconds")
+        self.endpoint = endpoint
+        self.retryIn = retryIn
+
+class CircuitBreaker:
+    """CircuitBreaker class to stop calling an endpoint that is failing
+
+    The breaker starts closed and records whether each of the last windowSize calls failed.  Once at
+    least minimumCalls have been recorded and failureRate of them failed, it opens and calls are refused
+    for resetTimeout seconds.  It then lets halfOpenCalls trial calls through: if they all succeed it
+    closes again, if any of them fails it opens for another resetTimeout.
+
+    Args:
+        endpoint (str): Name of the endpoint (used in errors and logging)
+        failureRate (float): Share of failed calls at which the breaker opens
+        minimumCalls (int): Number of calls recorded before the breaker can open
+        windowSize (int): Number of recent calls the failure rate is taken over
+        resetTimeout (float): Seconds the breaker stays open before trial calls are let through
+        halfOpenCalls (int): Number of trial calls that must succeed to close the breaker
+
+    Returns:
+        CircuitBreaker object
+    """
+    def __init__(self, endpoint: str, failureRate: float = CIRCUIT_FAILURE_RATE, minimumCalls: int = CIRCUIT_MINIMUM_CALLS, windowSize: int = CIRCUIT_WINDOW_SIZE, resetTimeout: float = CIRCUIT_RESET_TIMEOUT, halfOpenCalls: int = CIRCUIT_HALF_OPEN_CALLS) -> None:
+        self.endpoint = endpoint
+        self.failureRate = failureRate
+        self.minimumCalls = min(minimumCalls, windowSize)
+        self.resetTimeout = resetTimeout
+        self.halfOpenCalls = halfOpenCalls
+        self.__state = CircuitState.Closed
+        self.__calls = deque(maxlen=windowSize)
+        self.__failures = 0
+        self.__openedAt = 0.0
+        self.__trialsStarted = 0
+        self.__trialsSucceeded = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state of the breaker"""
+        with self.__lock:
+            if self.__state == CircuitState.Open and time.monotonic() - self.__openedAt >= self.resetTimeout:
+                return CircuitState.HalfOpen
+            return self.__state
+
+    def allow(self) -> bool:
+        """
+        Check if a call can be made now.  Every allowed call must be followed by recordSuccess, recordFailure or release
+
+        Returns:
+            bool: whether or not the call can be made
+        """
+        with self.__lock:
+            if self.__state == CircuitState.Closed:
+                return True
+            if self.__state == CircuitState.Open:
+                if time.monotonic() - self.__openedAt < self.resetTimeout:
+                    return False
+                log.info(f"Circuit breaker for {self.endpoint} is half open")
+                self.__state = CircuitState.HalfOpen
+                self.__trialsStarted = 0
+                self.__trialsSucceeded = 0
+            if self.__trialsStarted >= self.halfOpenCalls:
+                return False
+            self.__trialsStarted += 1
+            return True
+
+    def release(self) -> None:
+        """
+        Give back a call allowed by allow that ended without an outcome (cancelled, or failed before it was sent), so a half open breaker lets another trial call through
+        """
+        with self.__lock:
+            if self.__state == CircuitState.HalfOpen and self.__trialsStarted > self.__trialsSucceeded:
+                self.__trialsStarted -= 1
+
+    def retryIn(self) -> float:
+        """
+        Get the number of seconds until the breaker lets trial calls through
+
+        Returns:
+            float: Seconds (0 if calls are allowed)
+        """
+        with self.__lock:
+            if self.__state != CircuitState.Open:
+                return 0.0
+            return max(0.0, self.resetTimeout - (time.monotonic() - self.__openedAt))
+
+    def recordSuccess(self) -> None:
+        """
+        Record a call that succeeded (any response that does not show the API is overloaded)
+        """
+        with self.__lock:
+            if self.__state == CircuitState.HalfOpen:
+                self.__trialsSucceeded += 1
+                if self.__trialsSucceeded >= self.halfOpenCalls:
+                    log.info(f"Circuit breaker for {self.endpoint} is closed")
+                    self.__state = CircuitState.Closed
+                    self.__calls.clear()
+                    self.__failures = 0
+            elif self.__state == CircuitState.Closed:
+                self.__record(False)
+
+    def recordFailure(self) -> None:
+        """
+        Record a call that failed (connection error, timeout or a status code that shows the API is overloaded)
+        """
+        with self.__lock:
+            if self.__state == CircuitState.HalfOpen:
+                self.__open()
+            elif self.__state == CircuitState.Closed:
+                self.__record(True)
+                if len(self.__calls) >= self.minimumCalls and self.__failures >= self.failureRate * len(self.__calls):
+                    self.__open()
+
+    def __record(self, failed: bool) -> None:
+        if len(self.__calls) == self.__calls.maxlen and self.__calls[0]:
+            self.__failures -= 1
+        self.__calls.append(failed)
+        if failed:
+            self.__failures += 1
+
+    def __open(self) -> None:
+        log.warning(f"Circuit breaker for {self.endpoint} is open for {self.resetTimeout} seconds")
+        self.__state = CircuitState.Open
+        self.__openedAt = time.monotonic()
+
+class CircuitBreakerRegistry:
+    """CircuitBreakerRegistry class that keeps one CircuitBreaker per endpoint
+
+    Breakers are created on first use with the settings given here.  A registry can be shared
+    between helpers so that they stop calling a failing endpoint together.
+
+    Args:
+        **settings: CircuitBreaker settings (failureRate, minimumCalls, windowSize, resetTimeout, halfOpenCalls)
+
+    Returns:
+        CircuitBreakerRegistry object
+    """
+    def __init__(self, **settings) -> None:
+        self.settings = settings
+        self.__breakers = {}
+        self.__lock = threading.Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """
+        Get the breaker for an endpoint
+
+        Parameters:
+            endpoint (str): API path without the query string
+
+        Returns:
+            CircuitBreaker
+        """
+        breaker = self.__breakers.get(endpoint)
+        if breaker is None:
+            with self.__lock:
+                breaker = self.__breakers.get(endpoint)
+                if breaker is None:
+                    breaker = CircuitBreaker(endpoint, **self.settings)
+                    self.__breakers[endpoint] = breaker
+        return breaker
+
+    def states(self) -> dict:
+        """
+        Get the state of every breaker
+
+        Returns:
+            dict: {endpoint: CircuitState}
+        """
+        return {endpoint: breaker.state for endpoint, breaker in list(self.__breakers.items())}
@@ -0,0 +1,86 @@
+from concurrent.futures import Future
+import threading
+
+class SingleFlight:
+    """SingleFlight class to share one call between the threads that ask for the same thing at the same time
+
+    The first thread to ask for a key makes the call; threads asking for the same key while it is
+    in flight wait for it and get the same result (or the same exception) instead of making their
+    own call.  Nothing is kept once the call returns, so this is not a cache: a thread asking after
+    the call returned makes a new one.  The result is shared, so it must not be changed by the
+    callers (return immutable values or copy them).
+
+    Returns:
+        SingleFlight object
+
+    Example:
+        bulkRequest, shared = singleFlight.do(('getBulkRequest', bulkRequestId), lambda: fetch(bulkRequestId))
+    """
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__calls = {}
+        self.__leaders = 0
+        self.__coalesced = 0
+
+    def do(self, key, function) -> tuple:
+        """
+        Call function, or wait for the call already in flight for key
+
+        Parameters:
+            key: Hashable key identifying the call
+            function: Function called without arguments
+
+        Returns:
+            tuple: (result, shared), shared being True if the result came from another thread's call
+
+        Raises:
+            The exception raised by function
+        """
+        with self.__lock:
+            future = self.__calls.get(key)
+            shared = future is not None
+            if shared:
+                self.__coalesced += 1
+            else:
+                future = self.__calls[key] = Future()
+                self.__leaders += 1
+        if shared:
+            return future.result(), True
+        try:
+            result = function()
+        except BaseException as ex:
+            self.__finish(key, future)
+            future.set_exception(ex)
+            raise
+        self.__finish(key, future)
+        future.set_result(result)
+        return result, False
+
+    def __finish(self, key, future: Future) -> None:
+        """
+        Stop sharing a call that returned (unless forget already replaced it)
+        """
+        with self.__lock:
+            if self.__calls.get(key) is future:
+                del self.__calls[key]
+
+    def forget(self, key) -> None:
+        """
+        Make the next call for key start a new call, even if one is in flight (for example after a
+        write that the call in flight may not see).  Threads already waiting still get its result
+
+        Parameters:
+            key: Key of the call
+        """
+        with self.__lock:
+            self.__calls.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Get the statistics of the calls
+
+        Returns:
+            dict: calls (made), coalesced (answered from another thread's call) and inFlight
+        """
+        with self.__lock:
+            return {'calls': self.__leaders, 'coalesced': self.__coalesced, 'inFlight': len(self.__calls)}
@@ -0,0 +1,218 @@
+import gzip
+import threading
+import time
+import zlib
+
+import requests
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+REQUEST_COMPRESSION_LEVEL = 1
+DECODE_CHUNK_SIZE = 65536
+
+def acceptEncoding() -> str:
+    """
+    Get the Accept-Encoding header value for the encodings that can be decoded here
+
+    Returns:
+        str: "zstd, gzip" when zstandard is installed, otherwise "gzip"
+    """
+    return "zstd, gzip" if zstandard is not None else "gzip"
+
+def compressBody(data: bytes) -> bytes:
+    """
+    Compress a request body with gzip (at the fastest level, JSON bodies still shrink several times)
+
+    Parameters:
+        data (bytes): Request body
+
+    Returns:
+        bytes: gzip compressed body, to be sent with Content-Encoding: gzip
+    """
+    return gzip.compress(data, REQUEST_COMPRESSION_LEVEL, mtime=0)
+
+class ContentDecoder:
+    """Streaming decoder for one response body with a Content-Encoding of gzip, deflate or zstd
+
+    Args:
+        encoding (str): Content-Encoding header of the response
+
+    Returns:
+        ContentDecoder object
+
+    Raises:
+        requests.exceptions.ContentDecodingError if the encoding is not supported
+    """
+    __slots__ = ('encoding', 'decompressor')
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding in ('gzip', 'x-gzip'):
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self.decompressor = zlib.decompressobj()
+        elif encoding == 'zstd' and zstandard is not None:
+            self.decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise requests.exceptions.ContentDecodingError(f"Unsupported Content-Encoding: {encoding}")
+
+    def decode(self, chunk: bytes) -> bytes:
+        """
+        Decode the next chunk of the body
+
+        Returns:
+            bytes: Decoded bytes (may be empty)
+        """
+        try:
+            return self.decompressor.decompress(chunk)
+        except (zlib.error, ValueError) as ex:
+            raise requests.exceptions.ContentDecodingError(f"Invalid {self.encoding} body: {ex}") from ex
+        except Exception as ex:
+            if zstandard is not None and isinstance(ex, zstandard.ZstdError):
+                raise requests.exceptions.ContentDecodingError(f"Invalid {self.encoding} body: {ex}") from ex
+            raise
+
+    def flush(self) -> bytes:
+        """
+        Get the decoded bytes left once the whole body was given to decode
+
+        Returns:
+            bytes: Remaining decoded bytes
+        """
+        flush = getattr(self.decompressor, 'flush', None)
+        return flush() if flush is not None else b''
+
+class DecodedResponse:
+    """Response read as it came over the wire and decoded from its Content-Encoding by RequestHelper
+
+    Has the parts of the requests.Response interface RequestHelper uses: status_code, headers,
+    content, iter_content, close and use as a context manager.  The body is read once, from
+    readRaw; when it was read to the end onRead is called with the response, whose wireBytes,
+    bytes and decodeSeconds then hold the compressed size, the decoded size and the time spent
+    decoding.
+
+    Args:
+        response: Transport response (requested with stream=True)
+        readRaw: Function taking a chunk size and returning an iterator over the undecoded body
+        onRead: Function called with this response once the body was read (or None)
+
+    Returns:
+        DecodedResponse object
+    """
+    __slots__ = ('response', 'readRaw', 'onRead', 'encoding', 'wireBytes', 'bytes', 'decodeSeconds', '_content', '_consumed')
+
+    def __init__(self, response, readRaw, onRead=None) -> None:
+        self.response = response
+        self.readRaw = readRaw
+        self.onRead = onRead
+        self.encoding = response.headers.get('Content-Encoding', 'identity').strip().lower() or 'identity'
+        self.wireBytes = 0
+        self.bytes = 0
+        self.decodeSeconds = 0.0
+        self._content = None
+        self._consumed = False
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = b''.join(self.iter_content(DECODE_CHUNK_SIZE))
+        return self._content
+
+    def iter_content(self, chunk_size: int = None):
+        """
+        Iterate the decoded body as it streams in (the decoded chunks can be larger than chunk_size)
+        """
+        if self._content is not None:
+            yield self._content
+            return
+        if self._consumed:
+            raise requests.exceptions.StreamConsumedError()
+        self._consumed = True
+        decoder = ContentDecoder(self.encoding) if self.encoding != 'identity' else None
+        for chunk in self.readRaw(chunk_size or DECODE_CHUNK_SIZE):
+            self.wireBytes += len(chunk)
+            if decoder is not None:
+                decodeStarted = time.perf_counter()
+                chunk = decoder.decode(chunk)
+                self.decodeSeconds += time.perf_counter() - decodeStarted
+            if chunk:
+                self.bytes += len(chunk)
+                yield chunk
+        if decoder is not None:
+            decodeStarted = time.perf_counter()
+            chunk = decoder.flush()
+            self.decodeSeconds += time.perf_counter() - decodeStarted
+            if chunk:
+                self.bytes += len(chunk)
+                yield chunk
+        if self.onRead is not None:
+            self.onRead(self)
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self) -> 'DecodedResponse':
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self.close()
+
+class TransferStats:
+    """Thread safe totals of the bytes sent and received by a RequestHelper, before and after compression"""
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__bytesSent = 0
+        self.__wireBytesSent = 0
+        self.__encodeSeconds = 0.0
+        self.__bytesReceived = 0
+        self.__wireBytesReceived = 0
+        self.__decodeSeconds = 0.0
+
+    def sent(self, size: int, wireSize: int, encodeSeconds: float = 0.0) -> None:
+        """
+        Count a request body of size bytes sent as wireSize bytes
+        """
+        with self.__lock:
+            self.__bytesSent += size
+            self.__wireBytesSent += wireSize
+            self.__encodeSeconds += encodeSeconds
+
+    def received(self, size: int, wireSize: int, decodeSeconds: float = 0.0) -> None:
+        """
+        Count a response body of size bytes received as wireSize bytes
+        """
+        with self.__lock:
+            self.__bytesReceived += size
+            self.__wireBytesReceived += wireSize
+            self.__decodeSeconds += decodeSeconds
+
+    def stats(self) -> dict:
+        """
+        Get the totals
+
+        Returns:
+            dict: bytesSent, wireBytesSent, encodeSeconds, bytesReceived, wireBytesReceived, decodeSeconds and
+                ratio (decoded bytes received per byte on the wire)
+        """
+        with self.__lock:
+            return {
+                'bytesSent': self.__bytesSent,
+                'wireBytesSent': self.__wireBytesSent,
+                'encodeSeconds': self.__encodeSeconds,
+                'bytesReceived': self.__bytesReceived,
+                'wireBytesReceived': self.__wireBytesReceived,
+                'decodeSeconds': self.__decodeSeconds,
+                'ratio': self.__bytesReceived / self.__wireBytesReceived if self.__wireBytesReceived else None,
+            }
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+CONCURRENCY_INITIAL_LIMIT = 20
+CONCURRENCY_MIN_LIMIT = 1
+CONCURRENCY_MAX_LIMIT = 200
+CONCURRENCY_BACKOFF_RATIO = 0.7
+CONCURRENCY_LATENCY_TOLERANCE = 2.0
+
+log = logging.getLogger(__name__)
+
+class AdaptiveConcurrencyLimit:
+    """AdaptiveConcurrencyLimit class to find how many API calls can be in flight without overloading the API
+
+    Uses additive increase / multiplicative decrease (AIMD), like TCP congestion control.  Every
+    call that succeeds raises the limit by 1 / limit, so it grows by about one per round of calls.
+    A call that fails (connection error, timeout, 429, 499 or 5xx), or a recent average latency
+    (about the last 10 calls) above latencyTolerance times the long term average (about the last
+    100 calls), multiplies the limit by backoffRatio.  The limit is cut at most once per round:
+    calls that started before the last cut do not cut it again.
+
+    Args:
+        initialLimit (int): Limit to start with
+        minLimit (int): Lowest limit
+        maxLimit (int): Highest limit
+        backoffRatio (float): Factor the limit is multiplied by when the API is overloaded
+        latencyTolerance (float): Recent average latency, as a multiple of the long term average, that counts as overloaded
+
+    Returns:
+        AdaptiveConcurrencyLimit object
+
+    Example:
+        started = limit.acquire()
+        try:
+            response = ...
+        finally:
+            limit.release(started, overloaded)
+    """
+    def __init__(self, initialLimit: int = CONCURRENCY_INITIAL_LIMIT, minLimit: int = CONCURRENCY_MIN_LIMIT, maxLimit: int = CONCURRENCY_MAX_LIMIT, backoffRatio: float = CONCURRENCY_BACKOFF_RATIO, latencyTolerance: float = CONCURRENCY_LATENCY_TOLERANCE) -> None:
+        self.minLimit = minLimit
+        self.maxLimit = max(minLimit, maxLimit)
+        self.backoffRatio = backoffRatio
+        self.latencyTolerance = latencyTolerance
+        self.__limit = float(min(max(initialLimit, minLimit), self.maxLimit))
+        self.__inFlight = 0
+        self.__shortLatency = None
+        self.__longLatency = None
+        self.__lastDecrease = 0.0
+        self.__condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight"""
+        return int(self.__limit)
+
+    @property
+    def inFlight(self) -> int:
+        """Number of calls in flight"""
+        return self.__inFlight
+
+    def acquire(self) -> float:
+        """
+        Wait until another call can be made
+
+        Returns:
+            float: time.monotonic() at which the call started (pass it to release)
+        """
+        with self.__condition:
+            while self.__inFlight >= int(self.__limit):
+                self.__condition.wait()
+            self.__inFlight += 1
+        return time.monotonic()
+
+    def cancel(self, started: float) -> None:
+        """
+        Record the end of a call that ended without an outcome (cancelled), leaving the limit as it is
+
+        Parameters:
+            started (float): Value returned by acquire
+        """
+        with self.__condition:
+            self.__inFlight -= 1
+            self.__condition.notify_all()
+
+    def release(self, started: float, overloaded: bool = False) -> None:
+        """
+        Record the end of a call and adjust the limit
+
+        Parameters:
+            started (float): Value returned by acquire
+            overloaded (bool): Whether the call failed in a way that shows the API is overloaded
+        """
+        latency = time.monotonic() - started
+        with self.__condition:
+            self.__inFlight -= 1
+            if not overloaded:
+                if self.__longLatency is None:
+                    self.__shortLatency = self.__longLatency = latency
+                else:
+                    self.__shortLatency += (latency - self.__shortLatency) * 0.1
+                    self.__longLatency += (latency - self.__longLatency) * 0.01
+                overloaded = self.__shortLatency > self.__longLatency * self.latencyTolerance
+            if overloaded:
+                if started >= self.__lastDecrease:
+                    self.__limit = max(float(self.minLimit), self.__limit * self.backoffRatio)
+                    self.__lastDecrease = time.monotonic()
+                    log.debug(f"Concurrency limit decreased to {int(self.__limit)}")
+            else:
+                self.__limit = min(float(self.maxLimit), self.__limit + 1 / self.__limit)
+            self.__condition.notify_all()
@@ -0,0 +1,9 @@
+# Defaults shared by RequestHelper, AsyncRequestHelper and the transports.  Kept in a module of
+# their own, so importing one helper never loads the other one or its HTTP library
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 20
+STREAM_CHUNK_SIZE = 65536
+# Seconds to wait for a connection to open and for the API to answer, as a requests (connect, read) timeout
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
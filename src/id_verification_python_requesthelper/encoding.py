@@ -0,0 +1,194 @@
+import codecs
+import json
+from json.encoder import encode_basestring as _encodeString
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+WHITESPACE_AND_COMMAS = ' \t\r\n,'
+
+# Compact separators and UTF-8 output, the same bytes orjson produces
+_jsonEncoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def dumps(value) -> bytes:
+    """
+    Encode any JSON value as compact UTF-8 JSON, using orjson when it is installed
+
+    Parameters:
+        value: JSON value (dicts, lists, strings, numbers, booleans and None)
+
+    Returns:
+        bytes: JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return _jsonEncoder.encode(value).encode()
+
+def _string(value) -> str:
+    """
+    Encode a JSON string with the C string escaper of the json module.  Data Fields, Data Values and
+    Filenames are sent as strings whatever their Python type, None is sent as null
+    """
+    if value is None:
+        return 'null'
+    return _encodeString(value if isinstance(value, str) else str(value))
+
+# The request bodies have a fixed shape, so only the strings have to be escaped
+BULK_REQUEST_ID_BODY = '{"bulkRequestId":%s}'
+CREATE_BULK_REQUEST_BODY = '{"customerId":%s,"workflowId":%s,"status":1}'
+BULK_REQUEST_DATA_ELEMENT_BODY = '{"bulkRequestId":%s,"dataField":%s,"dataValue":%s}'
+BULK_REQUEST_FILE_EXISTS_BODY = '{"customerId":%s,"workflowId":%s,"filename":%s}'
+CREATE_REQUEST_BODY = '{"customerId":%s,"bulkRequestId":%s,"workflowId":%s,"status":1}'
+REQUEST_DATA_ELEMENT_BODY = '{"requestId":%s,"dataField":%s,"dataValue":%s}'
+
+def bulkRequestIdBody(bulkRequestId: str) -> bytes:
+    """Body of the calls that take a Bulk Request Id"""
+    return (BULK_REQUEST_ID_BODY % _string(bulkRequestId)).encode()
+
+def createBulkRequestBody(customerId: str, workflowId: str) -> bytes:
+    """Body of CreateBulkRequest"""
+    return (CREATE_BULK_REQUEST_BODY % (_string(customerId), _string(workflowId))).encode()
+
+def bulkRequestDataElementBody(bulkRequestId: str, dataField: str, dataValue: str) -> bytes:
+    """Body of CreateBulkRequestDataElement"""
+    return (BULK_REQUEST_DATA_ELEMENT_BODY % (_string(bulkRequestId), _string(dataField), _string(dataValue))).encode()
+
+def bulkRequestFileExistsBody(customerId: str, workflowId: str, filename: str) -> bytes:
+    """Body of BulkRequestFileExists"""
+    return (BULK_REQUEST_FILE_EXISTS_BODY % (_string(customerId), _string(workflowId), _string(filename))).encode()
+
+def createRequestBody(customerId: str, bulkRequestId: str, workflowId: str) -> bytes:
+    """Body of CreateRequest"""
+    return (CREATE_REQUEST_BODY % (_string(customerId), _string(bulkRequestId), _string(workflowId))).encode()
+
+def requestDataElementBody(requestId: str, dataField: str, dataValue: str) -> bytes:
+    """Body of CreateRequestDataElement"""
+    return (REQUEST_DATA_ELEMENT_BODY % (_string(requestId), _string(dataField), _string(dataValue))).encode()
+
+def encodeBulkRequestDataElements(bulkRequestId: str, dataElements) -> list:
+    """
+    Encode the CreateBulkRequestDataElement bodies for a batch in one pass (the Bulk Request Id is escaped once)
+
+    Parameters:
+        bulkRequestId (str): Bulk Request Id
+        dataElements (dict or list): Data Field to Data Value, or a list of (Data Field, Data Value) pairs
+
+    Returns:
+        list: (Data Field, body) for each item, in the same order as dataElements
+    """
+    items = dataElements.items() if isinstance(dataElements, dict) else dataElements
+    prefix = '{"bulkRequestId":%s,"dataField":' % _string(bulkRequestId)
+    return [(dataField, f'{prefix}{_string(dataField)},"dataValue":{_string(dataValue)}}}'.encode()) for dataField, dataValue in items]
+
+def encodeRequestDataElements(requestId: str, dataElements) -> list:
+    """
+    Encode the CreateRequestDataElement bodies for a batch in one pass (the Request Id is escaped once)
+
+    Parameters:
+        requestId (str): Request Id
+        dataElements (dict or list): Data Field to Data Value, or a list of (Data Field, Data Value) pairs
+
+    Returns:
+        list: (Data Field, body) for each item, in the same order as dataElements
+    """
+    items = dataElements.items() if isinstance(dataElements, dict) else dataElements
+    prefix = '{"requestId":%s,"dataField":' % _string(requestId)
+    return [(dataField, f'{prefix}{_string(dataField)},"dataValue":{_string(dataValue)}}}'.encode()) for dataField, dataValue in items]
+
+def loads(data):
+    """
+    Decode a JSON response body, using orjson when it is installed
+
+    Parameters:
+        data (bytes or str): JSON document
+
+    Returns:
+        Decoded JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class JsonArrayReader:
+    """Incrementally decode the items of one array in a JSON document
+
+    Feed the document in chunks as they arrive and get back the items that are complete,
+    so only one item (plus one chunk) is held in memory no matter how long the array is.
+    A document whose array is null or missing has no items.
+
+    Args:
+        key (str): Name of the property that holds the array
+
+    Example:
+        reader = JsonArrayReader('bulkRequestDataElement')
+        for chunk in response.iter_content(65536):
+            for record in reader.feed(chunk):
+                ...
+        reader.close()
+    """
+    def __init__(self, key: str) -> None:
+        self.__key = key
+        self.__keyPattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.__decoder = json.JSONDecoder()
+        self.__textDecoder = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer = ''
+        self.__started = False
+        self.__finished = False
+
+    def feed(self, chunk: bytes) -> list:
+        """
+        Add the next chunk of the document
+
+        Parameters:
+            chunk (bytes): Next part of the document
+
+        Returns:
+            list: Array items completed by this chunk
+        """
+        self.__buffer += self.__textDecoder.decode(chunk)
+        records = []
+        position = 0
+        if not self.__started:
+            match = self.__keyPattern.search(self.__buffer)
+            if match is None:
+                return records
+            self.__started = True
+            position = match.end()
+        buffer = self.__buffer
+        while not self.__finished:
+            while position < len(buffer) and buffer[position] in WHITESPACE_AND_COMMAS:
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == ']':
+                self.__finished = True
+                break
+            try:
+                record, position = self.__decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break # The item is not complete yet
+            records.append(record)
+        self.__buffer = buffer[position:] if not self.__finished else ''
+        return records
+
+    def close(self) -> None:
+        """
+        Check that the whole array was read, or that the whole document was read and its array is null or missing
+
+        Raises:
+            ValueError if the document ended before the end of the array
+        """
+        if self.__finished:
+            return
+        if not self.__started:
+            # The array never started, so the buffer holds the whole document
+            try:
+                document = json.loads(self.__buffer + self.__textDecoder.decode(b'', final=True))
+            except ValueError:
+                document = None
+            if isinstance(document, dict) and document.get(self.__key) is None:
+                return
+        raise ValueError("The response ended before the end of the array")
@@ -0,0 +1,32 @@
+from enum import Enum
+
+class BulkRequestStatus(Enum):
+    # <summary>The bulk request is newly created.  And has no processing started or completed on it.</summary>
+    New = 1
+    # <summary>The bulk request is pending.</summary>
+    Pending = 2
+    # <summary>The bulk request is in progress.</summary>
+    InProgress = 3
+    # <summary>The bulk request is completed.</summary>
+    Completed = 4
+    # <summary>The bulk request is failed.</summary>
+    Failed = 5
+    # <summary>The bulk request is cancelled.</summary>
+    Cancelled = 6
+    # <summary>The bulk request is archived.</summary>
+    Archived = 7
+
+class RequestStatus(Enum):
+    # <summary>The request is newly created.  And has no processing started or completed on it.</summary>
+    New = 1
+    # <summary>The request is pending.</summary>
+    Pending = 2
+    # <summary>The request is in progress.</summary>
+    InProgress = 3
+    # <summary>The request is completed.</summary>
+    Completed = 4
+    # <summary>The request is failed.</summary>
+    Failed = 5
+
+# Bulk Request statuses that do not change any more
+TERMINAL_BULK_REQUEST_STATUSES = frozenset([BulkRequestStatus.Completed, BulkRequestStatus.Failed, BulkRequestStatus.Cancelled, BulkRequestStatus.Archived])
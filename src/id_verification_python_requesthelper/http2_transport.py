@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import threading
+
+import requests
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+from id_verification_python_requesthelper.defaults import DEFAULT_POOL_MAXSIZE
+from id_verification_python_requesthelper.transport import RequestsTransport, Transport
+
+DEFAULT_HTTP2_CONNECTIONS = 2
+
+log = logging.getLogger(__name__)
+
+class _HttpxResponse:
+    """httpx.Response (read on the Http2Transport event loop) with the parts of the requests.Response interface RequestHelper uses, and iter_raw"""
+    __slots__ = ('response', 'run')
+
+    def __init__(self, response, run) -> None:
+        self.response = response
+        self.run = run
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def content(self) -> bytes:
+        try:
+            return self.response.content
+        except httpx.ResponseNotRead:
+            return self.run(self.response.aread())
+
+    def iter_content(self, chunk_size: int = None):
+        return self.__iterate(self.response.aiter_bytes(chunk_size))
+
+    def iter_raw(self, chunk_size: int = None):
+        return self.__iterate(self.response.aiter_raw(chunk_size))
+
+    def __iterate(self, chunks):
+        """
+        Iterate an async iterator of the body from the calling thread
+        """
+        while True:
+            try:
+                chunk = self.run(chunks.__anext__())
+            except StopAsyncIteration:
+                return
+            except httpx.TransportError as ex:
+                raise _requestsError(ex) from ex
+            yield chunk
+
+    def close(self) -> None:
+        if not self.response.is_closed:
+            self.run(self.response.aclose())
+
+    def __enter__(self) -> '_HttpxResponse':
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self.close()
+
+def _requestsError(error) -> requests.exceptions.RequestException:
+    """
+    Get the requests exception matching an httpx exception
+    """
+    if isinstance(error, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return requests.exceptions.ConnectTimeout(str(error))
+    if isinstance(error, httpx.ReadTimeout):
+        return requests.exceptions.ReadTimeout(str(error))
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(error))
+    return requests.exceptions.ConnectionError(str(error))
+
+class Http2Transport(Transport):
+    """HTTP/2 transport using httpx (pip install id_verification_python_requesthelper[http2])
+
+    Concurrent calls from any number of threads are multiplexed as streams over at most
+    maxConnections connections, so a large batch or ingestion needs a few sockets instead of one
+    per worker thread.  An extra connection is only opened when the API's limit on concurrent
+    streams is reached.  The connections are driven by an httpx.AsyncClient on one event loop
+    thread owned by the transport (httpx's blocking client cannot safely open streams on a shared
+    HTTP/2 connection from several threads at once); the calling threads wait for their own
+    response.  The API URL is plain http, so HTTP/2 is spoken from the first byte (h2c
+    with prior knowledge).  If the API hangs up on the first call instead (an HTTP/1.1 API rejects
+    the HTTP/2 connection preface), the transport sends it and every later call through a
+    RequestsTransport instead (unless fallback is False).
+
+    Args:
+        maxConnections (int): Maximum number of connections
+        keepAlive (bool): Reuse connections between calls
+        fallback (bool): Switch to HTTP/1.1 if the API does not speak HTTP/2
+        poolMaxSize (int): Maximum number of connections kept open after falling back to HTTP/1.1
+
+    Returns:
+        Http2Transport object
+
+    Example:
+        requestHelper = RequestHelper(username, password, transport=Http2Transport(maxConnections=4))
+    """
+    def __init__(self, maxConnections: int = DEFAULT_HTTP2_CONNECTIONS, keepAlive: bool = True, fallback: bool = True, poolMaxSize: int = DEFAULT_POOL_MAXSIZE) -> None:
+        if httpx is None or h2 is None:
+            raise ImportError("Http2Transport requires httpx and h2. Install them with: pip install id_verification_python_requesthelper[http2]")
+        self.maxConnections = maxConnections
+        self.keepAlive = keepAlive
+        self.fallback = fallback
+        self.poolMaxSize = poolMaxSize
+        self.http2 = True
+        self.__negotiated = not fallback
+        self.__lock = threading.Lock()
+        self.__http1 = None
+        self.__loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.__loop.run_forever, name="Http2Transport", daemon=True)
+        self.__thread.start()
+        limits = httpx.Limits(max_connections=maxConnections, max_keepalive_connections=maxConnections if keepAlive else 0)
+        # HTTP/2 only, and no timeout unless the call sets one (as with requests)
+        self.__client = httpx.AsyncClient(http1=False, http2=True, limits=limits, timeout=None)
+
+    def __run(self, coroutine):
+        """
+        Run a coroutine on the event loop thread and wait for its result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop).result()
+
+    @staticmethod
+    async def __send(client, method: str, url: str, headers: dict, data, timeout, stream: bool):
+        request = client.build_request(method, url, headers=headers, content=data, timeout=timeout)
+        return await client.send(request, stream=stream)
+
+    @staticmethod
+    def __timeout(timeout):
+        """
+        Convert a requests timeout to an httpx timeout
+        """
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        if self.__http1 is not None:
+            return self.__http1.request(method, url, headers, data, timeout, stream)
+        try:
+            response = self.__run(self.__send(self.__client, method, url, headers, data, self.__timeout(timeout), stream))
+        except (httpx.RemoteProtocolError, httpx.ReadError, httpx.WriteError) as ex:
+            if self.__negotiated or not self.__fallBack(ex):
+                raise _requestsError(ex) from ex
+            # An HTTP/1.1 API answers the HTTP/2 connection preface with an error and hangs up, so it never saw the request
+            return self.__http1.request(method, url, headers, data, timeout, stream)
+        except httpx.TransportError as ex:
+            raise _requestsError(ex) from ex
+        self.__negotiated = True
+        return _HttpxResponse(response, self.__run)
+
+    def __fallBack(self, error) -> bool:
+        """
+        Switch to HTTP/1.1 connection pooling after the API failed to speak HTTP/2 on the first call
+
+        Returns:
+            bool: True if the call can be sent again over HTTP/1.1
+        """
+        with self.__lock:
+            if self.__http1 is None:
+                if self.__negotiated:
+                    return False
+                log.warning("Http2Transport: the API does not speak HTTP/2 (%s: %s), using HTTP/1.1", type(error).__name__, error)
+                self.__http1 = RequestsTransport(poolMaxSize=self.poolMaxSize, keepAlive=self.keepAlive)
+                self.http2 = False
+            return True
+
+    def iterRaw(self, response, chunkSize: int):
+        if isinstance(response, _HttpxResponse):
+            return response.iter_raw(chunkSize)
+        return self.__http1.iterRaw(response, chunkSize)
+
+    def wasNotSent(self, error: requests.exceptions.RequestException) -> bool:
+        if isinstance(error.__cause__, httpx.HTTPError):
+            return isinstance(error.__cause__, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+        return self.__http1 is not None and self.__http1.wasNotSent(error)
+
+    def close(self) -> None:
+        if self.__http1 is not None:
+            self.__http1.close()
+        if self.__loop.is_closed():
+            return
+        self.__run(self.__client.aclose())
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__loop.close()
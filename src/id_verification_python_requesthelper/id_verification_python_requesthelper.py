@@ -1,24 +1,41 @@
-import boto3
-from datetime import datetime, timezone
-from enum import Enum
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from id_verification_python_requesthelper.api_url import API_URL_CACHE_TTL, getApiUrl
+from id_verification_python_requesthelper.cache import ResponseCache
+from id_verification_python_requesthelper.coalescing import SingleFlight
+from id_verification_python_requesthelper.compression import DEFAULT_COMPRESSION_THRESHOLD, DecodedResponse, TransferStats, acceptEncoding, compressBody
+from id_verification_python_requesthelper.circuit_breaker import CircuitBreakerRegistry, CircuitOpenError, isFailureStatus
+from id_verification_python_requesthelper.concurrency_limit import AdaptiveConcurrencyLimit
+from id_verification_python_requesthelper.defaults import CONNECT_TIMEOUT, READ_TIMEOUT, STREAM_CHUNK_SIZE
+from id_verification_python_requesthelper.encoding import JsonArrayReader, bulkRequestDataElementBody, bulkRequestFileExistsBody, bulkRequestIdBody, createBulkRequestBody, createRequestBody, encodeBulkRequestDataElements, encodeRequestDataElements, loads, requestDataElementBody
+from id_verification_python_requesthelper.enums import BulkRequestStatus, RequestStatus, TERMINAL_BULK_REQUEST_STATUSES
+from id_verification_python_requesthelper.ingestion import BulkIngestion, DEFAULT_INGESTION_WORKERS
+from id_verification_python_requesthelper.metrics import API_URL_LOOKUP_SECONDS, BYTES_RECEIVED, BYTES_SENT, COALESCED, DECODE_SECONDS, ENCODE_SECONDS, IN_FLIGHT, MetricsRecorder, POOL_UTILIZATION, REQUEST_SECONDS, REQUESTS, RETRIES, WIRE_BYTES_RECEIVED, WIRE_BYTES_SENT
+from id_verification_python_requesthelper.models import BulkRequest, BulkRequestDataElement, Request, RequestDataElement
+from id_verification_python_requesthelper.rate_limit import RateLimiter
+from id_verification_python_requesthelper.retry import RetryPolicy, callFailed
+from id_verification_python_requesthelper.token_manager import MAX_TOKEN_AGE, TOKEN_REFRESH_MARGIN, TokenManager
+from id_verification_python_requesthelper.transport import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, RequestsTransport, Transport
+from id_verification_python_requesthelper.watcher import BulkRequestWatcher
+from id_verification_python_requesthelper.writer import RequestDataElementWriter
 from id_verification_python_userhelper import UserHelper
-import json
 import logging
 from multipledispatch import dispatch
 import requests
+import threading
 import time
 
-import requests.adapters
-
-MAX_TOKEN_AGE = 600
-MAX_RETRY_COUNT = 5
-WAIT_TIME_BETWEEN_RETRIES = 15
-
 log = logging.getLogger(__name__)
 
 class RequestHelper:
     """RequestHelper class to handle Request related operations for the Id Verification APIs
     
+    The API methods return an Exception instead of raising when a call fails: when the API answers
+    with an error status, and when the call got no answer (the retries ran out on connection errors,
+    or the endpoint's circuit breaker is open), in which case the Exception's __cause__ is the
+    requests exception or CircuitOpenError.  Only iterBulkRequestDataElementsByBulkRequestId, which
+    yields, raises.
+    
     Args:
         userHelper: UserHelper
         
@@ -31,11 +48,12 @@ class RequestHelper:
     """
     # Constructor
     @dispatch(UserHelper)
-    def __init__(self, userHelper: UserHelper) -> None:
+    def __init__(self, userHelper: UserHelper, **options) -> None:
         """Initialize the RequestHelper
         
         Parameters:
             userHelper: UserHelper
+            **options: Client options (see __setup)
             
         Returns:
             RequestHelper object
@@ -43,14 +61,16 @@ class RequestHelper:
         log.debug("RequestHelper.__init__")
         self.userHelper = userHelper
         self.userHelper.getToken()
-        self.__apiUrl = self.__getApiUrl()
+        self.__setup(**options)
         
     @dispatch(UserHelper, str)
-    def __init__(self, userHelper: UserHelper, environment: str) -> None:
+    def __init__(self, userHelper: UserHelper, environment: str, **options) -> None:
         """Initialize the RequestHelper
         
         Parameters:
             userHelper: UserHelper
+            environment (str): Environment to run the API Requests
+            **options: Client options (see __setup)
             
         Returns:
             RequestHelper object
@@ -58,31 +78,33 @@ class RequestHelper:
         self.userHelper = userHelper
         self.userHelper.getToken()
         self.environment = environment
-        self.__apiUrl = self.__getApiUrl()
+        self.__setup(**options)
         
     @dispatch(str, str)
-    def __init__(self, username: str, password: str) -> None:
+    def __init__(self, username: str, password: str, **options) -> None:
         """Initialize the RequestHelper
         
         Parameters:
             username (str): Username to authenticate the API Requests
             password (str): Password to authenticate the API Requests
+            **options: Client options (see __setup)
             
         Returns:
             RequestHelper object
         """
         self.userHelper = UserHelper(username, password)
         self.userHelper.getToken()
-        self.__apiUrl = self.__getApiUrl()
+        self.__setup(**options)
     
     @dispatch(str, str, str)
-    def __init__(self, username: str, password: str, environment: str) -> None:
+    def __init__(self, username: str, password: str, environment: str, **options) -> None:
         """Initialize the RequestHelper
         
         Parameters:
             username (str): Username to authenticate the API Requests
             password (str): Password to authenticate the API Requests
             environment (str): Environment to run the API Requests
+            **options: Client options (see __setup)
             
         Returns:
             RequestHelper object
@@ -90,7 +112,7 @@ class RequestHelper:
         self.userHelper = UserHelper(username, password)
         self.userHelper.getToken()
         self.environment = environment
-        self.__apiUrl = self.__getApiUrl()
+        self.__setup(**options)
         
     
     # Properties
@@ -99,106 +121,571 @@ class RequestHelper:
     environment:str = "Development"
     """environment: Environment to run the API Requests"""
     __apiUrl = None
-    """__getApiUrl: Request API URL"""
+    """__apiUrl: Request API URL"""
+    __transport = None
+    """__transport: HTTP transport shared by all API calls (pooled HTTP/1.1 connections, or multiplexed HTTP/2)"""
+    __retryPolicy = None
+    """__retryPolicy: Decides which failed calls are retried and how long to wait"""
+    __circuitBreakers = None
+    """__circuitBreakers: One circuit breaker per endpoint (None if disabled)"""
+    __concurrencyLimit = None
+    """__concurrencyLimit: Adaptive limit on the number of API calls in flight (None if disabled)"""
+    __rateLimiter = None
+    """__rateLimiter: Limits the rate of the create calls, overall and per customer (None if not limited)"""
+    __cache = None
+    """__cache: Cache for getBulkRequest and checkBulkRequestFileExists (None if not cached)"""
+    __singleFlight = None
+    """__singleFlight: Shares one call between concurrent identical reads (None if not coalesced)"""
+    __executor = None
+    """__executor: Worker threads used by the batch methods (created on first use)"""
+    __maxWorkers = DEFAULT_POOL_MAXSIZE
+    """__maxWorkers: Number of worker threads used by the batch methods"""
+    __tokenManager = None
+    """__tokenManager: Keeps the UserHelper token fresh"""
+    __metrics = None
+    """__metrics: Receives the request, retry, byte, token and pool measurements (None if not measured)"""
+    __inFlight = 0
+    """__inFlight: Number of API calls in flight (only counted when measured)"""
+    __poolMaxSize = DEFAULT_POOL_MAXSIZE
+    """__poolMaxSize: Maximum number of connections kept open per host"""
+    __headers = (None, None, None)
+    """__headers: Token and the request headers built for it, without and with Content-Encoding: gzip"""
+    __compression = False
+    """__compression: Ask for compressed responses and decode them here (False if the transport decodes them)"""
+    __compressRequests = None
+    """__compressRequests: Size in bytes from which request bodies are compressed (None if they are not)"""
+    __transfers = None
+    """__transfers: Bytes sent and received, before and after compression"""
+    __urls = None
+    """__urls: API path to full URL"""
+    
+    def __setup(self, apiUrl: str = None, apiUrlCacheFile: str = None, apiUrlCacheTtl: int = API_URL_CACHE_TTL, poolConnections: int = DEFAULT_POOL_CONNECTIONS, poolMaxSize: int = DEFAULT_POOL_MAXSIZE, poolBlock: bool = False, keepAlive: bool = True, maxWorkers: int = None, maxTokenAge: int = MAX_TOKEN_AGE, tokenRefreshMargin: int = TOKEN_REFRESH_MARGIN, backgroundTokenRefresh: bool = True, retryPolicy: RetryPolicy = None, circuitBreakers: CircuitBreakerRegistry = None, concurrencyLimit: AdaptiveConcurrencyLimit = None, rateLimiter: RateLimiter = None, cache: ResponseCache = None, metrics: MetricsRecorder = None, http2: bool = False, transport: Transport = None, coalesce: bool = False, compression: bool = False, compressRequests: int = None) -> None:
+        """
+        Look up the API URL and create the long lived HTTP transport used by every API call
+        
+        Parameters:
+            apiUrl (str): API URL to use instead of looking it up (see getApiUrl)
+            apiUrlCacheFile (str): Path of a file used to cache the API URL between processes
+            apiUrlCacheTtl (int): Seconds a cached API URL is used before it is looked up again
+            poolConnections (int): Number of host connection pools to cache
+            poolMaxSize (int): Maximum number of connections kept open per host
+            poolBlock (bool): Block when all connections to a host are in use instead of opening extra connections
+            keepAlive (bool): Reuse connections between calls
+            maxWorkers (int): Number of worker threads used by the batch methods (defaults to poolMaxSize)
+            maxTokenAge (int): Age in seconds after which the token is no longer used
+            tokenRefreshMargin (int): Seconds before maxTokenAge at which the token is renewed
+            backgroundTokenRefresh (bool): Renew the token from a background thread so API calls never wait for it
+            retryPolicy (RetryPolicy): Retry policy for every API call (can be shared between helpers)
+            circuitBreakers (CircuitBreakerRegistry): Circuit breakers for the endpoints (True for a CircuitBreakerRegistry with the default settings, can be shared between helpers, default none)
+            concurrencyLimit (AdaptiveConcurrencyLimit): Adaptive limit on the API calls in flight (True for AdaptiveConcurrencyLimit(initialLimit=poolMaxSize), can be shared between helpers, default no limit)
+            rateLimiter (RateLimiter): Rate limit for createBulkRequest, createRequest and createRequestDataElement (can be shared between helpers)
+            cache (ResponseCache): Cache for getBulkRequest and checkBulkRequestFileExists (True for a ResponseCache with the default settings, can be shared between helpers)
+            metrics (MetricsRecorder): Receives per endpoint request counts, latencies, retries and bytes, token refresh and API URL lookup times and pool utilization (can be shared between helpers)
+            http2 (bool): Multiplex the calls over a few HTTP/2 connections (an Http2Transport, falling back to HTTP/1.1 if httpx and h2 are not installed or the API does not speak HTTP/2)
+            transport (Transport): HTTP transport to use instead of the one built from the pool and http2 options (closed with the helper)
+            coalesce (bool): Let concurrent getBulkRequest / getBulkRequestDataElementsByBulkRequestId calls for the same Bulk Request share one API call (default each read makes its own call)
+            compression (bool): Ask for zstd (when zstandard is installed) or gzip compressed responses and decode them as they stream in, counting the bytes on the wire (default left to the transport)
+            compressRequests (int): Compress request bodies of at least this many bytes with gzip (True for DEFAULT_COMPRESSION_THRESHOLD, default not compressed)
+        """
+        self.__metrics = metrics
+        self.__tokenManager = TokenManager(self.userHelper, maxTokenAge, tokenRefreshMargin, backgroundTokenRefresh, metrics)
+        lookupStarted = time.perf_counter()
+        self.__apiUrl = getApiUrl(self.environment, apiUrl, apiUrlCacheFile, apiUrlCacheTtl)
+        if metrics is not None:
+            metrics.observe(API_URL_LOOKUP_SECONDS, time.perf_counter() - lookupStarted)
+        self.__poolMaxSize = poolMaxSize
+        self.__inFlightLock = threading.Lock()
+        self.__urls = {}
+        self.__maxWorkers = maxWorkers or poolMaxSize
+        self.__executorLock = threading.Lock()
+        self.__retryPolicy = retryPolicy or RetryPolicy()
+        self.__circuitBreakers = CircuitBreakerRegistry() if circuitBreakers is True else (circuitBreakers or None)
+        self.__concurrencyLimit = AdaptiveConcurrencyLimit(initialLimit=poolMaxSize) if concurrencyLimit is True else (concurrencyLimit or None)
+        self.__rateLimiter = rateLimiter
+        self.__cache = ResponseCache() if cache is True else (cache or None)
+        self.__singleFlight = SingleFlight() if coalesce else None
+        self.__transport = transport or self.__createTransport(poolConnections, poolMaxSize, poolBlock, keepAlive, http2)
+        # Only transports that give the body as it came over the wire can have it decoded here
+        self.__compression = bool(compression) and type(self.__transport).iterRaw is not Transport.iterRaw
+        self.__compressRequests = DEFAULT_COMPRESSION_THRESHOLD if compressRequests is True else (compressRequests or None)
+        self.__transfers = TransferStats()
+        
+    def __createTransport(self, poolConnections: int, poolMaxSize: int, poolBlock: bool, keepAlive: bool, http2: bool) -> Transport:
+        """
+        Create the HTTP transport: multiplexed HTTP/2 when asked for and available, otherwise pooled HTTP/1.1
+        
+        Returns:
+            Transport
+        """
+        if http2:
+            # Only imported here, so httpx is not loaded unless HTTP/2 is asked for
+            from id_verification_python_requesthelper.http2_transport import Http2Transport
+            try:
+                return Http2Transport(keepAlive=keepAlive, poolMaxSize=poolMaxSize)
+            except ImportError as ex:
+                log.warning("RequestHelper: %s. Using HTTP/1.1", ex)
+        return RequestsTransport(poolConnections, poolMaxSize, poolBlock, keepAlive)
     
+    def __send(self, method: str, path: str, data: str, idempotent: bool = True, **kwargs) -> requests.Response:
+        """
+        Send an API request, retrying connection errors and retryable status codes as the retry policy allows.
+        Calls wait for a slot under the adaptive concurrency limit, and are refused while the endpoint's circuit breaker is open
+        
+        Parameters:
+            method (str): HTTP method
+            path (str): API path including the query string
+            data (str): JSON request body
+            idempotent (bool): Whether sending the request twice is harmless.  When False a connection error is only retried
+                if the request never reached the API, and only the status codes that say the API did not process it (429, 503) are
+                retried, so a request the API may already have committed is not sent again
+            **kwargs: Passed on to the transport (timeout or stream)
+        
+        Returns:
+            requests.Response, or a response with the same interface from the transport or a DecodedResponse (the last response if the retries run out)
+        
+        Raises:
+            requests.exceptions.RequestException if the last attempt could not connect
+            CircuitOpenError if the endpoint's circuit breaker is open
+        """
+        url = self.__urls.get(path)
+        if url is None:
+            url = self.__urls[path] = f'http://{self.__apiUrl}{path}'
+        log.debug("RequestHelper URL: %s", url)
+        endpoint = path.split('?', 1)[0]
+        breaker = self.__circuitBreakers.get(endpoint) if self.__circuitBreakers is not None else None
+        metrics = self.__metrics
+        wireData, encodeSeconds = self.__encode(endpoint, data)
+        stream = kwargs.pop('stream', False)
+        self.__retryPolicy.recordRequest()
+        started = time.monotonic()
+        retries = 0
+        response = None
+        error = None
+        while True:
+            # Headers first: a failed token refresh must not use up one of the breaker's half open trial calls
+            headers = self.__getHeaders(wireData is not data)
+            if breaker is not None and not breaker.allow():
+                # Stop retrying once the breaker opens, and give the caller what the last attempt returned
+                if response is not None:
+                    return response
+                if error is not None:
+                    raise error
+                raise CircuitOpenError(breaker.endpoint, breaker.retryIn())
+            callStarted = None
+            attemptStarted = None
+            try:
+                callStarted = self.__concurrencyLimit.acquire() if self.__concurrencyLimit is not None else None
+                attemptStarted = self.__startMeasuring() if metrics is not None else None
+                self.__transfers.sent(len(data) if data else 0, len(wireData) if wireData else 0, encodeSeconds)
+                encodeSeconds = 0.0
+                if self.__compression:
+                    response = self.__decode(endpoint, self.__transport.request(method, url, headers, wireData, stream=True, **kwargs), stream)
+                else:
+                    response = self.__transport.request(method, url, headers, wireData, stream=stream, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as re:
+                self.__recordCall(breaker, callStarted, True)
+                if attemptStarted is not None:
+                    self.__measure(endpoint, method, data, wireData, attemptStarted, re)
+                response = None
+                error = re
+                if not idempotent and not self.__transport.wasNotSent(re):
+                    raise
+                retries += 1
+                delay = self.__retryPolicy.nextDelay(retries, started, re)
+                if delay is None:
+                    raise
+                if metrics is not None:
+                    metrics.increment(RETRIES, labels={'endpoint': endpoint, 'reason': type(re).__name__})
+                time.sleep(delay)
+                continue
+            except requests.exceptions.RequestException as ex:
+                # The body could not be read or decoded: the call failed, but it is not retried
+                self.__recordCall(breaker, callStarted, True)
+                if attemptStarted is not None:
+                    self.__measure(endpoint, method, data, wireData, attemptStarted, ex)
+                raise
+            except BaseException as ex:
+                # Interrupted: says nothing about the API, so only the breaker trial and the concurrency slot are given back
+                if callStarted is not None:
+                    self.__concurrencyLimit.cancel(callStarted)
+                if breaker is not None:
+                    breaker.release()
+                if attemptStarted is not None:
+                    self.__measure(endpoint, method, data, wireData, attemptStarted, ex)
+                raise
+            self.__recordCall(breaker, callStarted, isFailureStatus(response.status_code))
+            if attemptStarted is not None:
+                self.__measure(endpoint, method, data, wireData, attemptStarted, response, stream)
+            if not self.__retryPolicy.isRetryableStatus(response.status_code, idempotent):
+                return response
+            retries += 1
+            delay = self.__retryPolicy.nextDelay(retries, started, response.status_code, response.headers.get('Retry-After'))
+            if delay is None:
+                return response
+            if metrics is not None:
+                metrics.increment(RETRIES, labels={'endpoint': endpoint, 'reason': str(response.status_code)})
+            response.close()
+            error = None
+            time.sleep(delay)
     
-    def __getApiUrl(self) -> str:
+    def __getHeaders(self, compressed: bool = False) -> dict:
         """
-        Get the API URL
+        Get the request headers.  They are only rebuilt when the token changes
+        
+        Parameters:
+            compressed (bool): Whether the request body is gzip compressed
         
         Returns:
-            str: API URL
+            dict: Request headers (shared, must not be changed)
         """
+        token = self.__tokenManager.getToken()
+        headers = self.__headers
+        if headers[0] != token:
+            plain = {'Authorization': f'Bearer {token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
+            if self.__compression:
+                plain['Accept-Encoding'] = acceptEncoding()
+            # Swapped as one tuple, so a thread never sees the headers of another token
+            headers = self.__headers = (token, plain, dict(plain, **{'Content-Encoding': 'gzip'}))
+        return headers[2] if compressed else headers[1]
+    
+    def __encode(self, endpoint: str, data) -> tuple:
+        """
+        Compress a request body when it reaches the compressRequests size
         
-        # Setup AWS Client
-        ssmSession = None
-        try:
-            ssmSession = boto3.Session(profile_name='tritel')
-        except Exception as ex:
-            log.warning(f"Error trying to use the Tritel Profile (using Default instead): {ex}")
-            ssmSession = boto3.Session()
+        Returns:
+            tuple: (body to send, seconds spent compressing it).  The body is data itself when it is not compressed
+        """
+        if self.__compressRequests is None or not data or len(data) < self.__compressRequests:
+            return data, 0.0
+        encodeStarted = time.perf_counter()
+        wireData = compressBody(data.encode() if isinstance(data, str) else data)
+        encodeSeconds = time.perf_counter() - encodeStarted
+        if self.__metrics is not None:
+            self.__metrics.increment(ENCODE_SECONDS, encodeSeconds, {'endpoint': endpoint})
+        return wireData, encodeSeconds
+    
+    def __decode(self, endpoint: str, response, stream: bool) -> DecodedResponse:
+        """
+        Wrap a response requested with stream=True so its body is decoded here, and read the body now unless the caller streams it
+        
+        Returns:
+            DecodedResponse
+        """
+        decoded = DecodedResponse(response, partial(self.__transport.iterRaw, response), partial(self.__received, endpoint))
+        if not stream:
+            try:
+                decoded.content
+            finally:
+                response.close()
+        return decoded
+    
+    def __received(self, endpoint: str, response: DecodedResponse) -> None:
+        """
+        Count the bytes of a response body that was read to the end, before and after decoding
+        """
+        self.__transfers.received(response.bytes, response.wireBytes, response.decodeSeconds)
+        metrics = self.__metrics
+        if metrics is not None:
+            metrics.increment(BYTES_RECEIVED, response.bytes, {'endpoint': endpoint})
+            metrics.increment(WIRE_BYTES_RECEIVED, response.wireBytes, {'endpoint': endpoint, 'encoding': response.encoding})
+            if response.encoding != 'identity':
+                metrics.increment(DECODE_SECONDS, response.decodeSeconds, {'endpoint': endpoint, 'encoding': response.encoding})
+    
+    def __startMeasuring(self) -> float:
+        """
+        Count a call as in flight and report the pool utilization
+        
+        Returns:
+            float: Start time of the call (perf_counter)
+        """
+        with self.__inFlightLock:
+            self.__inFlight += 1
+            inFlight = self.__inFlight
+        self.__metrics.setGauge(IN_FLIGHT, inFlight)
+        self.__metrics.setGauge(POOL_UTILIZATION, inFlight / self.__poolMaxSize)
+        return time.perf_counter()
+    
+    def __measure(self, endpoint: str, method: str, data, wireData, attemptStarted: float, outcome, stream: bool = False) -> None:
+        """
+        Report the latency, status and bytes of one call, and count it as no longer in flight
+        
+        Parameters:
+            endpoint (str): API path without the query string
+            method (str): HTTP method
+            data: Request body
+            wireData: Request body as sent (data itself, or data compressed)
+            attemptStarted (float): Value returned by __startMeasuring
+            outcome: Response, or the exception the call raised
+            stream (bool): Whether the response body is streamed (it is then only counted if the API sent its length)
+        """
+        metrics = self.__metrics
+        latency = time.perf_counter() - attemptStarted
+        with self.__inFlightLock:
+            self.__inFlight -= 1
+            inFlight = self.__inFlight
+        metrics.setGauge(IN_FLIGHT, inFlight)
+        metrics.setGauge(POOL_UTILIZATION, inFlight / self.__poolMaxSize)
+        isResponse = not isinstance(outcome, BaseException)
+        metrics.increment(REQUESTS, labels={'endpoint': endpoint, 'method': method, 'status': str(outcome.status_code) if isResponse else type(outcome).__name__})
+        metrics.observe(REQUEST_SECONDS, latency, {'endpoint': endpoint, 'method': method})
+        if data:
+            metrics.increment(BYTES_SENT, len(data.encode()) if isinstance(data, str) else len(data), {'endpoint': endpoint})
+            wireSize = len(wireData.encode()) if isinstance(wireData, str) else len(wireData)
+            metrics.increment(WIRE_BYTES_SENT, wireSize, {'endpoint': endpoint, 'encoding': 'identity' if wireData is data else 'gzip'})
+        # Decoded responses count their bytes once their body was read (see __received)
+        if isResponse and not isinstance(outcome, DecodedResponse):
+            length = outcome.headers.get('Content-Length')
+            if length is not None:
+                metrics.increment(BYTES_RECEIVED, int(length), {'endpoint': endpoint})
+            elif not stream:
+                metrics.increment(BYTES_RECEIVED, len(outcome.content), {'endpoint': endpoint})
+    
+    def __recordCall(self, breaker, callStarted: float, failed: bool) -> None:
+        """
+        Report the outcome of one call to the circuit breaker and the concurrency limit
+        
+        Parameters:
+            breaker (CircuitBreaker): Circuit breaker of the endpoint (or None)
+            callStarted (float): Value returned by the concurrency limit's acquire (or None)
+            failed (bool): Whether the call failed in a way that shows the API is failing or overloaded
+        """
+        if callStarted is not None:
+            self.__concurrencyLimit.release(callStarted, failed)
+        if breaker is not None:
+            if failed:
+                breaker.recordFailure()
+            else:
+                breaker.recordSuccess()
+    
+    def __cacheBulkRequest(self, bulkRequestId: str, bulkRequest: BulkRequest, version: int = None) -> None:
+        """
+        Cache a Bulk Request (or None if it was not found).  Bulk Requests with a terminal status are kept for terminalTtl.
+        A Bulk Request read from version on is not cached if it was invalidated by a write while it was read
+        """
+        if self.__cache is not None:
+            ttl = self.__cache.terminalTtl if bulkRequest is not None and bulkRequest.status in TERMINAL_BULK_REQUEST_STATUSES else None
+            self.__cache.put(('getBulkRequest', bulkRequestId), bulkRequest, ttl, version)
+    
+    def __invalidateBulkRequest(self, bulkRequestId: str) -> None:
+        """
+        Drop the cached Bulk Request, and the cached "not found" filenames for its Customer and Workflow,
+        after a Bulk Request Data Element was added to it
+        """
+        if self.__cache is None:
+            return
+        found, bulkRequest = self.__cache.pop(('getBulkRequest', bulkRequestId))
+        if found and bulkRequest is not None:
+            self.__invalidateFileExists(bulkRequest.customerId, bulkRequest.workflowId)
+        else:
+            self.__invalidateFileExists(None, None)
+    
+    def __invalidateFileExists(self, customerId: str, workflowId: str) -> None:
+        """
+        Drop the cached "not found" filenames for a Customer and Workflow (or for all of them if customerId is None)
+        """
+        if self.__cache is not None:
+            self.__cache.invalidateWhere(lambda key, value: key[0] == 'checkBulkRequestFileExists' and value is False and (customerId is None or key[1:3] == (customerId, workflowId)))
+    
+    def __coalesce(self, key: tuple, endpoint: str, function):
+        """
+        Call function, or share the identical call another thread has in flight
+        
+        Parameters:
+            key (tuple): Key of the call
+            endpoint (str): API path counted by the metrics when the call is shared
+            function: Function making the call
+        
+        Returns:
+            Result of the call (shared with the other callers, must not be changed)
+        """
+        if self.__singleFlight is None:
+            return function()
+        result, shared = self.__singleFlight.do(key, function)
+        if shared and self.__metrics is not None:
+            self.__metrics.increment(COALESCED, labels={'endpoint': endpoint})
+        return result
+    
+    def transferStats(self) -> dict:
+        """
+        Get the bytes sent and received, before and after compression
+        
+        Returns:
+            dict: bytesSent, wireBytesSent, encodeSeconds, bytesReceived, wireBytesReceived, decodeSeconds and ratio
+            (received bytes are only counted for the responses decoded by the helper, see the compression option)
+        """
+        return self.__transfers.stats()
+    
+    def coalescingStats(self) -> dict:
+        """
+        Get the statistics of the read coalescing
+        
+        Returns:
+            dict: calls, coalesced and inFlight (None if coalescing is not enabled)
+        """
+        return self.__singleFlight.stats() if self.__singleFlight is not None else None
+    
+    def cacheStats(self) -> dict:
+        """
+        Get the statistics of the getBulkRequest / checkBulkRequestFileExists cache
+        
+        Returns:
+            dict: size, hits, misses, hitRate, evictions and expirations (None if the cache is not enabled)
+        """
+        return self.__cache.stats() if self.__cache is not None else None
+    
+    def __getExecutor(self) -> ThreadPoolExecutor:
+        """
+        Get the worker threads used by the batch methods, creating them on first use
         
-        ssmClient = ssmSession.client('ssm')
+        Returns:
+            ThreadPoolExecutor
+        """
+        if self.__executor is None:
+            with self.__executorLock:
+                if self.__executor is None:
+                    self.__executor = ThreadPoolExecutor(max_workers=self.__maxWorkers, thread_name_prefix="RequestHelper")
+        return self.__executor
+    
+    def __mapConcurrently(self, function, argumentsList: list, maxWorkers: int = None) -> list:
+        """
+        Call function once for each set of arguments on the worker threads, with at most maxWorkers calls in flight
         
-        # Get the API URL
-        apiUrl = ssmClient.get_parameter(Name=F'/id-verification/{self.environment}/request-api-url')['Parameter']['Value']
+        Parameters:
+            function: Function to call
+            argumentsList (list): List of argument tuples
+            maxWorkers (int): Maximum number of calls in flight (defaults to the maxWorkers option)
         
-        return apiUrl
+        Returns:
+            List of results in the same order as argumentsList.  A call that raised is returned as an Exception
+        """
+        executor = self.__getExecutor()
+        limit = max(1, min(maxWorkers or self.__maxWorkers, self.__maxWorkers))
+        results = [None] * len(argumentsList)
+        pending = {}
+        nextIndex = 0
+        while nextIndex < len(argumentsList) or pending:
+            while nextIndex < len(argumentsList) and len(pending) < limit:
+                pending[executor.submit(function, *argumentsList[nextIndex])] = nextIndex
+                nextIndex += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as ex:
+                    results[index] = ex
+        return results
     
-    def getBulkRequest(self, bulkRequestId: str):
+    def getBulkRequest(self, bulkRequestId: str, useCache: bool = True):
         """
         Get Bulk Request
         
         Parameters:
             bulkRequestId (str): Bulk Request Id
+            useCache (bool): Use a cached Bulk Request if there is one (the reply is cached either way)
         
         Returns:
             Bulk Request
             or 
             None if not found
+            or
+            Exception if error
+        """
+        if self.__cache is not None and useCache:
+            found, bulkRequest = self.__cache.lookup(('getBulkRequest', bulkRequestId))
+            if found:
+                return bulkRequest
+        return self.__coalesce(('getBulkRequest', bulkRequestId), '/BulkRequest/GetBulkRequestByBulkRequestId', lambda: self.__fetchBulkRequest(bulkRequestId))
+    
+    def __fetchBulkRequest(self, bulkRequestId: str):
+        """
+        Get a Bulk Request from the API and cache it
+        
+        Returns:
+            Bulk Request (immutable, may be shared by coalesced callers)
+            or 
+            None if not found
+            or
+            Exception if error
         """
-        if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-            token = self.userHelper.getToken()
-        headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-        data = f'{{"bulkRequestId": "{bulkRequestId}"}}'
-        log.debug(f"RequestHelper URL: http://{self.__apiUrl}/BulkRequest/GetBulkRequestByBulkRequestId?api-version=0.1")
-        log.debug(f"RequestHelper.getBulkRequest: {data}")
-        response = requests.put(f'http://{self.__apiUrl}/BulkRequest/GetBulkRequestByBulkRequestId?api-version=0.1', headers=headers, data=data)
+        data = bulkRequestIdBody(bulkRequestId)
+        log.debug("RequestHelper.getBulkRequest: %s", bulkRequestId)
+        version = self.__cache.version() if self.__cache is not None else None
+        try:
+            response = self.__send('PUT', '/BulkRequest/GetBulkRequestByBulkRequestId?api-version=0.1', data)
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
         if response.status_code == 200:
-            bulkRequest: BulkRequest = BulkRequest()
-            jsonResponse = response.json()
-            bulkRequest.bulkRequestId = jsonResponse['bulkRequest']['bulkRequestId']
-            bulkRequest.customerId = jsonResponse['bulkRequest']['customerId']
-            bulkRequest.workflowId = jsonResponse['bulkRequest']['workflowId']
-            bulkRequest.status = jsonResponse['bulkRequest']['status']
-            bulkRequest.createdOn = jsonResponse['bulkRequest']['createdOn']
-            bulkRequest.updatedOn = jsonResponse['bulkRequest']['updatedOn']
-            bulkRequest.completedOn = jsonResponse['bulkRequest']['completedOn']
-            bulkRequest.deletedOn = jsonResponse['bulkRequest']['deletedOn']
+            bulkRequest: BulkRequest = BulkRequest.fromJson(loads(response.content)['bulkRequest'])
+            self.__cacheBulkRequest(bulkRequestId, bulkRequest, version)
             return bulkRequest
         if response.status_code == 404:
+            self.__cacheBulkRequest(bulkRequestId, None, version)
             return None
         else:
-            return Exception(f"Error: {response.status_code} - {response._content}")
+            return Exception(f"Error: {response.status_code} - {response.content}")
 
-    def createBulkRequest(self, customerId: str, workflowId: str):
+    def getBulkRequests(self, bulkRequestIds, maxWorkers: int = None, useCache: bool = True) -> list:
+        """
+        Get many Bulk Requests concurrently over the shared connection pool
+        
+        Parameters:
+            bulkRequestIds (list): Bulk Request Ids
+            maxWorkers (int): Maximum number of calls in flight (defaults to the maxWorkers option)
+            useCache (bool): Use cached Bulk Requests where there are any
+        
+        Returns:
+            List of Bulk Request, in the same order as bulkRequestIds
+            (None if not found, an Exception if it could not be read)
+        """
+        return self.__mapConcurrently(self.getBulkRequest, [(bulkRequestId, useCache) for bulkRequestId in bulkRequestIds], maxWorkers)
+    
+    def watchBulkRequests(self, bulkRequestIds=(), onChange=None, **options) -> BulkRequestWatcher:
+        """
+        Watch the status of many Bulk Requests from one scheduler thread
+        
+        Iterate the watcher (for or async for) to get each status change until every Bulk Request
+        has reached a terminal status, or pass onChange and call start() on the watcher
+        
+        Parameters:
+            bulkRequestIds (list): Bulk Request Ids to start watching (more can be added with watch)
+            onChange: Function called with each BulkRequestStatusChange
+            **options: Polling options (interval, maxInterval, backoff, batchSize, see BulkRequestWatcher)
+        
+        Returns:
+            BulkRequestWatcher
+        """
+        return BulkRequestWatcher(self, bulkRequestIds, onChange, **options)
+    
+    def createBulkRequest(self, customerId: str, workflowId: str, retrySent: bool = True):
         """
         Create a new Bulk Request
         
         Parameters:
             customerId (str): Customer Id
             workflowId (str): Workflow Id
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
         
         Returns:
             Bulk Request
             or 
-            None if not found
+            Exception if error
         """
-        if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-            token = self.userHelper.getToken()
-        headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-        data = f'{{"customerId": "{customerId}", "workflowId": "{workflowId}","status": 1}}'
-        log.debug(f"RequestHelper URL: http://{self.__apiUrl}/BulkRequest/CreateBulkRequest?api-version=0.1")
-        log.debug(f"RequestHelper.createBulkRequestCommand: {data}")
-        with requests.Session() as session:
-            retries = requests.adapters.Retry(total=5, backoff_factor=1, status_forcelist=[ 500, 502, 503, 504 ], allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']))
-            session.mount('http://', requests.adapters.HTTPAdapter(max_retries=retries))
-            session.mount('https://', requests.adapters.HTTPAdapter(max_retries=retries))    
-            response = session.post(f'http://{self.__apiUrl}/BulkRequest/CreateBulkRequest?api-version=0.2', headers=headers, data=data)
-            if response.status_code == 201:
-                bulkRequest: BulkRequest = BulkRequest()
-                jsonResponse = response.json()
-                bulkRequest.bulkRequestId = jsonResponse['bulkRequest']['bulkRequestId']
-                bulkRequest.customerId = jsonResponse['bulkRequest']['customerId']
-                bulkRequest.workflowId = jsonResponse['bulkRequest']['workflowId']
-                bulkRequest.status = jsonResponse['bulkRequest']['status']
-                bulkRequest.createdOn = jsonResponse['bulkRequest']['createdOn']
-                bulkRequest.updatedOn = jsonResponse['bulkRequest']['updatedOn']
-                bulkRequest.completedOn = jsonResponse['bulkRequest']['completedOn']
-                bulkRequest.deletedOn = jsonResponse['bulkRequest']['deletedOn']
-                return json.dumps(bulkRequest)
-            else:
-                return Exception(f"Error: {response.status_code} - {response._content}")
+        data = createBulkRequestBody(customerId, workflowId)
+        log.debug("RequestHelper.createBulkRequestCommand: customerId %s, workflowId %s", customerId, workflowId)
+        if self.__rateLimiter is not None:
+            self.__rateLimiter.acquire(customerId)
+        try:
+            response = self.__send('POST', '/BulkRequest/CreateBulkRequest?api-version=0.2', data, idempotent=retrySent)
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
+        if response.status_code == 201:
+            bulkRequest: BulkRequest = BulkRequest.fromJson(loads(response.content)['bulkRequest'])
+            self.__invalidateFileExists(customerId, workflowId)
+            self.__cacheBulkRequest(bulkRequest.bulkRequestId, bulkRequest)
+            return bulkRequest
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
 
     def getBulkRequestDataElementsByBulkRequestId(self, bulkRequestId: str):
         """
@@ -211,37 +698,68 @@ class RequestHelper:
             List of Bulk Request Data Element
             or 
             None if not found
+            or
+            Exception if error
+        """
+        bulkRequestDataElements = self.__coalesce(('getBulkRequestDataElements', bulkRequestId), '/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId', lambda: self.__fetchBulkRequestDataElements(bulkRequestId))
+        # Every caller gets its own list, the Data Elements themselves are immutable
+        return list(bulkRequestDataElements) if isinstance(bulkRequestDataElements, tuple) else bulkRequestDataElements
+    
+    def __fetchBulkRequestDataElements(self, bulkRequestId: str):
+        """
+        Get the Bulk Request Data Elements of a Bulk Request from the API
+        
+        Returns:
+            tuple of Bulk Request Data Element (may be shared by coalesced callers)
+            or 
+            None if not found
+            or
+            Exception if error
+        """
+        data = bulkRequestIdBody(bulkRequestId)
+        log.debug("RequestHelper.getBulkRequestDataElementsByBulkRequestId: %s", bulkRequestId)
+        try:
+            response = self.__send('PUT', '/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId?api-version=0.1', data)
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
+        if response.status_code == 200:
+            return tuple(BulkRequestDataElement.fromJson(record) for record in loads(response.content).get('bulkRequestDataElement') or ())
+        if response.status_code == 404:
+            return None
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")   
+        
+    def iterBulkRequestDataElementsByBulkRequestId(self, bulkRequestId: str, chunkSize: int = STREAM_CHUNK_SIZE):
+        """
+        Iterate the Bulk Request Data Elements of a Bulk Request as the response streams in
+        
+        The response is decoded incrementally, so memory use does not grow with the number of elements
+        
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+            chunkSize (int): Number of bytes read from the response at a time
+        
+        Yields:
+            Bulk Request Data Element
+            (nothing if the Bulk Request is not found)
+        
+        Raises:
+            Exception if error
         """
-        if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-            token = self.userHelper.getToken()
-        headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-        data = f'{{"bulkRequestId": "{bulkRequestId}"}}'
-        log.debug(f"RequestHelper URL: http://{self.__apiUrl}/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId?api-version=0.2")
-        log.debug(f"RequestHelper.getBulkRequestDataElementsByBulkRequestId: {data}")
-        with requests.Session() as session:
-            retries = requests.adapters.Retry(total=5, backoff_factor=1, status_forcelist=[ 500, 502, 503, 504 ], allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']))
-            session.mount('http://', requests.adapters.HTTPAdapter(max_retries=retries))
-            session.mount('https://', requests.adapters.HTTPAdapter(max_retries=retries))        
-            response = session.put(f'http://{self.__apiUrl}/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId?api-version=0.1', headers=headers, data=data)
-            bulkRequestDataElements = []
-            if response.status_code == 200:
-                for record in response.json()['bulkRequestDataElement']:
-                    bulkRequestDataElement: BulkRequestDataElement = BulkRequestDataElement()
-                    bulkRequestDataElement.BulkRequestDataElementId = record['bulkRequestDataElementId']
-                    bulkRequestDataElement.BulkRequestId = record['bulkRequestId']
-                    bulkRequestDataElement.DataField = record['dataField']
-                    bulkRequestDataElement.DataValue = record['dataValue']
-                    bulkRequestDataElement.CreatedOn = record['createdOn']
-                    bulkRequestDataElement.UpdatedOn = record['updatedOn']
-                    bulkRequestDataElement.DeletedOn = record['deletedOn']
-                    bulkRequestDataElements.append(bulkRequestDataElement)
-                return bulkRequestDataElements
+        data = bulkRequestIdBody(bulkRequestId)
+        log.debug("RequestHelper.iterBulkRequestDataElementsByBulkRequestId: %s", bulkRequestId)
+        with self.__send('PUT', '/BulkRequestDataElement/GetBulkRequestDataElementsByBulkRequestId?api-version=0.1', data, stream=True) as response:
             if response.status_code == 404:
-                return None
-            else:
-                return Exception(f"Error: {response.status_code} - {response._content}")   
+                return
+            if response.status_code != 200:
+                raise Exception(f"Error: {response.status_code} - {response.content}")
+            reader = JsonArrayReader('bulkRequestDataElement')
+            for chunk in response.iter_content(chunk_size=chunkSize):
+                for record in reader.feed(chunk):
+                    yield BulkRequestDataElement.fromJson(record)
+            reader.close()
         
-    def createBulkRequestDataElement (self, bulkRequestId: str, dataField: str, dataValue: str):
+    def createBulkRequestDataElement (self, bulkRequestId: str, dataField: str, dataValue: str, retrySent: bool = True):
         """
         Create Bulk Request Data Element
         
@@ -249,34 +767,57 @@ class RequestHelper:
             bulkRequestId (str): Bulk Request Id
             dataField (str): Data Field
             dataValue (str): Data Value
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
         
         Returns:
             Bulk Request Data Element
+            or
+            Exception if error
         """
-        if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-            token = self.userHelper.getToken()
-        headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-        data = f'{{"bulkRequestId": "{bulkRequestId}", "dataField": "{dataField}", "dataValue": "{dataValue}"}}'
-        log.debug(f"RequestHelper URL: http://{self.__apiUrl}/BulkRequestDataElement/CreateBulkRequestDataElement?api-version=0.1")
-        log.debug(f"RequestHelper.createBulkRequestDataElement: {data}")
-        with requests.Session() as session:
-            retries = requests.adapters.Retry(total=5, backoff_factor=1, status_forcelist=[ 500, 502, 503, 504 ], allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS']))
-            session.mount('http://', requests.adapters.HTTPAdapter(max_retries=retries))
-            session.mount('https://', requests.adapters.HTTPAdapter(max_retries=retries))
-            response = session.post(f'http://{self.__apiUrl}/BulkRequestDataElement/CreateBulkRequestDataElement?api-version=0.2', headers=headers, data=data, timeout=(5, 30))
-            if response.status_code == 201:
-                bulkRequestDataElement: BulkRequestDataElement = BulkRequestDataElement()
-                jsonResponse = response.json()
-                bulkRequestDataElement.BulkRequestDataElementId = jsonResponse['bulkRequestDataElement']['bulkRequestDataElementId']
-                bulkRequestDataElement.BulkRequestId = jsonResponse['bulkRequestDataElement']['bulkRequestId']
-                bulkRequestDataElement.DataField = jsonResponse['bulkRequestDataElement']['dataField']
-                bulkRequestDataElement.DataValue = jsonResponse['bulkRequestDataElement']['dataValue']
-                bulkRequestDataElement.CreatedOn = jsonResponse['bulkRequestDataElement']['createdOn']
-                bulkRequestDataElement.UpdatedOn = jsonResponse['bulkRequestDataElement']['updatedOn']
-                bulkRequestDataElement.DeletedOn = jsonResponse['bulkRequestDataElement']['deletedOn']
-                return json.dumps(bulkRequestDataElement)
-            else:
-                return Exception(f"Error: {response.status_code} - {response._content}")
+        return self.__postBulkRequestDataElement(bulkRequestId, dataField, bulkRequestDataElementBody(bulkRequestId, dataField, dataValue), retrySent)
+    
+    def __postBulkRequestDataElement(self, bulkRequestId: str, dataField: str, data: bytes, retrySent: bool = True):
+        """
+        Create a Bulk Request Data Element from its encoded body
+        
+        Returns:
+            Bulk Request Data Element
+            or
+            Exception if error
+        """
+        log.debug("RequestHelper.createBulkRequestDataElement: bulkRequestId %s, dataField %s", bulkRequestId, dataField)
+        try:
+            response = self.__send('POST', '/BulkRequestDataElement/CreateBulkRequestDataElement?api-version=0.2', data, idempotent=retrySent, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
+        finally:
+            # Also when there was no answer, as the API may have created the Data Element anyway
+            self.__invalidateBulkRequest(bulkRequestId)
+            if self.__singleFlight is not None:
+                # Reads already in flight may not see the new Data Element, so later reads do not join them
+                self.__singleFlight.forget(('getBulkRequest', bulkRequestId))
+                self.__singleFlight.forget(('getBulkRequestDataElements', bulkRequestId))
+        if response.status_code == 201:
+            bulkRequestDataElement: BulkRequestDataElement = BulkRequestDataElement.fromJson(loads(response.content)['bulkRequestDataElement'])
+            return bulkRequestDataElement
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+        
+    def createBulkRequestDataElements(self, bulkRequestId: str, dataElements, maxWorkers: int = None, retrySent: bool = True) -> list:
+        """
+        Create many Bulk Request Data Elements for one Bulk Request concurrently over the shared connection pool
+        
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+            dataElements (dict or list): Data Field to Data Value, or a list of (Data Field, Data Value) pairs
+            maxWorkers (int): Maximum number of calls in flight (defaults to the maxWorkers option)
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+        
+        Returns:
+            List of Bulk Request Data Element, in the same order as dataElements
+            (an item that failed is returned as an Exception)
+        """
+        return self.__mapConcurrently(self.__postBulkRequestDataElement, [(bulkRequestId, dataField, data, retrySent) for dataField, data in encodeBulkRequestDataElements(bulkRequestId, dataElements)], maxWorkers)
         
     def checkBulkRequestFileExists (self, customerId: str, workflowId: str, filename: str):
         """
@@ -290,23 +831,52 @@ class RequestHelper:
 
         Returns:
             bool: whether or not the filename exists
+            or
+            Exception if error
         """
-        if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-            token = self.userHelper.getToken()
-        headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-        data = f'{{"customerId": "{customerId}", "workflowId": "{workflowId}", "filename": "{filename}"}}'
-        log.debug(f"RequestHelper URL: http://{self.__apiUrl}/BulkRequestDataElement/BulkRequestFileExists?api-version=0.2")
-        log.debug(f"RequestHelper.BulkRequestFileExists: {data}")
-        response = requests.put(f'http://{self.__apiUrl}/BulkRequestDataElement/BulkRequestFileExists?api-version=0.2', headers=headers, data=data)
+        key = ('checkBulkRequestFileExists', customerId, workflowId, filename)
+        if self.__cache is not None:
+            found, reply = self.__cache.lookup(key)
+            if found:
+                return reply
+        data = bulkRequestFileExistsBody(customerId, workflowId, filename)
+        log.debug("RequestHelper.BulkRequestFileExists: customerId %s, workflowId %s", customerId, workflowId)
+        version = self.__cache.version() if self.__cache is not None else None
+        try:
+            response = self.__send('PUT', '/BulkRequestDataElement/BulkRequestFileExists?api-version=0.2', data)
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
         if response.status_code == 200:
-            jsonResponse = response.json()
-            reply: bool = response.json()['exists']
+            reply: bool = loads(response.content)['exists']
+            if self.__cache is not None:
+                # Once a filename has been used it stays used, so only "not found" has to expire quickly
+                self.__cache.put(key, reply, self.__cache.terminalTtl if reply else None, version)
             return reply
         else:
-            return Exception(f"Error: {response.status_code} - {response._content}")
+            return Exception(f"Error: {response.status_code} - {response.content}")
         
+    def checkBulkRequestFilesExist(self, customerId: str, workflowId: str, filenames, maxWorkers: int = None) -> dict:
+        """
+        Check many Filenames for one Customer and Workflow concurrently over the shared connection pool
+
+        The API checks one Filename per call, so each distinct Filename is checked once, with at most
+        maxWorkers checks in flight (cached answers are used when the cache is enabled)
+
+        Args:
+            customerId (str): Customer Id
+            workflowId (str): Workflow Id
+            filenames: Filenames to be checked (duplicates are checked once)
+            maxWorkers (int): Maximum number of calls in flight (defaults to the maxWorkers option)
 
-    def createRequest(self, customerId: str, bulkRequestId: str, workflowId: str):
+        Returns:
+            dict: Filename to whether or not the filename exists
+            (a Filename that could not be checked maps to an Exception)
+        """
+        uniqueFilenames = list(dict.fromkeys(filenames))
+        replies = self.__mapConcurrently(self.checkBulkRequestFileExists, [(customerId, workflowId, filename) for filename in uniqueFilenames], maxWorkers)
+        return dict(zip(uniqueFilenames, replies))
+        
+    def createRequest(self, customerId: str, bulkRequestId: str, workflowId: str, retrySent: bool = True):
         """
         Create a new Request
         
@@ -314,211 +884,141 @@ class RequestHelper:
             customerId (str): Customer Id
             bulkRequestId (str): Bulk Request Id
             workflowId (str): Workflow Id
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
         
         Returns:
             Request
             or 
             Exception if error
         """
-        attempt = 0
-        while attempt < MAX_RETRY_COUNT:
-            try:
-                if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-                    token = self.userHelper.getToken()
-                headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-                data = f'{{"customerId": "{customerId}", "bulkRequestId": "{bulkRequestId}", "workflowId": "{workflowId}", "status": 1}}'
-                log.debug(f"RequestHelper URL: http://{self.__apiUrl}/Request/CreateRequest?api-version=0.1")
-                log.debug(f"RequestHelper.createRequest: {data}")
-                response = requests.post(f'http://{self.__apiUrl}/Request/CreateRequest?api-version=0.1', headers=headers, data=data)
-                if response.status_code == 201:
-                    request: Request = Request()
-                    jsonResponse = response.json()
-                    request.requestId = jsonResponse['request']['requestId']
-                    request.customerId = jsonResponse['request']['customerId']
-                    request.workflowId = jsonResponse['request']['workflowId']
-                    request.status = jsonResponse['request']['status']
-                    request.createdOn = jsonResponse['request']['createdOn']
-                    request.updatedOn = jsonResponse['request']['updatedOn']
-                    request.completedOn = jsonResponse['request']['completedOn']
-                    request.deletedOn = jsonResponse['request']['deletedOn']
-                    return request
-                else:
-                    if response.status_code != 499:
-                        return Exception(f"Error: {response.status_code} - {response._content}")
-                
-            except requests.exceptions.ConnectionError as re:
-                attempt += 1
-                log.warning(f"Error: {re}. Attempt {attempt} of {MAX_RETRY_COUNT}.  Waiting {WAIT_TIME_BETWEEN_RETRIES * attempt} seconds before trying again.")
-                time.sleep(WAIT_TIME_BETWEEN_RETRIES * attempt) # Wait before trying again
-                
-            except Exception as e:
-                return Exception(f"Error: {response.status_code} - {response._content}")
-        
-        return Exception(f"Error: Max retries exceeded")
+        data = createRequestBody(customerId, bulkRequestId, workflowId)
+        log.debug("RequestHelper.createRequest: customerId %s, bulkRequestId %s, workflowId %s", customerId, bulkRequestId, workflowId)
+        if self.__rateLimiter is not None:
+            self.__rateLimiter.acquire(customerId)
+        try:
+            response = self.__send('POST', '/Request/CreateRequest?api-version=0.1', data, idempotent=retrySent)
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
+        if response.status_code == 201:
+            request: Request = Request.fromJson(loads(response.content)['request'])
+            return request
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
 
-    def createRequestDataElement(self, requestId: str, dataField: str, dataValue: str):
+    def createRequestDataElement(self, requestId: str, dataField: str, dataValue: str, customerId: str = None, retrySent: bool = True):
         """
         Create Request Data Element
 
         Args:
-            requestId (str): _description_
-            dataField (str): _description_
-            dataValue (str): _description_
+            requestId (str): Request Id
+            dataField (str): Data Field
+            dataValue (str): Data Value
+            customerId (str): Customer Id of the Request, used by the rate limiter (optional)
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
 
         Returns:
             RequestDataElement: The Data Element that was created
             or
             Exception if error
         """
-        attempt = 0
-        while attempt < MAX_RETRY_COUNT:
-            try:
-                if self.userHelper.token == None or (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).seconds > MAX_TOKEN_AGE:
-                    token = self.userHelper.getToken()
-                headers = {'Authorization': f'Bearer {self.userHelper.token}', 'accept': 'application/json', 'Content-Type': 'application/json'}
-                data = f'{{"requestId": "{requestId}", "dataField": "{dataField}", "dataValue": "{dataValue}"}}'
-                log.debug(f"RequestHelper URL: http://{self.__apiUrl}/RequestDataElement/CreateRequestDataElement?api-version=0.1")
-                log.debug(f"RequestHelper.createRequestDataElement: {data}")
-                response = requests.post(f'http://{self.__apiUrl}/RequestDataElement/CreateRequestDataElement?api-version=0.1', headers=headers, data=data)
-                if response.status_code == 201:
-                    requestDataElement: RequestDataElement = RequestDataElement()
-                    jsonResponse = response.json()
-                    requestDataElement.RequestDataElementId = jsonResponse['requestDataElement']['requestDataElementId']
-                    requestDataElement.RequestId = jsonResponse['requestDataElement']['requestId']
-                    requestDataElement.DataField = jsonResponse['requestDataElement']['dataField']
-                    requestDataElement.DataValue = jsonResponse['requestDataElement']['dataValue']
-                    requestDataElement.CreatedOn = jsonResponse['requestDataElement']['createdOn']
-                    requestDataElement.UpdatedOn = jsonResponse['requestDataElement']['updatedOn']
-                    requestDataElement.DeletedOn = jsonResponse['requestDataElement']['deletedOn']
-                    return requestDataElement
-                else:
-                    if response.status_code != 499:
-                        return Exception(f"Error: {response.status_code} - {response._content}")
-                
-            except requests.exceptions.ConnectionError as re:
-                attempt += 1
-                log.warning(f"Error: {re}. Attempt {attempt} of {MAX_RETRY_COUNT}.  Waiting {WAIT_TIME_BETWEEN_RETRIES * attempt} seconds before trying again.")
+        return self.__postRequestDataElement(requestId, dataField, requestDataElementBody(requestId, dataField, dataValue), customerId, retrySent)
+    
+    def __postRequestDataElement(self, requestId: str, dataField: str, data: bytes, customerId: str = None, retrySent: bool = True):
+        """
+        Create a Request Data Element from its encoded body
+        
+        Returns:
+            RequestDataElement
+            or
+            Exception if error
+        """
+        log.debug("RequestHelper.createRequestDataElement: requestId %s, dataField %s", requestId, dataField)
+        if self.__rateLimiter is not None:
+            self.__rateLimiter.acquire(customerId)
+        try:
+            response = self.__send('POST', '/RequestDataElement/CreateRequestDataElement?api-version=0.1', data, idempotent=retrySent)
+        except (requests.exceptions.RequestException, CircuitOpenError) as re:
+            return callFailed(re)
+        if response.status_code == 201:
+            requestDataElement: RequestDataElement = RequestDataElement.fromJson(loads(response.content)['requestDataElement'])
+            return requestDataElement
+        else:
+            return Exception(f"Error: {response.status_code} - {response.content}")
+    
+    def createRequestDataElements(self, requestId: str, dataElements, maxWorkers: int = None, customerId: str = None, retrySent: bool = True) -> list:
+        """
+        Create many Request Data Elements for one Request concurrently over the shared connection pool
 
-                time.sleep(WAIT_TIME_BETWEEN_RETRIES * attempt) # Wait before trying again
-                
-            except Exception as e:
-                return Exception(f"Error: {response.status_code} - {response._content}")
-            
-        return Exception(f"Error: Max retries exceeded")
+        Args:
+            requestId (str): Request Id
+            dataElements (dict or list): Data Field to Data Value, or a list of (Data Field, Data Value) pairs
+            maxWorkers (int): Maximum number of calls in flight (defaults to the maxWorkers option)
+            customerId (str): Customer Id of the Request, used by the rate limiter (optional)
+            retrySent (bool): Retry a connection error even if the request may have reached the API (False only retries calls that were never sent, for callers that journal their creates)
+
+        Returns:
+            list: RequestDataElement for each item, in the same order as dataElements
+            (an item that failed is returned as an Exception)
+        """
+        return self.__mapConcurrently(self.__postRequestDataElement, [(requestId, dataField, data, customerId, retrySent) for dataField, data in encodeRequestDataElements(requestId, dataElements)], maxWorkers)
+    
+    def bufferedWriter(self, **options) -> RequestDataElementWriter:
+        """
+        Create Request Data Elements in the background (write-behind)
+        
+        write() on the returned writer queues a Request Data Element and returns straight away.
+        Flusher threads send the queued writes in batches; flush() and close() wait for them and
+        return the writes that failed
+        
+        Parameters:
+            **options: Buffering options (batchSize, flushInterval, maxQueueSize, spillPath, flushers, onError, see RequestDataElementWriter)
+        
+        Returns:
+            RequestDataElementWriter
+        """
+        return RequestDataElementWriter(self, **options)
+    
+    def ingestBulkFile(self, customerId: str, workflowId: str, rows, workers: int = DEFAULT_INGESTION_WORKERS, maxPending: int = None, checkFileExists: bool = True, bulkRequestId: str = None, rowFilter=None, journal=None, firstRowNumber: int = 1) -> BulkIngestion:
+        """
+        Stream the rows of a bulk file into a new Bulk Request
+        
+        The Bulk Request is created when iteration starts.  Each row becomes a Request plus one
+        Request Data Element per field, processed on a bounded pool of worker threads.  For the
+        best throughput keep poolMaxSize at least as large as workers.
+        
+        Args:
+            customerId (str): Customer Id
+            workflowId (str): Workflow Id
+            rows: Iterable of dicts (Data Field to Data Value), or the path of a UTF-8 CSV file with a header row
+            workers (int): Number of rows processed concurrently
+            maxPending (int): Maximum number of rows read ahead of the workers (defaults to workers * 2)
+            checkFileExists (bool): When rows is a file path, fail if the filename was already used for the Customer and Workflow
+            bulkRequestId (str): Add the rows to this existing Bulk Request instead of creating one
+            rowFilter: Function called with each 1 based row number, only rows for which it returns True are ingested
+            journal (IngestionJournal): Record every create call, so running the same file again skips finished rows and
+                only creates what is missing (rows must be a file path, or bulkRequestId given)
+            firstRowNumber (int): Row number of the first row, when rows are part of a larger file (default 1)
+        
+        Returns:
+            BulkIngestion: iterate it to get an IngestionResult for each row as it completes
+        """
+        return BulkIngestion(self, customerId, workflowId, rows, workers, maxPending, checkFileExists, bulkRequestId, rowFilter, journal, firstRowNumber)
     
     def close (self):
         """
-        Close the RequestHelper
+        Close the RequestHelper and its connection pools
         """
-        self.userHelper.close()
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        if self.__tokenManager is not None:
+            self.__tokenManager.close()
+            self.__tokenManager = None
+        if self.__transport is not None:
+            self.__transport.close()
+            self.__transport = None
+        if getattr(self, 'userHelper', None) is not None:
+            self.userHelper.close()
         
     def __del__ (self):
         self.close()
-class BulkRequestStatus(Enum):
-    # <summary>The bulk request is newly created.  And has no processing started or completed on it.</summary>
-    New = 1
-    # <summary>The bulk request is pending.</summary>
-    Pending = 2
-    # <summary>The bulk request is in progress.</summary>
-    InProgress = 3
-    # <summary>The bulk request is completed.</summary>
-    Completed = 4
-    # <summary>The bulk request is failed.</summary>
-    Failed = 5
-    # <summary>The bulk request is cancelled.</summary>
-    Cancelled = 6
-    # <summary>The bulk request is archived.</summary>
-    Archived = 7 
-    
-class BulkRequest:
-    # Properties
-    bulkRequestId: str
-    customerId: str
-    workflowId: str
-    status: BulkRequestStatus
-    createdOn: datetime
-    updatedOn: datetime
-    completedOn: datetime
-    deletedOn: datetime
-    
-    def __str__(self) -> str:
-        stringOutput = f"BulkRequestId: {self.bulkRequestId}\n"
-        stringOutput += f"CustomerId: {self.customerId}\n"
-        stringOutput += f"WorkflowId: {self.workflowId}\n"
-        stringOutput += f"Status: {self.status}\n"
-        stringOutput += f"CreatedOn: {self.createdOn}\n"
-        stringOutput += f"UpdatedOn: {self.updatedOn}\n"
-        stringOutput += f"CompletedOn: {self.completedOn}\n"
-        stringOutput += f"DeletedOn: {self.deletedOn}\n"
-        return stringOutput
-
-class BulkRequestDataElement:
-    # Properties
-    BulkRequestDataElementId: str
-    BulkRequestId: str
-    DataField: str
-    DataValue: str
-    CreatedOn: datetime
-    UpdatedOn: datetime
-    DeletedOn: datetime
-    
-    def __str__(self):
-        stringOutput = f"BulkRequestDataElementId: {self.BulkRequestDataElementId}\n"
-        stringOutput += f"BulkRequestId: {self.BulkRequestId}\n"
-        stringOutput += f"DataField: {self.DataField}\n"
-        stringOutput += f"DataValue: {self.DataValue}\n"
-        stringOutput += f"CreatedOn: {self.CreatedOn}\n"
-        stringOutput += f"UpdatedOn: {self.UpdatedOn}\n"
-        stringOutput += f"DeletedOn: {self.DeletedOn}\n"
-        return stringOutput
-
-class RequestStatus(Enum):
-    # <summary>The request is newly created.  And has no processing started or completed on it.</summary>
-    New = 1
-    # <summary>The request is pending.</summary>
-    Pending = 2
-    # <summary>The request is in progress.</summary>
-    InProgress = 3
-    # <summary>The request is completed.</summary>
-    Completed = 4
-    # <summary>The request is failed.</summary>
-    
-class Request:
-    # Properties
-    requestId: str
-    customerId: str
-    workflowId: str
-    status: RequestStatus
-    createdOn: datetime
-    updatedOn: datetime
-    completedOn: datetime
-    deletedOn: datetime
-
-    def __str__(self) -> str:
-        stringOutput = f"RequestId: {self.requestId}\n"
-        stringOutput += f"CustomerId: {self.customerId}\n"
-        stringOutput += f"WorkflowId: {self.workflowId}\n"
-        stringOutput += f"Status: {self.status}\n"
-        stringOutput += f"CreatedOn: {self.createdOn}\n"
-        stringOutput += f"UpdatedOn: {self.updatedOn}\n"
-        stringOutput += f"CompletedOn: {self.completedOn}\n"
-        stringOutput += f"DeletedOn: {self.deletedOn}\n"
-        return stringOutput
-    
-class RequestDataElement:
-    # Properties
-    RequestId: str
-    DataField: str
-    DataValue: str
-    CreatedOn: datetime
-    UpdatedOn: datetime
-    DeletedOn: datetime
-    
-    def __str__(self):
-        stringOutput = f"RequestId: {self.RequestId}\n"
-        stringOutput += f"DataField: {self.DataField}\n"
-        stringOutput += f"DataValue: {self.DataValue}\n"
-        stringOutput += f"CreatedOn: {self.CreatedOn}\n"
-        stringOutput += f"UpdatedOn: {self.UpdatedOn}\n"
-        stringOutput += f"DeletedOn: {self.DeletedOn}\n"
-        return stringOutput
\ No newline at end of file
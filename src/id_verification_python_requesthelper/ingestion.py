@@ -0,0 +1,237 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import csv
+import logging
+import os
+import time
+
+import requests
+
+from id_verification_python_requesthelper.journal import ROW_REQUESTED, ROW_REQUESTING
+from id_verification_python_requesthelper.models import Request
+
+DEFAULT_INGESTION_WORKERS = 8
+# Encoding of bulk files, UTF-8 with or without the byte order mark spreadsheet programs write
+CSV_ENCODING = 'utf-8-sig'
+
+log = logging.getLogger(__name__)
+
+class IngestionResult:
+    """Result of ingesting one row of a bulk file
+
+    Properties:
+        rowNumber: Position of the row in the input (the first row is firstRowNumber, 1 by default)
+        row: Data Field to Data Value for the row
+        request: Request created for the row (None if it could not be created)
+        dataElements: Request Data Elements created for the row (an item that failed is an Exception)
+        error: First error for the row, or None if the row succeeded
+        elapsed: Seconds taken to create the Request and its Request Data Elements
+    """
+    __slots__ = ('rowNumber', 'row', 'request', 'dataElements', 'error', 'elapsed')
+
+    def __init__(self, rowNumber: int, row: dict, request=None, dataElements: list = None, error: Exception = None, elapsed: float = 0.0) -> None:
+        self.rowNumber = rowNumber
+        self.row = row
+        self.request = request
+        self.dataElements = dataElements or []
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self) -> bool:
+        """succeeded: True if the Request and every Request Data Element were created"""
+        return self.error is None
+
+    def __str__(self) -> str:
+        stringOutput = f"RowNumber: {self.rowNumber}\n"
+        stringOutput += f"RequestId: {getattr(self.request, 'requestId', None)}\n"
+        stringOutput += f"DataElements: {len(self.dataElements)}\n"
+        stringOutput += f"Error: {self.error}\n"
+        return stringOutput
+
+class BulkIngestion:
+    """Stream the rows of a bulk file into a new Bulk Request
+
+    Creates the Bulk Request on first iteration, then creates a Request and its Request Data Elements
+    for every row on a bounded pool of worker threads.  Rows are read from the input only when a worker
+    slot is free, so memory stays flat no matter how large the input is.  Iterating yields an
+    IngestionResult for each row as it completes (not necessarily in input order).
+
+    With a journal every create call is recorded, and ingesting the same file again continues the
+    same Bulk Request: rows that are done are skipped, Requests that were created are reused and
+    only the missing Request Data Elements are created.  A row whose createRequest failed without
+    an answer may have been created by the API, so it is created again with a warning; a row the API
+    refused is recorded as failed and simply created again.  A row with more values than the header
+    (csv.DictReader puts them under the key None) fails with ValueError and nothing is created for it.
+
+    Args:
+        requestHelper: RequestHelper used to make the API calls
+        customerId (str): Customer Id
+        workflowId (str): Workflow Id
+        rows: Iterable of dicts (Data Field to Data Value), or the path of a UTF-8 CSV file with a header row
+        workers (int): Number of rows processed concurrently
+        maxPending (int): Maximum number of rows read ahead of the workers (defaults to workers * 2)
+        checkFileExists (bool): When rows is a file path, fail if the filename was already used for the Customer and Workflow
+        bulkRequestId (str): Add the rows to this existing Bulk Request instead of creating one (the filename is not checked)
+        rowFilter: Function called with each row number, only rows for which it returns True are ingested
+        journal (IngestionJournal): Journal to resume from and record progress in (rows must be a file path, or bulkRequestId given)
+        firstRowNumber (int): Row number of the first row (when rows are part of a larger file)
+
+    Properties:
+        bulkRequest: The Bulk Request created for the rows (None until iteration starts)
+
+    Example:
+        for result in requestHelper.ingestBulkFile(customerId, workflowId, "identities.csv", workers=16):
+            if not result.succeeded:
+                log.error(result.error)
+    """
+    bulkRequest = None
+    """bulkRequest: The Bulk Request created for the rows"""
+
+    def __init__(self, requestHelper, customerId: str, workflowId: str, rows, workers: int = DEFAULT_INGESTION_WORKERS, maxPending: int = None, checkFileExists: bool = True, bulkRequestId: str = None, rowFilter=None, journal=None, firstRowNumber: int = 1) -> None:
+        self.requestHelper = requestHelper
+        self.customerId = customerId
+        self.workflowId = workflowId
+        self.rows = rows
+        self.workers = max(1, workers)
+        self.maxPending = max(self.workers, maxPending or self.workers * 2)
+        self.checkFileExists = checkFileExists and bulkRequestId is None
+        self.bulkRequestId = bulkRequestId
+        self.rowFilter = rowFilter
+        self.journal = journal
+        self.firstRowNumber = firstRowNumber
+        self.__source = None
+
+    def __iter__(self):
+        if isinstance(self.rows, (str, os.PathLike)):
+            if self.journal is not None:
+                self.__resume(os.path.abspath(self.rows))
+            with open(self.rows, newline='', encoding=CSV_ENCODING) as file:
+                self.__checkFilename(os.path.basename(self.rows))
+                yield from self.__ingest(csv.DictReader(file))
+        else:
+            if self.journal is not None and self.bulkRequestId is None:
+                raise ValueError("A journal needs rows to be a file path, or a bulkRequestId")
+            yield from self.__ingest(self.rows)
+
+    def __resume(self, source: str) -> None:
+        """
+        Continue the Bulk Request the journal recorded for the file, if there is one.  A Bulk Request given
+        by the caller is recorded, so a later run without it continues the same Bulk Request
+        """
+        self.__source = source
+        if self.bulkRequestId is None:
+            self.bulkRequestId = self.journal.getBulkRequestId(source, self.customerId, self.workflowId)
+            if self.bulkRequestId is not None:
+                self.checkFileExists = False
+                log.info(f"BulkIngestion: Resuming Bulk Request {self.bulkRequestId} from the journal")
+        elif self.journal.getBulkRequestId(source, self.customerId, self.workflowId) != self.bulkRequestId:
+            self.journal.setBulkRequestId(source, self.customerId, self.workflowId, self.bulkRequestId)
+
+    def __checkFilename(self, filename: str) -> None:
+        """
+        Fail if the filename has already been used for the Customer and Workflow
+        """
+        if not self.checkFileExists:
+            return
+        exists = self.requestHelper.checkBulkRequestFileExists(self.customerId, self.workflowId, filename)
+        if isinstance(exists, Exception):
+            raise exists
+        if exists:
+            raise FileExistsError(f"A Bulk Request already exists for {filename}")
+
+    def __ingest(self, rows):
+        """
+        Create (or look up) the Bulk Request and fan the rows out to the worker threads
+        """
+        if self.bulkRequestId is None:
+            bulkRequest = self.requestHelper.createBulkRequest(self.customerId, self.workflowId)
+            if isinstance(bulkRequest, Exception):
+                raise bulkRequest
+            log.debug(f"BulkIngestion: Bulk Request {bulkRequest.bulkRequestId} created")
+            if self.__source is not None:
+                self.journal.setBulkRequestId(self.__source, self.customerId, self.workflowId, bulkRequest.bulkRequestId)
+        else:
+            bulkRequest = self.requestHelper.getBulkRequest(self.bulkRequestId)
+            if isinstance(bulkRequest, Exception):
+                raise bulkRequest
+            if bulkRequest is None:
+                raise LookupError(f"Bulk Request {self.bulkRequestId} not found")
+        self.bulkRequest = bulkRequest
+        completedRows = self.journal.completedRows(bulkRequest.bulkRequestId) if self.journal is not None else ()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="BulkIngestion")
+        pending = set()
+        try:
+            for rowNumber, row in enumerate(rows, start=self.firstRowNumber):
+                if self.rowFilter is not None and not self.rowFilter(rowNumber):
+                    continue
+                if rowNumber in completedRows:
+                    continue
+                if len(pending) >= self.maxPending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(executor.submit(self.__ingestRow, bulkRequest.bulkRequestId, rowNumber, row))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __ingestRow(self, bulkRequestId: str, rowNumber: int, row: dict) -> IngestionResult:
+        """
+        Create the Request and Request Data Elements for one row
+
+        Returns:
+            IngestionResult
+        """
+        if None in row:
+            return IngestionResult(rowNumber, row, error=ValueError(f"Row {rowNumber} has more values than the header ({len(row[None])} extra)"))
+        if self.journal is not None:
+            return self.__ingestJournaledRow(bulkRequestId, rowNumber, row)
+        started = time.perf_counter()
+        try:
+            request = self.requestHelper.createRequest(self.customerId, bulkRequestId, self.workflowId)
+            if isinstance(request, Exception):
+                return IngestionResult(rowNumber, row, error=request, elapsed=time.perf_counter() - started)
+            dataElements = self.requestHelper.createRequestDataElements(request.requestId, row, customerId=self.customerId)
+            error = next((dataElement for dataElement in dataElements if isinstance(dataElement, Exception)), None)
+            return IngestionResult(rowNumber, row, request, dataElements, error, time.perf_counter() - started)
+        except Exception as ex:
+            return IngestionResult(rowNumber, row, error=ex, elapsed=time.perf_counter() - started)
+
+    def __ingestJournaledRow(self, bulkRequestId: str, rowNumber: int, row: dict) -> IngestionResult:
+        """
+        Create what the journal does not record for one row: the Request (unless it was created) and the missing Request Data Elements
+
+        Returns:
+            IngestionResult (dataElements only holds the Request Data Elements created by this call)
+        """
+        started = time.perf_counter()
+        try:
+            entry = self.journal.getRow(bulkRequestId, rowNumber)
+            if entry is not None and entry[0] >= ROW_REQUESTED:
+                request = Request(requestId=entry[1], customerId=self.customerId, workflowId=self.workflowId)
+            else:
+                if entry is not None and entry[0] == ROW_REQUESTING:
+                    log.warning(f"BulkIngestion: Row {rowNumber} may already have a Request (the last attempt got no answer), creating it again")
+                self.journal.startRow(bulkRequestId, rowNumber)
+                # Not sent again after a connection error: the journal creates the row again on the next run instead
+                request = self.requestHelper.createRequest(self.customerId, bulkRequestId, self.workflowId, retrySent=False)
+                if isinstance(request, Exception):
+                    if not isinstance(request.__cause__, requests.exceptions.RequestException):
+                        # The API answered (or the call was never sent), so there is no Request to wonder about
+                        self.journal.failRow(bulkRequestId, rowNumber)
+                    return IngestionResult(rowNumber, row, error=request, elapsed=time.perf_counter() - started)
+                self.journal.setRequest(bulkRequestId, rowNumber, request.requestId)
+            createdFields = self.journal.completedDataElements(request.requestId)
+            missing = {dataField: dataValue for dataField, dataValue in row.items() if dataField not in createdFields}
+            dataElements = self.requestHelper.createRequestDataElements(request.requestId, missing, customerId=self.customerId, retrySent=False) if missing else []
+            self.journal.addDataElements(request.requestId, [dataField for dataField, dataElement in zip(missing, dataElements) if not isinstance(dataElement, Exception)])
+            error = next((dataElement for dataElement in dataElements if isinstance(dataElement, Exception)), None)
+            if error is None:
+                self.journal.completeRow(bulkRequestId, rowNumber)
+            return IngestionResult(rowNumber, row, request, dataElements, error, time.perf_counter() - started)
+        except Exception as ex:
+            return IngestionResult(rowNumber, row, error=ex, elapsed=time.perf_counter() - started)
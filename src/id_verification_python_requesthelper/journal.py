@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+
+JOURNAL_TIMEOUT = 30
+
+# Row states
+ROW_FAILED = 0
+"""ROW_FAILED: The API refused createRequest (no Request was created), the row is created again on the next run"""
+ROW_REQUESTING = 1
+"""ROW_REQUESTING: createRequest was called but did not return a Request (it may or may not have been created)"""
+ROW_REQUESTED = 2
+"""ROW_REQUESTED: The Request was created, some Request Data Elements may be missing"""
+ROW_DONE = 3
+"""ROW_DONE: The Request and every Request Data Element were created"""
+
+class IngestionJournal:
+    """IngestionJournal class to record the progress of bulk file ingestion in a local SQLite file
+
+    The journal is written ahead of and after every create call: which Bulk Request a bulk file is
+    loaded into, the Request created for each row, and each Request Data Element created for it.
+    Ingesting the same file again with the same journal continues the same Bulk Request, skips the
+    rows that are done, reuses the Requests that were already created and only creates the missing
+    Request Data Elements, so a crash never duplicates finished work and recovery only costs the
+    work that is left.
+
+    The file can be shared by threads and processes (SQLite locking), for example the worker
+    processes of idv-bulk-load.
+
+    Args:
+        path (str): Path of the SQLite file (created if it does not exist)
+        timeout (float): Seconds to wait for another process to release the file
+
+    Returns:
+        IngestionJournal object
+
+    Example:
+        journal = IngestionJournal("identities.journal")
+        for result in requestHelper.ingestBulkFile(customerId, workflowId, "identities.csv", journal=journal):
+            ...
+    """
+    def __init__(self, path: str, timeout: float = JOURNAL_TIMEOUT) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.__connections = {}
+        self.__connectionsLock = threading.Lock()
+        connection = self.__connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS bulkRequests (source TEXT NOT NULL, customerId TEXT NOT NULL, workflowId TEXT NOT NULL, bulkRequestId TEXT NOT NULL, PRIMARY KEY (source, customerId, workflowId))")
+        connection.execute("CREATE TABLE IF NOT EXISTS rows (bulkRequestId TEXT NOT NULL, rowNumber INTEGER NOT NULL, state INTEGER NOT NULL, requestId TEXT, PRIMARY KEY (bulkRequestId, rowNumber)) WITHOUT ROWID")
+        connection.execute("CREATE TABLE IF NOT EXISTS dataElements (requestId TEXT NOT NULL, dataField TEXT NOT NULL, PRIMARY KEY (requestId, dataField)) WITHOUT ROWID")
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Get the connection for the current thread (SQLite connections cannot be shared between threads)
+        """
+        thread = threading.get_ident()
+        connection = self.__connections.get(thread)
+        if connection is None:
+            # Only used by this thread, but closed by whichever thread calls close
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            # WAL with synchronous NORMAL survives a crash of the process, and commits do not wait for the disk
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self.__connectionsLock:
+                self.__connections[thread] = connection
+        return connection
+
+    def getBulkRequestId(self, source: str, customerId: str, workflowId: str) -> str:
+        """
+        Get the Bulk Request a bulk file is being loaded into
+
+        Parameters:
+            source (str): Name of the bulk file (usually its absolute path)
+            customerId (str): Customer Id
+            workflowId (str): Workflow Id
+
+        Returns:
+            str: Bulk Request Id, or None if the file has not been started
+        """
+        row = self.__connect().execute("SELECT bulkRequestId FROM bulkRequests WHERE source = ? AND customerId = ? AND workflowId = ?", (source, customerId, workflowId)).fetchone()
+        return row[0] if row else None
+
+    def setBulkRequestId(self, source: str, customerId: str, workflowId: str, bulkRequestId: str) -> None:
+        """
+        Record the Bulk Request a bulk file is loaded into
+        """
+        self.__connect().execute("INSERT OR REPLACE INTO bulkRequests (source, customerId, workflowId, bulkRequestId) VALUES (?, ?, ?, ?)", (source, customerId, workflowId, bulkRequestId))
+
+    def completedRows(self, bulkRequestId: str) -> set:
+        """
+        Get the rows that are done
+
+        Returns:
+            set: Row numbers
+        """
+        return {row[0] for row in self.__connect().execute("SELECT rowNumber FROM rows WHERE bulkRequestId = ? AND state = ?", (bulkRequestId, ROW_DONE))}
+
+    def getRow(self, bulkRequestId: str, rowNumber: int) -> tuple:
+        """
+        Get the state of a row
+
+        Returns:
+            tuple: (state, Request Id) or None if the row has not been started
+        """
+        return self.__connect().execute("SELECT state, requestId FROM rows WHERE bulkRequestId = ? AND rowNumber = ?", (bulkRequestId, rowNumber)).fetchone()
+
+    def startRow(self, bulkRequestId: str, rowNumber: int) -> None:
+        """
+        Record that createRequest is about to be called for a row
+        """
+        self.__connect().execute("INSERT OR REPLACE INTO rows (bulkRequestId, rowNumber, state, requestId) VALUES (?, ?, ?, NULL)", (bulkRequestId, rowNumber, ROW_REQUESTING))
+
+    def setRequest(self, bulkRequestId: str, rowNumber: int, requestId: str) -> None:
+        """
+        Record the Request created for a row
+        """
+        self.__connect().execute("UPDATE rows SET state = ?, requestId = ? WHERE bulkRequestId = ? AND rowNumber = ?", (ROW_REQUESTED, requestId, bulkRequestId, rowNumber))
+
+    def failRow(self, bulkRequestId: str, rowNumber: int) -> None:
+        """
+        Record that the API refused createRequest for a row
+        """
+        self.__connect().execute("UPDATE rows SET state = ? WHERE bulkRequestId = ? AND rowNumber = ?", (ROW_FAILED, bulkRequestId, rowNumber))
+
+    def completedDataElements(self, requestId: str) -> set:
+        """
+        Get the Data Fields already created for a Request
+
+        Returns:
+            set: Data Fields
+        """
+        return {row[0] for row in self.__connect().execute("SELECT dataField FROM dataElements WHERE requestId = ?", (requestId,))}
+
+    def addDataElements(self, requestId: str, dataFields: list) -> None:
+        """
+        Record Request Data Elements that were created
+        """
+        if dataFields:
+            connection = self.__connect()
+            connection.execute("BEGIN")
+            try:
+                connection.executemany("INSERT OR IGNORE INTO dataElements (requestId, dataField) VALUES (?, ?)", [(requestId, dataField) for dataField in dataFields])
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def completeRow(self, bulkRequestId: str, rowNumber: int) -> None:
+        """
+        Record that a row is done, and drop its Request Data Elements (they are no longer needed)
+        """
+        connection = self.__connect()
+        connection.execute("BEGIN")
+        try:
+            connection.execute("UPDATE rows SET state = ? WHERE bulkRequestId = ? AND rowNumber = ?", (ROW_DONE, bulkRequestId, rowNumber))
+            connection.execute("DELETE FROM dataElements WHERE requestId = (SELECT requestId FROM rows WHERE bulkRequestId = ? AND rowNumber = ?)", (bulkRequestId, rowNumber))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """
+        Close the connections of every thread that used the journal
+        """
+        with self.__connectionsLock:
+            connections = list(self.__connections.values())
+            self.__connections.clear()
+        for connection in connections:
+            connection.close()
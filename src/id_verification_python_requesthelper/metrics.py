@@ -0,0 +1,319 @@
+from bisect import bisect_left
+from collections import defaultdict
+import threading
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry import metrics as opentelemetry_metrics
+except ImportError:
+    opentelemetry_metrics = None
+
+# Metric names
+REQUESTS = "idv_requests_total"
+"""REQUESTS: Counter of API call attempts by endpoint, method and status (the HTTP status code or the error name)"""
+REQUEST_SECONDS = "idv_request_duration_seconds"
+"""REQUEST_SECONDS: Histogram of the latency of each API call attempt by endpoint and method"""
+RETRIES = "idv_retries_total"
+"""RETRIES: Counter of retries by endpoint and reason (the HTTP status code or the error name)"""
+BYTES_SENT = "idv_bytes_sent_total"
+"""BYTES_SENT: Counter of request body bytes by endpoint (before compression)"""
+BYTES_RECEIVED = "idv_bytes_received_total"
+"""BYTES_RECEIVED: Counter of response body bytes by endpoint (after decompression)"""
+WIRE_BYTES_SENT = "idv_wire_bytes_sent_total"
+"""WIRE_BYTES_SENT: Counter of request body bytes as sent over the wire by endpoint and Content-Encoding"""
+WIRE_BYTES_RECEIVED = "idv_wire_bytes_received_total"
+"""WIRE_BYTES_RECEIVED: Counter of response body bytes as received over the wire by endpoint and Content-Encoding"""
+ENCODE_SECONDS = "idv_encode_seconds_total"
+"""ENCODE_SECONDS: Counter of the seconds spent compressing request bodies by endpoint"""
+DECODE_SECONDS = "idv_decode_seconds_total"
+"""DECODE_SECONDS: Counter of the seconds spent decompressing response bodies by endpoint and Content-Encoding"""
+TOKEN_REFRESH_SECONDS = "idv_token_refresh_seconds"
+"""TOKEN_REFRESH_SECONDS: Histogram of the time taken to refresh the token"""
+API_URL_LOOKUP_SECONDS = "idv_api_url_lookup_seconds"
+"""API_URL_LOOKUP_SECONDS: Histogram of the time taken to look up the API URL (SSM or the cache file)"""
+IN_FLIGHT = "idv_requests_in_flight"
+"""IN_FLIGHT: Gauge of the API calls in flight"""
+POOL_UTILIZATION = "idv_pool_utilization"
+"""POOL_UTILIZATION: Gauge of the API calls in flight divided by the connection pool size"""
+COALESCED = "idv_coalesced_total"
+"""COALESCED: Counter of reads by endpoint that were answered by another thread's identical call in flight"""
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+GAUGE = "gauge"
+
+METRICS = {
+    REQUESTS: (COUNTER, ('endpoint', 'method', 'status'), "API call attempts"),
+    REQUEST_SECONDS: (HISTOGRAM, ('endpoint', 'method'), "Latency of API call attempts in seconds"),
+    RETRIES: (COUNTER, ('endpoint', 'reason'), "Retried API calls"),
+    BYTES_SENT: (COUNTER, ('endpoint',), "Request body bytes sent"),
+    BYTES_RECEIVED: (COUNTER, ('endpoint',), "Response body bytes received"),
+    WIRE_BYTES_SENT: (COUNTER, ('endpoint', 'encoding'), "Request body bytes sent over the wire"),
+    WIRE_BYTES_RECEIVED: (COUNTER, ('endpoint', 'encoding'), "Response body bytes received over the wire"),
+    ENCODE_SECONDS: (COUNTER, ('endpoint',), "Seconds spent compressing request bodies"),
+    DECODE_SECONDS: (COUNTER, ('endpoint', 'encoding'), "Seconds spent decompressing response bodies"),
+    TOKEN_REFRESH_SECONDS: (HISTOGRAM, (), "Token refresh time in seconds"),
+    API_URL_LOOKUP_SECONDS: (HISTOGRAM, (), "API URL lookup time in seconds"),
+    IN_FLIGHT: (GAUGE, (), "API calls in flight"),
+    POOL_UTILIZATION: (GAUGE, (), "API calls in flight divided by the connection pool size"),
+    COALESCED: (COUNTER, ('endpoint',), "Reads answered by an identical call in flight"),
+}
+"""METRICS: Kind, label names and description of each metric"""
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class MetricsRecorder:
+    """Base class for the metrics hooks of RequestHelper and AsyncRequestHelper
+
+    The helpers call increment, observe and setGauge with one of the metric names in METRICS and
+    its labels.  Every method does nothing here: subclass it and override the methods to send the
+    measurements anywhere.  They are called on the thread making the API call, so they must be
+    quick and thread safe.  When no recorder is given the helpers skip the measurements entirely.
+
+    Example:
+        class PrintMetrics(MetricsRecorder):
+            def observe(self, name, value, labels=None):
+                print(name, labels, value)
+
+        requestHelper = RequestHelper(username, password, metrics=PrintMetrics())
+    """
+    def increment(self, name: str, value: float = 1, labels: dict = None) -> None:
+        """
+        Add to a counter
+
+        Parameters:
+            name (str): Metric name
+            value (float): Amount to add
+            labels (dict): Label name to value
+        """
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        """
+        Record a value in a histogram
+
+        Parameters:
+            name (str): Metric name
+            value (float): Value (seconds for the latency metrics)
+            labels (dict): Label name to value
+        """
+
+    def setGauge(self, name: str, value: float, labels: dict = None) -> None:
+        """
+        Set a gauge
+
+        Parameters:
+            name (str): Metric name
+            value (float): Value
+            labels (dict): Label name to value
+        """
+
+class CallbackMetrics(MetricsRecorder):
+    """MetricsRecorder that passes every measurement to a function
+
+    Args:
+        callback: Function called with (kind, name, value, labels), kind being "counter", "histogram" or "gauge"
+
+    Returns:
+        CallbackMetrics object
+    """
+    def __init__(self, callback) -> None:
+        self.callback = callback
+
+    def increment(self, name: str, value: float = 1, labels: dict = None) -> None:
+        self.callback(COUNTER, name, value, labels or {})
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        self.callback(HISTOGRAM, name, value, labels or {})
+
+    def setGauge(self, name: str, value: float, labels: dict = None) -> None:
+        self.callback(GAUGE, name, value, labels or {})
+
+class MetricsCollector(MetricsRecorder):
+    """MetricsRecorder that keeps the totals in memory, to see where the time goes without a metrics backend
+
+    Args:
+        buckets (tuple): Upper bounds of the histogram buckets
+
+    Returns:
+        MetricsCollector object
+
+    Example:
+        metrics = MetricsCollector()
+        requestHelper = RequestHelper(username, password, metrics=metrics)
+        ...
+        print(metrics.summary())
+    """
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        self.__counters = defaultdict(float)
+        self.__histograms = {}
+        self.__gauges = {}
+
+    @staticmethod
+    def __key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())) if labels else ())
+
+    def increment(self, name: str, value: float = 1, labels: dict = None) -> None:
+        key = self.__key(name, labels)
+        with self.__lock:
+            self.__counters[key] += value
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        key = self.__key(name, labels)
+        bucket = bisect_left(self.buckets, value)
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = [0, 0.0, [0] * (len(self.buckets) + 1)]
+            histogram[0] += 1
+            histogram[1] += value
+            histogram[2][bucket] += 1
+
+    def setGauge(self, name: str, value: float, labels: dict = None) -> None:
+        key = self.__key(name, labels)
+        with self.__lock:
+            self.__gauges[key] = value
+
+    def snapshot(self) -> dict:
+        """
+        Get the current values
+
+        Returns:
+            dict: 'counters', 'histograms' and 'gauges', each a list of dicts with name, labels and the values
+                (histograms have count, sum, mean and buckets, the count of values up to each bound with None for the rest)
+        """
+        with self.__lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in self.__counters.items()]
+            histograms = [{
+                'name': name,
+                'labels': dict(labels),
+                'count': count,
+                'sum': total,
+                'mean': total / count if count else 0.0,
+                'buckets': dict(zip(self.buckets + (None,), counts)),
+            } for (name, labels), (count, total, counts) in self.__histograms.items()]
+            gauges = [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in self.__gauges.items()]
+        return {'counters': counters, 'histograms': histograms, 'gauges': gauges}
+
+    def summary(self) -> str:
+        """
+        Get a text report of the histograms (slowest total time first), counters and gauges
+
+        Returns:
+            str: Report
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for histogram in sorted(snapshot['histograms'], key=lambda item: item['sum'], reverse=True):
+            lines.append(f"{histogram['name']} {self.__formatLabels(histogram['labels'])}: count {histogram['count']}, total {histogram['sum']:.3f}, mean {histogram['mean']:.4f}")
+        for counter in sorted(snapshot['counters'], key=lambda item: (item['name'], sorted(item['labels'].items()))):
+            lines.append(f"{counter['name']} {self.__formatLabels(counter['labels'])}: {counter['value']:g}")
+        for gauge in snapshot['gauges']:
+            lines.append(f"{gauge['name']} {self.__formatLabels(gauge['labels'])}: {gauge['value']:g}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def __formatLabels(labels: dict) -> str:
+        return "{" + ", ".join(f"{name}={value}" for name, value in labels.items()) + "}"
+
+    def reset(self) -> None:
+        """
+        Forget every value
+        """
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+            self.__gauges.clear()
+
+class PrometheusMetrics(MetricsRecorder):
+    """MetricsRecorder that updates prometheus_client metrics (pip install id_verification_python_requesthelper[prometheus])
+
+    Args:
+        registry: prometheus_client CollectorRegistry (defaults to the global registry)
+        buckets (tuple): Upper bounds of the histogram buckets
+
+    Returns:
+        PrometheusMetrics object
+
+    Example:
+        prometheus_client.start_http_server(8000)
+        requestHelper = RequestHelper(username, password, metrics=PrometheusMetrics())
+    """
+    def __init__(self, registry=None, buckets: tuple = LATENCY_BUCKETS) -> None:
+        if prometheus_client is None:
+            raise ImportError("PrometheusMetrics requires prometheus_client. Install it with: pip install id_verification_python_requesthelper[prometheus]")
+        registry = registry if registry is not None else prometheus_client.REGISTRY
+        self.__metrics = {}
+        for name, (kind, labelNames, description) in METRICS.items():
+            if kind == COUNTER:
+                # prometheus_client adds _total to counters itself
+                metric = prometheus_client.Counter(name[:-len('_total')], description, labelNames, registry=registry)
+            elif kind == HISTOGRAM:
+                metric = prometheus_client.Histogram(name, description, labelNames, registry=registry, buckets=buckets)
+            else:
+                metric = prometheus_client.Gauge(name, description, labelNames, registry=registry)
+            self.__metrics[name] = metric
+
+    def __metric(self, name: str, labels: dict):
+        metric = self.__metrics[name]
+        return metric.labels(**labels) if labels else metric
+
+    def increment(self, name: str, value: float = 1, labels: dict = None) -> None:
+        self.__metric(name, labels).inc(value)
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        self.__metric(name, labels).observe(value)
+
+    def setGauge(self, name: str, value: float, labels: dict = None) -> None:
+        self.__metric(name, labels).set(value)
+
+class OpenTelemetryMetrics(MetricsRecorder):
+    """MetricsRecorder that records to OpenTelemetry instruments (pip install id_verification_python_requesthelper[opentelemetry])
+
+    Args:
+        meter: OpenTelemetry Meter (defaults to the meter of the global MeterProvider)
+
+    Returns:
+        OpenTelemetryMetrics object
+    """
+    def __init__(self, meter=None) -> None:
+        if opentelemetry_metrics is None:
+            raise ImportError("OpenTelemetryMetrics requires opentelemetry-api. Install it with: pip install id_verification_python_requesthelper[opentelemetry]")
+        meter = meter if meter is not None else opentelemetry_metrics.get_meter(__name__)
+        self.__instruments = {}
+        self.__gaugeValues = {}
+        self.__lock = threading.Lock()
+        for name, (kind, labelNames, description) in METRICS.items():
+            unit = "s" if name.endswith("_seconds") else ("By" if "bytes" in name else "1")
+            if kind == COUNTER:
+                instrument = meter.create_counter(name, unit=unit, description=description)
+            elif kind == HISTOGRAM:
+                instrument = meter.create_histogram(name, unit=unit, description=description)
+            elif hasattr(meter, 'create_gauge'):
+                instrument = meter.create_gauge(name, unit=unit, description=description)
+            else:
+                # Older APIs have no synchronous gauge, so the changes go to an up/down counter
+                instrument = meter.create_up_down_counter(name, unit=unit, description=description)
+            self.__instruments[name] = instrument
+
+    def increment(self, name: str, value: float = 1, labels: dict = None) -> None:
+        self.__instruments[name].add(value, labels)
+
+    def observe(self, name: str, value: float, labels: dict = None) -> None:
+        self.__instruments[name].record(value, labels)
+
+    def setGauge(self, name: str, value: float, labels: dict = None) -> None:
+        instrument = self.__instruments[name]
+        if hasattr(instrument, 'set'):
+            instrument.set(value, labels)
+            return
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        with self.__lock:
+            previous = self.__gaugeValues.get(key, 0)
+            self.__gaugeValues[key] = value
+        instrument.add(value - previous, labels)
@@ -0,0 +1,256 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+import sys
+
+from id_verification_python_requesthelper.enums import BulkRequestStatus, RequestStatus
+
+def parseDateTime(value):
+    """
+    Parse an ISO 8601 timestamp returned by the API
+
+    Parameters:
+        value: Timestamp string, datetime or None
+
+    Returns:
+        datetime (or the original value if it is not a valid timestamp)
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return _parseIsoDateTime(value)
+    except (TypeError, ValueError):
+        return value
+
+@lru_cache(maxsize=1024)
+def _parseIsoDateTime(value: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp.  Elements created together share timestamps,
+    so the parsed (immutable) datetimes are cached and shared
+    """
+    return datetime.fromisoformat(value)
+
+def parseStatus(statusType: type, value):
+    """
+    Parse a status returned by the API as a number or a name
+
+    Parameters:
+        statusType (type): BulkRequestStatus or RequestStatus
+        value: Status number, name or enum member
+
+    Returns:
+        statusType member (or the original value if it is not a known status)
+    """
+    if value is None or isinstance(value, statusType):
+        return value
+    try:
+        if isinstance(value, str) and not value.isdigit():
+            return statusType[value]
+        return statusType(int(value))
+    except (KeyError, ValueError):
+        return value
+
+def formatValue(value):
+    """
+    Format a model value for JSON
+
+    Returns:
+        ISO 8601 string for datetimes, the number for statuses, otherwise the value
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+@dataclass(frozen=True, slots=True)
+class BulkRequest:
+    # Properties
+    bulkRequestId: str = None
+    customerId: str = None
+    workflowId: str = None
+    status: BulkRequestStatus = None
+    createdOn: datetime = None
+    updatedOn: datetime = None
+    completedOn: datetime = None
+    deletedOn: datetime = None
+
+    @classmethod
+    def fromJson(cls, record: dict) -> 'BulkRequest':
+        """Create a BulkRequest from a bulkRequest JSON record returned by the API"""
+        return cls(
+            record['bulkRequestId'],
+            record['customerId'],
+            record['workflowId'],
+            parseStatus(BulkRequestStatus, record['status']),
+            parseDateTime(record['createdOn']),
+            parseDateTime(record['updatedOn']),
+            parseDateTime(record['completedOn']),
+            parseDateTime(record['deletedOn']),
+        )
+
+    def toJson(self) -> dict:
+        """Convert the BulkRequest to a bulkRequest JSON record in the API format"""
+        return {
+            'bulkRequestId': self.bulkRequestId,
+            'customerId': self.customerId,
+            'workflowId': self.workflowId,
+            'status': formatValue(self.status),
+            'createdOn': formatValue(self.createdOn),
+            'updatedOn': formatValue(self.updatedOn),
+            'completedOn': formatValue(self.completedOn),
+            'deletedOn': formatValue(self.deletedOn),
+        }
+
+    def __str__(self) -> str:
+        stringOutput = f"BulkRequestId: {self.bulkRequestId}\n"
+        stringOutput += f"CustomerId: {self.customerId}\n"
+        stringOutput += f"WorkflowId: {self.workflowId}\n"
+        stringOutput += f"Status: {self.status}\n"
+        stringOutput += f"CreatedOn: {self.createdOn}\n"
+        stringOutput += f"UpdatedOn: {self.updatedOn}\n"
+        stringOutput += f"CompletedOn: {self.completedOn}\n"
+        stringOutput += f"DeletedOn: {self.deletedOn}\n"
+        return stringOutput
+
+@dataclass(frozen=True, slots=True)
+class BulkRequestDataElement:
+    # Properties
+    BulkRequestDataElementId: str = None
+    BulkRequestId: str = None
+    DataField: str = None
+    DataValue: str = None
+    CreatedOn: datetime = None
+    UpdatedOn: datetime = None
+    DeletedOn: datetime = None
+
+    @classmethod
+    def fromJson(cls, record: dict) -> 'BulkRequestDataElement':
+        """Create a BulkRequestDataElement from a bulkRequestDataElement JSON record returned by the API"""
+        return cls(
+            record['bulkRequestDataElementId'],
+            sys.intern(record['bulkRequestId']),
+            sys.intern(record['dataField']),
+            record['dataValue'],
+            parseDateTime(record['createdOn']),
+            parseDateTime(record['updatedOn']),
+            parseDateTime(record['deletedOn']),
+        )
+
+    def toJson(self) -> dict:
+        """Convert the BulkRequestDataElement to a bulkRequestDataElement JSON record in the API format"""
+        return {
+            'bulkRequestDataElementId': self.BulkRequestDataElementId,
+            'bulkRequestId': self.BulkRequestId,
+            'dataField': self.DataField,
+            'dataValue': self.DataValue,
+            'createdOn': formatValue(self.CreatedOn),
+            'updatedOn': formatValue(self.UpdatedOn),
+            'deletedOn': formatValue(self.DeletedOn),
+        }
+
+    def __str__(self):
+        stringOutput = f"BulkRequestDataElementId: {self.BulkRequestDataElementId}\n"
+        stringOutput += f"BulkRequestId: {self.BulkRequestId}\n"
+        stringOutput += f"DataField: {self.DataField}\n"
+        stringOutput += f"DataValue: {self.DataValue}\n"
+        stringOutput += f"CreatedOn: {self.CreatedOn}\n"
+        stringOutput += f"UpdatedOn: {self.UpdatedOn}\n"
+        stringOutput += f"DeletedOn: {self.DeletedOn}\n"
+        return stringOutput
+
+@dataclass(frozen=True, slots=True)
+class Request:
+    # Properties
+    requestId: str = None
+    customerId: str = None
+    workflowId: str = None
+    status: RequestStatus = None
+    createdOn: datetime = None
+    updatedOn: datetime = None
+    completedOn: datetime = None
+    deletedOn: datetime = None
+
+    @classmethod
+    def fromJson(cls, record: dict) -> 'Request':
+        """Create a Request from a request JSON record returned by the API"""
+        return cls(
+            record['requestId'],
+            record['customerId'],
+            record['workflowId'],
+            parseStatus(RequestStatus, record['status']),
+            parseDateTime(record['createdOn']),
+            parseDateTime(record['updatedOn']),
+            parseDateTime(record['completedOn']),
+            parseDateTime(record['deletedOn']),
+        )
+
+    def toJson(self) -> dict:
+        """Convert the Request to a request JSON record in the API format"""
+        return {
+            'requestId': self.requestId,
+            'customerId': self.customerId,
+            'workflowId': self.workflowId,
+            'status': formatValue(self.status),
+            'createdOn': formatValue(self.createdOn),
+            'updatedOn': formatValue(self.updatedOn),
+            'completedOn': formatValue(self.completedOn),
+            'deletedOn': formatValue(self.deletedOn),
+        }
+
+    def __str__(self) -> str:
+        stringOutput = f"RequestId: {self.requestId}\n"
+        stringOutput += f"CustomerId: {self.customerId}\n"
+        stringOutput += f"WorkflowId: {self.workflowId}\n"
+        stringOutput += f"Status: {self.status}\n"
+        stringOutput += f"CreatedOn: {self.createdOn}\n"
+        stringOutput += f"UpdatedOn: {self.updatedOn}\n"
+        stringOutput += f"CompletedOn: {self.completedOn}\n"
+        stringOutput += f"DeletedOn: {self.deletedOn}\n"
+        return stringOutput
+
+@dataclass(frozen=True, slots=True)
+class RequestDataElement:
+    # Properties
+    RequestDataElementId: str = None
+    RequestId: str = None
+    DataField: str = None
+    DataValue: str = None
+    CreatedOn: datetime = None
+    UpdatedOn: datetime = None
+    DeletedOn: datetime = None
+
+    @classmethod
+    def fromJson(cls, record: dict) -> 'RequestDataElement':
+        """Create a RequestDataElement from a requestDataElement JSON record returned by the API"""
+        return cls(
+            record['requestDataElementId'],
+            sys.intern(record['requestId']),
+            sys.intern(record['dataField']),
+            record['dataValue'],
+            parseDateTime(record['createdOn']),
+            parseDateTime(record['updatedOn']),
+            parseDateTime(record['deletedOn']),
+        )
+
+    def toJson(self) -> dict:
+        """Convert the RequestDataElement to a requestDataElement JSON record in the API format"""
+        return {
+            'requestDataElementId': self.RequestDataElementId,
+            'requestId': self.RequestId,
+            'dataField': self.DataField,
+            'dataValue': self.DataValue,
+            'createdOn': formatValue(self.CreatedOn),
+            'updatedOn': formatValue(self.UpdatedOn),
+            'deletedOn': formatValue(self.DeletedOn),
+        }
+
+    def __str__(self):
+        stringOutput = f"RequestId: {self.RequestId}\n"
+        stringOutput += f"DataField: {self.DataField}\n"
+        stringOutput += f"DataValue: {self.DataValue}\n"
+        stringOutput += f"CreatedOn: {self.CreatedOn}\n"
+        stringOutput += f"UpdatedOn: {self.UpdatedOn}\n"
+        stringOutput += f"DeletedOn: {self.DeletedOn}\n"
+        return stringOutput
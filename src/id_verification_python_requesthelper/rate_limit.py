@@ -0,0 +1,195 @@
+import logging
+import sqlite3
+import threading
+import time
+
+RATE_LIMIT_TIMEOUT = None
+SHARED_STORE_TIMEOUT = 30
+
+log = logging.getLogger(__name__)
+
+class RateLimitTimeout(Exception):
+    """Raised when a token could not be taken from the rate limiter in time"""
+
+class MemoryBucketStore:
+    """MemoryBucketStore class that keeps the token buckets of a RateLimiter in memory
+
+    Shared by every thread that uses the same RateLimiter.
+
+    Returns:
+        MemoryBucketStore object
+    """
+    def __init__(self) -> None:
+        self.__buckets = {}
+        self.__lock = threading.Lock()
+
+    def take(self, buckets: list) -> float:
+        """
+        Take one token from every bucket, or none if any of them is empty
+
+        Parameters:
+            buckets (list): (key, rate, burst) for each bucket
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until they could be
+        """
+        now = time.monotonic()
+        with self.__lock:
+            levels = [_refill(self.__buckets.get(key), rate, burst, now) for key, rate, burst in buckets]
+            wait = max(_waitFor(level, rate) for level, (key, rate, burst) in zip(levels, buckets))
+            if wait == 0:
+                levels = [level - 1 for level in levels]
+            for level, (key, rate, burst) in zip(levels, buckets):
+                self.__buckets[key] = (level, now)
+            return wait
+
+class SharedBucketStore:
+    """SharedBucketStore class that keeps the token buckets of a RateLimiter in a local SQLite file
+
+    Every process (and thread) that opens a RateLimiter on the same file shares the same buckets,
+    so the rates are limits for the whole machine rather than for each process.
+
+    Args:
+        path (str): Path of the SQLite file (created if it does not exist)
+        timeout (float): Seconds to wait for another process to release the file
+
+    Returns:
+        SharedBucketStore object
+    """
+    def __init__(self, path: str, timeout: float = SHARED_STORE_TIMEOUT) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.__local = threading.local()
+        with self.__connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        Get the connection for the current thread (SQLite connections cannot be shared between threads)
+        """
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self.__local.connection = connection
+        return connection
+
+    def take(self, buckets: list) -> float:
+        """
+        Take one token from every bucket, or none if any of them is empty
+
+        Parameters:
+            buckets (list): (key, rate, burst) for each bucket
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until they could be
+        """
+        # Wall clock time, because monotonic clocks are not comparable between processes
+        now = time.time()
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            levels = []
+            for key, rate, burst in buckets:
+                row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                levels.append(_refill(row, rate, burst, now))
+            wait = max(_waitFor(level, rate) for level, (key, rate, burst) in zip(levels, buckets))
+            if wait == 0:
+                levels = [level - 1 for level in levels]
+            connection.executemany("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)", [(key, level, now) for level, (key, rate, burst) in zip(levels, buckets)])
+            connection.execute("COMMIT")
+            return wait
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+def _refill(bucket, rate: float, burst: float, now: float) -> float:
+    """
+    Get the number of tokens in a bucket now
+
+    Parameters:
+        bucket: (tokens, updated) or None for a new (full) bucket
+    """
+    if bucket is None:
+        return burst
+    tokens, updated = bucket
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+def _waitFor(level: float, rate: float) -> float:
+    """
+    Get the seconds until a bucket has one token
+    """
+    return 0.0 if level >= 1 else (1 - level) / rate
+
+class RateLimiter:
+    """RateLimiter class to limit the rate of API calls, overall and per customer
+
+    Token buckets: each call takes one token from the global bucket, which refills at rate tokens
+    per second up to burst, and one from the bucket of its customer, which refills at customerRate up
+    to customerBurst.  A call only goes ahead when both buckets have a token, so one customer with a
+    huge bulk file can never use more than customerRate and the rest of the global rate stays
+    available to other customers.  Waiting callers poll the buckets, so whichever customer has tokens
+    goes first.
+
+    The buckets are kept in memory and shared by every thread that uses the RateLimiter.  Pass a
+    SharedBucketStore to share them between processes.
+
+    Args:
+        rate (float): Calls per second for all customers together
+        burst (float): Calls that can be made at once after a quiet period (defaults to rate)
+        customerRate (float): Calls per second for any one customer (None for no per customer limit)
+        customerBurst (float): Burst for any one customer (defaults to customerRate)
+        store: MemoryBucketStore or SharedBucketStore (defaults to a new MemoryBucketStore)
+
+    Returns:
+        RateLimiter object
+
+    Example:
+        rateLimiter = RateLimiter(rate=200, customerRate=50, store=SharedBucketStore('/tmp/idv-rate-limit.db'))
+        requestHelper = RequestHelper(userHelper, rateLimiter=rateLimiter)
+    """
+    def __init__(self, rate: float, burst: float = None, customerRate: float = None, customerBurst: float = None, store=None) -> None:
+        if rate <= 0 or (customerRate is not None and customerRate <= 0):
+            raise ValueError("Rates must be greater than 0")
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self.customerRate = customerRate
+        self.customerBurst = max(1.0, customerBurst or customerRate) if customerRate else None
+        self.store = store if store is not None else MemoryBucketStore()
+
+    def tryAcquire(self, customerId: str = None) -> float:
+        """
+        Take a token for a call without waiting
+
+        Parameters:
+            customerId (str): Customer the call is made for (None to only use the global bucket)
+
+        Returns:
+            float: 0 if the call can go ahead, otherwise the seconds to wait before trying again
+        """
+        buckets = [('*', self.rate, self.burst)]
+        if customerId is not None and self.customerRate:
+            buckets.append((f'customer:{customerId}', self.customerRate, self.customerBurst))
+        return self.store.take(buckets)
+
+    def acquire(self, customerId: str = None, timeout: float = RATE_LIMIT_TIMEOUT) -> None:
+        """
+        Wait until a call can go ahead
+
+        Parameters:
+            customerId (str): Customer the call is made for (None to only use the global bucket)
+            timeout (float): Longest time to wait in seconds (None to wait as long as it takes)
+
+        Raises:
+            RateLimitTimeout if the call could not go ahead within timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.tryAcquire(customerId)
+            if wait == 0:
+                return
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RateLimitTimeout(f"Rate limit for customer {customerId} not available within {timeout} seconds")
+                wait = min(wait, remaining)
+            time.sleep(wait)
@@ -0,0 +1,175 @@
+import logging
+import random
+import threading
+import time
+
+MAX_RETRY_COUNT = 5
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+RETRY_DEADLINE = 120
+RETRY_STATUS_CODES = frozenset([429, 499, 500, 502, 503, 504])
+# The API says it did not process the request, so even a create can be sent again
+NOT_PROCESSED_STATUS_CODES = frozenset([429, 503])
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MIN_PER_SECOND = 10
+RETRY_BUDGET_CAPACITY = 100
+
+log = logging.getLogger(__name__)
+
+def callFailed(error: Exception) -> Exception:
+    """
+    Get the Exception the API methods return for a call that got no answer (the retries ran out on connection
+    errors, the reply could not be read, or the circuit breaker was open)
+
+    Parameters:
+        error (Exception): Error raised by the last attempt
+
+    Returns:
+        Exception: its __cause__ is error, so a caller can tell a call that got no answer (a create may have been
+        committed by the API) from one the API refused
+    """
+    failure = Exception(f"Error: Max retries exceeded - {error}")
+    failure.__cause__ = error
+    return failure
+
+class RetryBudget:
+    """RetryBudget class to cap retries to a share of the requests being made
+
+    Every request deposits ratio of a retry into the budget, and minPerSecond retries per second
+    are always allowed.  When the API is down this stops every caller from multiplying the load
+    by the number of retries.  One budget is shared by every call that uses the same RetryPolicy.
+
+    Args:
+        ratio (float): Retries allowed per request
+        minPerSecond (float): Retries allowed per second regardless of the number of requests
+        capacity (float): Most retries that can be saved up
+
+    Returns:
+        RetryBudget object
+    """
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, minPerSecond: float = RETRY_BUDGET_MIN_PER_SECOND, capacity: float = RETRY_BUDGET_CAPACITY) -> None:
+        self.ratio = ratio
+        self.minPerSecond = minPerSecond
+        self.capacity = capacity
+        self.__balance = capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """
+        Record a request
+        """
+        with self.__lock:
+            self.__balance = min(self.capacity, self.__balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Take one retry from the budget
+
+        Returns:
+            bool: whether or not the retry is allowed
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__balance = min(self.capacity, self.__balance + (now - self.__updated) * self.minPerSecond)
+            self.__updated = now
+            if self.__balance < 1:
+                return False
+            self.__balance -= 1
+            return True
+
+class RetryPolicy:
+    """RetryPolicy class that decides when and how long to wait before an API call is retried
+
+    Waits grow exponentially from baseDelay up to maxDelay with full jitter, so callers that failed
+    together do not retry together.  A call is not retried once maxRetries is reached, once the next
+    wait would end after deadline seconds from the first attempt, or when the retry budget is spent.
+    The policy has no HTTP client of its own, so the same object can be used by RequestHelper and
+    AsyncRequestHelper (and shared between them).
+
+    Args:
+        maxRetries (int): Maximum number of retries after the first attempt
+        baseDelay (float): Seconds to wait before the first retry (before jitter)
+        maxDelay (float): Longest wait between two attempts
+        deadline (float): Seconds after the first attempt after which no more retries are made
+        retryStatusCodes (frozenset): HTTP status codes that are retried
+        budget (RetryBudget): Shared retry budget (defaults to a new RetryBudget, False for no budget)
+        jitter (bool): Randomise the waits
+
+    Returns:
+        RetryPolicy object
+    """
+    def __init__(self, maxRetries: int = MAX_RETRY_COUNT, baseDelay: float = RETRY_BASE_DELAY, maxDelay: float = RETRY_MAX_DELAY, deadline: float = RETRY_DEADLINE, retryStatusCodes: frozenset = RETRY_STATUS_CODES, budget: RetryBudget = None, jitter: bool = True) -> None:
+        self.maxRetries = maxRetries
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.deadline = deadline
+        self.retryStatusCodes = frozenset(retryStatusCodes)
+        self.budget = RetryBudget() if budget is None else (budget or None)
+        self.jitter = jitter
+
+    def isRetryableStatus(self, statusCode: int, idempotent: bool = True) -> bool:
+        """
+        Check if a response with this status code should be retried
+
+        Parameters:
+            statusCode (int): HTTP status code of the response
+            idempotent (bool): Whether sending the request twice is harmless.  When False only 429 and 503 are retried,
+                the other status codes can come back after the API committed the request
+
+        Returns:
+            bool: whether or not the status code is retryable
+        """
+        return statusCode in self.retryStatusCodes and (idempotent or statusCode in NOT_PROCESSED_STATUS_CODES)
+
+    def getDelay(self, attempt: int, retryAfter: str = None) -> float:
+        """
+        Get the number of seconds to wait before the next attempt
+
+        Parameters:
+            attempt (int): Number of the retry about to be made (1 for the first retry)
+            retryAfter (str): Value of the Retry-After response header, if any
+
+        Returns:
+            float: Seconds to wait
+        """
+        delay = min(self.maxDelay, self.baseDelay * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retryAfter:
+            try:
+                delay = max(delay, min(float(retryAfter), self.maxDelay))
+            except ValueError:
+                pass
+        return delay
+
+    def nextDelay(self, attempt: int, started: float, reason, retryAfter: str = None):
+        """
+        Decide whether to retry, and how long to wait first
+
+        Parameters:
+            attempt (int): Number of the retry about to be made (1 for the first retry)
+            started (float): time.monotonic() of the first attempt
+            reason: Status code or exception that caused the retry (used for logging)
+            retryAfter (str): Value of the Retry-After response header, if any
+
+        Returns:
+            float: Seconds to wait before retrying, or None if the call should not be retried
+        """
+        if attempt > self.maxRetries:
+            return None
+        delay = self.getDelay(attempt, retryAfter)
+        if time.monotonic() + delay - started > self.deadline:
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            log.warning(f"Retry budget exhausted, not retrying: {reason}")
+            return None
+        log.warning(f"Error: {reason}. Attempt {attempt} of {self.maxRetries}.  Waiting {delay:.2f} seconds before trying again.")
+        return delay
+
+    def recordRequest(self) -> None:
+        """
+        Record a first attempt, which adds to the retry budget
+        """
+        if self.budget is not None:
+            self.budget.deposit()
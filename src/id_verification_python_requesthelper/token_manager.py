@@ -0,0 +1,139 @@
+from concurrent.futures import Future
+from datetime import datetime, timezone
+import logging
+import threading
+import time
+
+from id_verification_python_requesthelper.metrics import MetricsRecorder, TOKEN_REFRESH_SECONDS
+
+MAX_TOKEN_AGE = 600
+TOKEN_REFRESH_MARGIN = 60
+
+log = logging.getLogger(__name__)
+
+class TokenManager:
+    """TokenManager class to keep the UserHelper token fresh for many threads
+
+    The token is renewed refreshMargin seconds before it reaches maxTokenAge, by a background
+    thread when background is True, otherwise by the first caller that sees it is due.  Concurrent
+    refreshes are collapsed into one in-flight call to the UserHelper, so callers only ever wait
+    for a refresh when the token has actually expired.
+
+    Args:
+        userHelper: UserHelper that gets the token
+        maxTokenAge (int): Age in seconds after which the token must not be used
+        refreshMargin (int): Seconds before maxTokenAge at which the token is renewed
+        background (bool): Renew the token from a background thread
+        metrics (MetricsRecorder): Receives the time taken by each refresh
+
+    Returns:
+        TokenManager object
+    """
+    def __init__(self, userHelper, maxTokenAge: int = MAX_TOKEN_AGE, refreshMargin: int = TOKEN_REFRESH_MARGIN, background: bool = True, metrics: MetricsRecorder = None) -> None:
+        self.userHelper = userHelper
+        self.maxTokenAge = maxTokenAge
+        self.refreshMargin = min(refreshMargin, maxTokenAge)
+        self.metrics = metrics
+        self.__lock = threading.Lock()
+        self.__inFlight = None
+        self.__stopped = threading.Event()
+        self.__thread = None
+        if background:
+            self.__thread = threading.Thread(target=self.__renewLoop, name="TokenManager", daemon=True)
+            self.__thread.start()
+
+    def tokenAge(self) -> float:
+        """
+        Get the age of the current token
+
+        Returns:
+            float: Age in seconds (infinity if there is no token)
+        """
+        if self.userHelper.token == None or self.userHelper.tokenRefreshed == None:
+            return float('inf')
+        return (datetime.now(timezone.utc) - self.userHelper.tokenRefreshed).total_seconds()
+
+    def isExpired(self) -> bool:
+        """
+        Check if the token is missing or too old to use
+
+        Returns:
+            bool: whether or not getToken would have to wait for a refresh
+        """
+        return self.tokenAge() >= self.maxTokenAge
+
+    def getToken(self) -> str:
+        """
+        Get a usable token.  Only waits when the token has expired; a token that is due
+        for renewal is returned straight away while it is renewed in the background
+
+        Returns:
+            str: Token
+        """
+        age = self.tokenAge()
+        if age >= self.maxTokenAge:
+            return self.refresh()
+        if age >= self.maxTokenAge - self.refreshMargin:
+            self.__refreshInBackground()
+        return self.userHelper.token
+
+    def refresh(self) -> str:
+        """
+        Refresh the token.  If a refresh is already in flight, wait for it instead of starting another
+
+        Returns:
+            str: Token
+        """
+        with self.__lock:
+            future = self.__inFlight
+            leader = future is None
+            if leader:
+                future = self.__inFlight = Future()
+        if leader:
+            try:
+                log.debug("TokenManager.refresh")
+                started = time.perf_counter()
+                self.userHelper.getToken()
+                if self.metrics is not None:
+                    self.metrics.observe(TOKEN_REFRESH_SECONDS, time.perf_counter() - started)
+                future.set_result(self.userHelper.token)
+            except Exception as ex:
+                future.set_exception(ex)
+            finally:
+                with self.__lock:
+                    self.__inFlight = None
+        return future.result()
+
+    def __refreshInBackground(self) -> None:
+        """
+        Start a refresh on a separate thread unless one is already in flight
+        """
+        if self.__inFlight is None:
+            threading.Thread(target=self.__refreshQuietly, name="TokenManager.refresh", daemon=True).start()
+
+    def __refreshQuietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as ex:
+            log.warning(f"Error refreshing the token: {ex}")
+
+    def __renewLoop(self) -> None:
+        """
+        Renew the token refreshMargin seconds before it expires until close is called
+        """
+        while not self.__stopped.is_set():
+            wait = self.maxTokenAge - self.refreshMargin - self.tokenAge()
+            if wait > 0:
+                self.__stopped.wait(min(wait, self.maxTokenAge))
+                continue
+            try:
+                self.refresh()
+            except Exception as ex:
+                log.warning(f"Error refreshing the token: {ex}")
+                self.__stopped.wait(1)
+
+    def close(self) -> None:
+        """
+        Stop the background renewal thread
+        """
+        self.__stopped.set()
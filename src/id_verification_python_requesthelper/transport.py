@@ -0,0 +1,115 @@
+import logging
+
+import requests
+import requests.adapters
+import urllib3
+
+from id_verification_python_requesthelper.defaults import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+
+log = logging.getLogger(__name__)
+
+class Transport:
+    """Base class for the HTTP layer under RequestHelper
+
+    A transport sends one HTTP request and returns a response with the requests.Response
+    interface the helper uses: status_code, headers, content, iter_content, close and use as a
+    context manager.  Connection problems are raised as requests.exceptions.ConnectionError or
+    requests.exceptions.Timeout (so retries, circuit breakers and the callers' error handling
+    work the same with every transport), and wasNotSent tells the helper whether a failed
+    create call can safely be sent again.  Transports that implement iterRaw let the helper read
+    compressed bodies as they came over the wire and decode them itself; with the others the
+    bodies are decoded by the transport.
+
+    The transports are RequestsTransport (HTTP/1.1 connection pooling, the default) and
+    Http2Transport (HTTP/2, many calls multiplexed over a few connections).
+    """
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        """
+        Send an HTTP request
+
+        Parameters:
+            method (str): HTTP method
+            url (str): Full URL
+            headers (dict): Request headers (shared, must not be changed)
+            data: Request body (str or bytes)
+            timeout: Seconds to wait, or a (connect, read) tuple (None to wait as long as it takes)
+            stream (bool): Leave the body to be read with iter_content
+
+        Returns:
+            Response
+        """
+        raise NotImplementedError
+
+    def iterRaw(self, response, chunkSize: int):
+        """
+        Read the body of a response requested with stream=True as it came over the wire, without decoding its Content-Encoding
+
+        Parameters:
+            response: Response returned by request
+            chunkSize (int): Number of bytes read at a time
+
+        Returns:
+            Iterator of bytes
+
+        Raises:
+            NotImplementedError if the transport only gives decoded bodies
+        """
+        raise NotImplementedError
+
+    def wasNotSent(self, error: requests.exceptions.RequestException) -> bool:
+        """
+        Check whether a connection error happened before the request was sent (the connection could not be opened)
+
+        Parameters:
+            error (RequestException): Error raised by request
+
+        Returns:
+            bool: True if the API cannot have received the request
+        """
+        return False
+
+    def close(self) -> None:
+        """
+        Close the open connections
+        """
+
+class RequestsTransport(Transport):
+    """HTTP/1.1 transport using a pooled requests.Session (one call per connection at a time)
+
+    Args:
+        poolConnections (int): Number of host connection pools to cache
+        poolMaxSize (int): Maximum number of connections kept open per host
+        poolBlock (bool): Block when all connections to a host are in use instead of opening extra connections
+        keepAlive (bool): Reuse connections between calls
+
+    Returns:
+        RequestsTransport object
+    """
+    def __init__(self, poolConnections: int = DEFAULT_POOL_CONNECTIONS, poolMaxSize: int = DEFAULT_POOL_MAXSIZE, poolBlock: bool = False, keepAlive: bool = True) -> None:
+        self.session = requests.Session()
+        adapterOptions = {'pool_connections': poolConnections, 'pool_maxsize': poolMaxSize, 'pool_block': poolBlock}
+        self.session.mount('http://', requests.adapters.HTTPAdapter(**adapterOptions))
+        self.session.mount('https://', requests.adapters.HTTPAdapter(**adapterOptions))
+        if not keepAlive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False) -> requests.Response:
+        return self.session.request(method, url, headers=headers, data=data, timeout=timeout, stream=stream)
+
+    def iterRaw(self, response: requests.Response, chunkSize: int):
+        try:
+            yield from response.raw.stream(chunkSize, decode_content=False)
+        # The errors requests.Response.iter_content raises for the same problems
+        except urllib3.exceptions.ReadTimeoutError as ex:
+            raise requests.exceptions.ConnectionError(ex) from ex
+        except urllib3.exceptions.ProtocolError as ex:
+            raise requests.exceptions.ChunkedEncodingError(ex) from ex
+
+    def wasNotSent(self, error: requests.exceptions.RequestException) -> bool:
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, urllib3.exceptions.ConnectTimeoutError)
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,334 @@
+import asyncio
+from collections import deque
+import heapq
+import logging
+import threading
+import time
+
+from id_verification_python_requesthelper.enums import TERMINAL_BULK_REQUEST_STATUSES
+
+WATCH_INTERVAL = 5
+WATCH_MAX_INTERVAL = 300
+WATCH_BACKOFF = 1.5
+WATCH_BATCH_SIZE = 100
+
+log = logging.getLogger(__name__)
+
+def _resolve(waiter: asyncio.Future) -> None:
+    """
+    Wake an async iterator (on its event loop)
+    """
+    if not waiter.done():
+        waiter.set_result(None)
+
+class BulkRequestStatusChange:
+    """Event delivered by BulkRequestWatcher when the status of a Bulk Request changes
+
+    Properties:
+        bulkRequestId: Bulk Request Id
+        previousStatus: Status before the change (None the first time the Bulk Request is seen)
+        bulkRequest: Bulk Request with the new status (None if it was not found)
+    """
+    __slots__ = ('bulkRequestId', 'previousStatus', 'bulkRequest')
+
+    def __init__(self, bulkRequestId: str, previousStatus, bulkRequest) -> None:
+        self.bulkRequestId = bulkRequestId
+        self.previousStatus = previousStatus
+        self.bulkRequest = bulkRequest
+
+    @property
+    def status(self):
+        """New status (None if the Bulk Request was not found)"""
+        return self.bulkRequest.status if self.bulkRequest is not None else None
+
+    @property
+    def isTerminal(self) -> bool:
+        """Whether the Bulk Request will not change any more (or was not found)"""
+        return self.bulkRequest is None or self.bulkRequest.status in TERMINAL_BULK_REQUEST_STATUSES
+
+    def __str__(self) -> str:
+        stringOutput = f"BulkRequestId: {self.bulkRequestId}\n"
+        stringOutput += f"PreviousStatus: {self.previousStatus}\n"
+        stringOutput += f"Status: {self.status}\n"
+        return stringOutput
+
+class _Watch:
+    """State of one watched Bulk Request"""
+    __slots__ = ('bulkRequestId', 'bulkRequest', 'interval', 'due')
+
+    def __init__(self, bulkRequestId: str, due: float, interval: float) -> None:
+        self.bulkRequestId = bulkRequestId
+        self.bulkRequest = None
+        self.interval = interval
+        self.due = due
+
+class BulkRequestWatcher:
+    """BulkRequestWatcher class to follow the status of many Bulk Requests from one scheduler thread
+
+    Every watched Bulk Request is polled when it is due.  The Bulk Requests that are due together
+    are fetched together (up to batchSize at a time) over the RequestHelper connection pool.  While
+    a Bulk Request's updatedOn does not change its polling interval grows by backoff up to
+    maxInterval; as soon as it changes the interval goes back to interval.  A Bulk Request stops
+    being watched once it reaches a terminal status (Completed, Failed, Cancelled or Archived) or
+    is not found.  Polling state is a few objects per Bulk Request, so tens of thousands can be
+    watched at once.
+
+    Every status change (including the first status seen) is passed to onChange, if given, and
+    can be read by iterating the watcher (for / async for), which ends when nothing is left to watch.
+    Without onChange the changes are kept until they are iterated; with onChange only the changes
+    made while the watcher is being iterated are kept for the iterators.
+
+    Args:
+        requestHelper: RequestHelper used to get the Bulk Requests
+        bulkRequestIds: Bulk Request Ids to start watching
+        onChange: Function called with each BulkRequestStatusChange (on the scheduler thread)
+        interval (float): Seconds between polls of a Bulk Request that is changing
+        maxInterval (float): Longest time between polls of a Bulk Request
+        backoff (float): Factor the interval grows by each time a Bulk Request has not changed
+        batchSize (int): Maximum number of Bulk Requests fetched in one round
+
+    Returns:
+        BulkRequestWatcher object
+
+    Example:
+        with requestHelper.watchBulkRequests(bulkRequestIds) as watcher:
+            for change in watcher:
+                print(change.bulkRequestId, change.status)
+    """
+    def __init__(self, requestHelper, bulkRequestIds=(), onChange=None, interval: float = WATCH_INTERVAL, maxInterval: float = WATCH_MAX_INTERVAL, backoff: float = WATCH_BACKOFF, batchSize: int = WATCH_BATCH_SIZE) -> None:
+        self.requestHelper = requestHelper
+        self.onChange = onChange
+        self.interval = interval
+        self.maxInterval = max(interval, maxInterval)
+        self.backoff = max(1.0, backoff)
+        self.batchSize = max(1, batchSize)
+        self.__watches = {}
+        self.__schedule = []
+        self.__events = deque()
+        self.__eventsCondition = threading.Condition()
+        self.__iterators = 0
+        self.__waiters = set()
+        self.__condition = threading.Condition()
+        self.__stopped = False
+        self.__thread = None
+        for bulkRequestId in bulkRequestIds:
+            self.watch(bulkRequestId)
+
+    def watch(self, bulkRequestId: str) -> None:
+        """
+        Start watching a Bulk Request (it is polled straight away)
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+        """
+        with self.__condition:
+            if bulkRequestId in self.__watches:
+                return
+            watch = _Watch(bulkRequestId, time.monotonic(), self.interval)
+            self.__watches[bulkRequestId] = watch
+            heapq.heappush(self.__schedule, (watch.due, bulkRequestId))
+            self.__condition.notify()
+
+    def unwatch(self, bulkRequestId: str) -> None:
+        """
+        Stop watching a Bulk Request
+
+        Parameters:
+            bulkRequestId (str): Bulk Request Id
+        """
+        with self.__condition:
+            self.__watches.pop(bulkRequestId, None)
+            self.__condition.notify()
+        self.__wake()
+
+    @property
+    def watching(self) -> int:
+        """Number of Bulk Requests being watched"""
+        return len(self.__watches)
+
+    def start(self) -> 'BulkRequestWatcher':
+        """
+        Start the scheduler thread
+
+        Returns:
+            BulkRequestWatcher object
+        """
+        with self.__condition:
+            if self.__thread is None:
+                self.__stopped = False
+                self.__thread = threading.Thread(target=self.__run, name="BulkRequestWatcher", daemon=True)
+                self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the scheduler thread (iteration then ends)
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify()
+        self.__wake()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+        self.__thread = None
+
+    def __enter__(self) -> 'BulkRequestWatcher':
+        return self.start()
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        self.stop()
+
+    def __iter__(self):
+        """
+        Yield each BulkRequestStatusChange, until nothing is left to watch or the watcher is stopped
+        """
+        self.start()
+        with self.__eventsCondition:
+            self.__iterators += 1
+        try:
+            while True:
+                with self.__eventsCondition:
+                    while not self.__events and not self.__finished():
+                        self.__eventsCondition.wait()
+                    if not self.__events:
+                        return
+                    event = self.__events.popleft()
+                yield event
+        finally:
+            with self.__eventsCondition:
+                self.__iterators -= 1
+
+    async def __aiter__(self):
+        """
+        Yield each BulkRequestStatusChange without blocking the event loop, until nothing is left to watch or the watcher is stopped
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        with self.__eventsCondition:
+            self.__iterators += 1
+        try:
+            while True:
+                with self.__eventsCondition:
+                    if self.__events:
+                        event = self.__events.popleft()
+                    elif self.__finished():
+                        return
+                    else:
+                        event = None
+                        waiter = loop.create_future()
+                        self.__waiters.add(waiter)
+                if event is None:
+                    # Resolved by the scheduler thread when an event arrives or watching finishes
+                    try:
+                        await waiter
+                    finally:
+                        with self.__eventsCondition:
+                            self.__waiters.discard(waiter)
+                    continue
+                yield event
+        finally:
+            with self.__eventsCondition:
+                self.__iterators -= 1
+
+    def __finished(self) -> bool:
+        """
+        Whether watching has finished (stopped, or nothing left to watch)
+        """
+        return self.__stopped or not self.__watches
+
+    def __wake(self) -> None:
+        """
+        Make the waiting iterators check for events and whether watching has finished
+        """
+        with self.__eventsCondition:
+            self.__eventsCondition.notify_all()
+            waiters = list(self.__waiters)
+        for waiter in waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                # The iterator's event loop was closed
+                pass
+
+    def __run(self) -> None:
+        """
+        Scheduler thread: poll the Bulk Requests that are due, in batches
+        """
+        while True:
+            with self.__condition:
+                due = self.__takeDue()
+                while not due and not self.__stopped:
+                    wait = self.__schedule[0][0] - time.monotonic() if self.__schedule else None
+                    self.__condition.wait(wait)
+                    due = self.__takeDue()
+                if self.__stopped:
+                    break
+            try:
+                self.__poll(due)
+            except Exception as ex:
+                log.error(f"BulkRequestWatcher: Error polling Bulk Requests: {ex}")
+                with self.__condition:
+                    for watch in due:
+                        self.__reschedule(watch, changed=False)
+        self.__wake()
+
+    def __takeDue(self) -> list:
+        """
+        Take the due watches off the schedule (up to batchSize).  Must be called with the condition held
+        """
+        now = time.monotonic()
+        due = []
+        while self.__schedule and self.__schedule[0][0] <= now and len(due) < self.batchSize:
+            dueAt, bulkRequestId = heapq.heappop(self.__schedule)
+            watch = self.__watches.get(bulkRequestId)
+            # Skip entries left behind by unwatch
+            if watch is not None and watch.due == dueAt:
+                due.append(watch)
+        return due
+
+    def __poll(self, due: list) -> None:
+        """
+        Fetch the due Bulk Requests, deliver status changes and schedule the next polls
+        """
+        bulkRequests = self.requestHelper.getBulkRequests([watch.bulkRequestId for watch in due], useCache=False)
+        for watch, bulkRequest in zip(due, bulkRequests):
+            if isinstance(bulkRequest, Exception):
+                log.warning(f"BulkRequestWatcher: Error getting Bulk Request {watch.bulkRequestId}: {bulkRequest}")
+                with self.__condition:
+                    self.__reschedule(watch, changed=False)
+                continue
+            previous = watch.bulkRequest
+            if bulkRequest is None or previous is None or bulkRequest.status != previous.status:
+                self.__deliver(BulkRequestStatusChange(watch.bulkRequestId, previous.status if previous is not None else None, bulkRequest))
+            with self.__condition:
+                if bulkRequest is None or bulkRequest.status in TERMINAL_BULK_REQUEST_STATUSES:
+                    self.__watches.pop(watch.bulkRequestId, None)
+                    continue
+                watch.bulkRequest = bulkRequest
+                self.__reschedule(watch, changed=previous is None or bulkRequest.updatedOn != previous.updatedOn)
+        if not self.__watches:
+            self.__wake()
+
+    def __reschedule(self, watch: _Watch, changed: bool) -> None:
+        """
+        Schedule the next poll of a watch.  Must be called with the condition held
+        """
+        if self.__watches.get(watch.bulkRequestId) is not watch:
+            return
+        watch.interval = self.interval if changed else min(self.maxInterval, watch.interval * self.backoff)
+        watch.due = time.monotonic() + watch.interval
+        heapq.heappush(self.__schedule, (watch.due, watch.bulkRequestId))
+
+    def __deliver(self, event: BulkRequestStatusChange) -> None:
+        """
+        Pass an event to onChange and the iterators.  With onChange, events are only kept while the watcher is iterated
+        """
+        with self.__eventsCondition:
+            if self.onChange is None or self.__iterators:
+                self.__events.append(event)
+        self.__wake()
+        if self.onChange is not None:
+            try:
+                self.onChange(event)
+            except Exception as ex:
+                log.error(f"BulkRequestWatcher: Error in onChange for {event.bulkRequestId}: {ex}")
@@ -0,0 +1,331 @@
+from collections import deque
+import logging
+import os
+import threading
+import time
+
+from id_verification_python_requesthelper.encoding import dumps, loads
+
+WRITER_BATCH_SIZE = 100
+WRITER_FLUSH_INTERVAL = 1.0
+WRITER_MAX_QUEUE_SIZE = 10000
+WRITER_FLUSHERS = 2
+
+log = logging.getLogger(__name__)
+
+class WriteFailure:
+    """A buffered Request Data Element write that could not be sent
+
+    Properties:
+        requestId: Request Id
+        dataField: Data Field
+        dataValue: Data Value
+        customerId: Customer Id given with the write (or None)
+        error: Exception returned by createRequestDataElement
+    """
+    __slots__ = ('requestId', 'dataField', 'dataValue', 'customerId', 'error')
+
+    def __init__(self, requestId: str, dataField: str, dataValue: str, customerId: str, error: Exception) -> None:
+        self.requestId = requestId
+        self.dataField = dataField
+        self.dataValue = dataValue
+        self.customerId = customerId
+        self.error = error
+
+    def __str__(self) -> str:
+        stringOutput = f"RequestId: {self.requestId}\n"
+        stringOutput += f"DataField: {self.dataField}\n"
+        stringOutput += f"Error: {self.error}\n"
+        return stringOutput
+
+class RequestDataElementWriter:
+    """RequestDataElementWriter class to create Request Data Elements in the background (write-behind)
+
+    write() only queues the Request Data Element and returns, so the caller's loop never waits
+    for the API, its retries or its rate limits.  Flusher threads take the queued writes in
+    batches, when batchSize writes are waiting or the oldest has waited flushInterval seconds, and
+    create them with createRequestDataElements over the RequestHelper connection pool.
+
+    At most maxQueueSize writes are kept in memory.  When the queue is full, write() waits for
+    room, or with spillPath the writes go to that local file (JSON lines) and are sent from there
+    once the queue has caught up, so memory stays bounded either way.  The spill file is only an
+    overflow buffer: it is overwritten when the writer starts and deleted when it closes (use an
+    IngestionJournal to resume after a crash).
+
+    flush() waits until every write made before it was sent and returns the writes that failed
+    since the last flush() or close() as WriteFailure objects; close() flushes, stops the
+    flushers and does the same.  onError, if given, is also called with each WriteFailure as it
+    happens (on a flusher thread).  If a flusher thread fails (for example on a damaged spill
+    file) the writer stops: flush(), close() and write() raise the error instead of waiting for
+    writes that will never be sent.  Close the writer before the RequestHelper.
+
+    Args:
+        requestHelper: RequestHelper used to create the Request Data Elements
+        batchSize (int): Number of waiting writes that are sent together
+        flushInterval (float): Longest time in seconds a write waits to be sent
+        maxQueueSize (int): Maximum number of writes kept in memory
+        spillPath (str): File taking the writes while the queue is full (None to make write() wait instead)
+        flushers (int): Number of flusher threads (batches sent at the same time)
+        onError: Function called with each WriteFailure
+
+    Returns:
+        RequestDataElementWriter object
+
+    Example:
+        with requestHelper.bufferedWriter(spillPath="writes.spill") as writer:
+            for requestId, dataField, dataValue in rows:
+                writer.write(requestId, dataField, dataValue)
+            failures = writer.flush()
+    """
+    def __init__(self, requestHelper, batchSize: int = WRITER_BATCH_SIZE, flushInterval: float = WRITER_FLUSH_INTERVAL, maxQueueSize: int = WRITER_MAX_QUEUE_SIZE, spillPath: str = None, flushers: int = WRITER_FLUSHERS, onError=None) -> None:
+        self.requestHelper = requestHelper
+        self.batchSize = max(1, batchSize)
+        self.flushInterval = flushInterval
+        self.maxQueueSize = max(self.batchSize, maxQueueSize)
+        self.spillPath = spillPath
+        self.onError = onError
+        self.__lock = threading.Lock()
+        self.__due = threading.Condition(self.__lock)
+        self.__room = threading.Condition(self.__lock)
+        self.__done = threading.Condition(self.__lock)
+        self.__queue = deque()
+        self.__spill = None
+        self.__spilled = 0
+        self.__spillReadOffset = 0
+        self.__written = 0
+        self.__taken = 0
+        self.__flushTarget = 0
+        self.__inFlight = {}
+        self.__sent = 0
+        self.__failedCount = 0
+        self.__failures = []
+        self.__closed = False
+        self.__stopping = False
+        self.__error = None
+        if spillPath is not None:
+            self.__spill = open(spillPath, 'w+b')
+        self.__threads = [threading.Thread(target=self.__run, name=f"RequestDataElementWriter-{index}", daemon=True) for index in range(max(1, flushers))]
+        for thread in self.__threads:
+            thread.start()
+
+    def write(self, requestId: str, dataField: str, dataValue: str, customerId: str = None) -> None:
+        """
+        Queue a Request Data Element to be created in the background
+
+        Parameters:
+            requestId (str): Request Id
+            dataField (str): Data Field
+            dataValue (str): Data Value
+            customerId (str): Customer Id of the Request, used by the rate limiter (optional)
+
+        Raises:
+            ValueError if the writer is closed
+            TypeError if the write cannot be encoded for the spill file
+            The error that stopped the writer, if a flusher thread failed
+        """
+        encoded = None
+        if self.spillPath is not None:
+            # Encoded now, so a write that cannot be spilled fails here instead of on a flusher thread
+            encoded = dumps([requestId, dataField, dataValue, customerId])
+        with self.__lock:
+            if self.__spill is None:
+                while len(self.__queue) >= self.maxQueueSize and not self.__closed and self.__error is None:
+                    self.__room.wait()
+            if self.__error is not None:
+                raise self.__error
+            if self.__closed:
+                raise ValueError("RequestDataElementWriter is closed")
+            self.__written += 1
+            item = (self.__written, requestId, dataField, dataValue, customerId)
+            # Once writes spill, later writes follow them into the file so they are sent in order
+            if self.__spilled == 0 and len(self.__queue) < self.maxQueueSize:
+                self.__queue.append((time.monotonic(), item))
+                if len(self.__queue) == 1 or len(self.__queue) >= self.batchSize:
+                    self.__due.notify()
+            else:
+                self.__spill.seek(0, os.SEEK_END)
+                self.__spill.write(b'[%d,%s\n' % (self.__written, encoded[1:]))
+                self.__spilled += 1
+                self.__due.notify()
+
+    def flush(self) -> list:
+        """
+        Wait until every write made before this call was sent
+
+        Returns:
+            list: WriteFailure for each write that failed since the last flush() or close()
+
+        Raises:
+            The error that stopped the writer, if a flusher thread failed
+        """
+        with self.__lock:
+            target = self.__written
+            if target > self.__flushTarget:
+                self.__flushTarget = target
+                self.__due.notify_all()
+            while not self.__isSent(target):
+                if self.__error is not None:
+                    raise self.__error
+                self.__done.wait()
+            failures = self.__failures
+            self.__failures = []
+        return failures
+
+    def close(self) -> list:
+        """
+        Send every queued write, stop the flusher threads and delete the spill file
+
+        Returns:
+            list: WriteFailure for each write that failed since the last flush()
+
+        Raises:
+            The error that stopped the writer, if a flusher thread failed (the threads are stopped and the spill file deleted first)
+        """
+        with self.__lock:
+            if self.__closed:
+                failures = self.__failures
+                self.__failures = []
+                return failures
+            self.__closed = True
+            self.__room.notify_all()
+        try:
+            failures = self.flush()
+        finally:
+            with self.__lock:
+                self.__stopping = True
+                self.__due.notify_all()
+            for thread in self.__threads:
+                thread.join()
+            if self.__spill is not None:
+                self.__spill.close()
+                os.remove(self.spillPath)
+                self.__spill = None
+        return failures
+
+    def stats(self) -> dict:
+        """
+        Get the counts of the writer
+
+        Returns:
+            dict: written, sent, failed, pending (queued, spilled or being sent), queued and spilled
+        """
+        with self.__lock:
+            return {
+                'written': self.__written,
+                'sent': self.__sent,
+                'failed': self.__failedCount,
+                'pending': self.__written - self.__sent - self.__failedCount,
+                'queued': len(self.__queue),
+                'spilled': self.__spilled,
+            }
+
+    def __enter__(self) -> 'RequestDataElementWriter':
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        failures = self.close()
+        if failures:
+            log.error("RequestDataElementWriter: %d Request Data Elements could not be created, first error: %s", len(failures), failures[0].error)
+
+    def __isSent(self, target: int) -> bool:
+        """
+        Check whether every write up to sequence number target was sent (writes are taken in order)
+        """
+        return self.__taken >= target and all(firstSequence > target for firstSequence in self.__inFlight.values())
+
+    def __isDue(self) -> bool:
+        """
+        Check whether a batch should be sent now
+        """
+        if self.__spilled:
+            return True
+        if not self.__queue:
+            return False
+        return len(self.__queue) >= self.batchSize or self.__stopping or self.__queue[0][1][0] <= self.__flushTarget or time.monotonic() - self.__queue[0][0] >= self.flushInterval
+
+    def __takeBatch(self) -> list:
+        """
+        Take up to batchSize writes, from the queue first and then from the spill file
+        """
+        batch = []
+        while self.__queue and len(batch) < self.batchSize:
+            batch.append(self.__queue.popleft()[1])
+        if batch:
+            self.__room.notify_all()
+        elif self.__spilled:
+            self.__spill.seek(self.__spillReadOffset)
+            while self.__spilled and len(batch) < self.batchSize:
+                batch.append(tuple(loads(self.__spill.readline())))
+                self.__spilled -= 1
+            self.__spillReadOffset = self.__spill.tell()
+            if not self.__spilled:
+                # Everything in the file was taken, start it again from the beginning
+                self.__spill.seek(0)
+                self.__spill.truncate()
+                self.__spillReadOffset = 0
+        self.__taken = batch[-1][0]
+        return batch
+
+    def __run(self) -> None:
+        """
+        Flusher thread: send batches until the writer is closed and nothing is left.  An error stops the writer
+        """
+        try:
+            self.__sendBatches()
+        except Exception as ex:
+            log.exception("RequestDataElementWriter: flusher thread failed, the writer is stopped")
+            with self.__lock:
+                if self.__error is None:
+                    self.__error = ex
+                self.__done.notify_all()
+                self.__room.notify_all()
+                self.__due.notify_all()
+
+    def __sendBatches(self) -> None:
+        """
+        Send batches until the writer is closed and nothing is left, or another flusher thread failed
+        """
+        while True:
+            with self.__lock:
+                while not self.__isDue() or self.__error is not None:
+                    if self.__error is not None or (self.__stopping and not self.__queue and not self.__spilled):
+                        return
+                    timeout = self.flushInterval - (time.monotonic() - self.__queue[0][0]) if self.__queue else None
+                    self.__due.wait(timeout)
+                batch = self.__takeBatch()
+                batchKey = object()
+                self.__inFlight[batchKey] = batch[0][0]
+            failures = self.__send(batch)
+            with self.__lock:
+                del self.__inFlight[batchKey]
+                self.__sent += len(batch) - len(failures)
+                self.__failedCount += len(failures)
+                self.__failures.extend(failures)
+                self.__done.notify_all()
+            if self.onError is not None:
+                for failure in failures:
+                    try:
+                        self.onError(failure)
+                    except Exception:
+                        log.exception("RequestDataElementWriter: onError failed")
+
+    def __send(self, batch: list) -> list:
+        """
+        Create the Request Data Elements of a batch, one createRequestDataElements call per Request
+
+        Returns:
+            list: WriteFailure for each write that failed
+        """
+        byRequest = {}
+        for _, requestId, dataField, dataValue, customerId in batch:
+            byRequest.setdefault((requestId, customerId), []).append((dataField, dataValue))
+        failures = []
+        for (requestId, customerId), dataElements in byRequest.items():
+            try:
+                results = self.requestHelper.createRequestDataElements(requestId, dataElements, customerId=customerId)
+            except Exception as ex:
+                results = [ex] * len(dataElements)
+            for (dataField, dataValue), result in zip(dataElements, results):
+                if isinstance(result, Exception):
+                    failures.append(WriteFailure(requestId, dataField, dataValue, customerId, result))
+        return failures
@@ -0,0 +1,41 @@
+"""Shared fixtures: a local stub of the Request API (benchmark/stub_server.py) and helpers pointed at it"""
+from pathlib import Path
+import sys
+
+import pytest
+
+ROOT_DIRECTORY = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIRECTORY / "src"))
+sys.path.insert(0, str(ROOT_DIRECTORY / "benchmark"))
+
+from id_verification_python_requesthelper import RequestHelper
+
+from request_benchmark import BenchmarkUserHelper
+from stub_server import StubServer, StubSettings
+
+CUSTOMER_ID = "test-customer"
+WORKFLOW_ID = "test-workflow"
+
+@pytest.fixture
+def server():
+    """
+    Stub server answering straight away, without errors (change server.settings to inject them)
+    """
+    with StubServer(0, StubSettings()).start() as stubServer:
+        yield stubServer
+
+@pytest.fixture
+def createHelper(server):
+    """
+    Create RequestHelpers talking to the stub server, closed at the end of the test
+    """
+    helpers = []
+
+    def create(**options) -> RequestHelper:
+        requestHelper = RequestHelper(BenchmarkUserHelper(), apiUrl=server.apiUrl, **options)
+        helpers.append(requestHelper)
+        return requestHelper
+
+    yield create
+    for requestHelper in helpers:
+        requestHelper.close()
@@ -1,4 +1,11 @@
-import importlib
+"""Manual smoke test against the live Request API
+
+Usage:
+    ID_VERIFICATION_USERNAME=... ID_VERIFICATION_PASSWORD=... python test/test.py
+
+Nothing runs when the module is imported, and the credentials are only read from the environment.
+The automated tests (test_*.py) use the local stub server instead.
+"""
 import os
 from pathlib import Path
 import sys
@@ -6,33 +13,38 @@ import sys
 file_dir = os.path.dirname(os.path.abspath(__file__))
 current_dir = Path(file_dir)
 parent_dir = current_dir.parent
-module_dir = parent_dir / "src" / "id_verification_python_requesthelper"
-
-print(f"File Directory: {file_dir}")
-print(f"Parent Directory: {parent_dir}")
-print(f"Module Directory: {module_dir}")
 
-sys.path.append(str(module_dir))
+sys.path.insert(0, str(parent_dir / "src"))
 
 from id_verification_python_requesthelper import RequestHelper
-
-#idModule = importlib.import_module('id_verification_python_requesthelper', package=module_dir) 
-#example_module = importlib.import_module('RequestHelper', package=module_dir)
-#from ..src.id_verification_python_requesthelper.id_verification_python_requesthelper import RequestHelper
 from id_verification_python_userhelper import UserHelper
 
-userhelper: UserHelper = UserHelper("werebear73","workFl@bread73")
+def main() -> int:
+    username = os.environ.get("ID_VERIFICATION_USERNAME")
+    password = os.environ.get("ID_VERIFICATION_PASSWORD")
+    if not username or not password:
+        print("Set ID_VERIFICATION_USERNAME and ID_VERIFICATION_PASSWORD to run the smoke test", file=sys.stderr)
+        return 2
+
+    userhelper: UserHelper = UserHelper(username, password)
+
+    requesthelper: RequestHelper = RequestHelper(userhelper)
 
-requesthelper: RequestHelper = RequestHelper(userhelper)
+    try:
+        bulkRequests = requesthelper.getBulkRequest("669b7fb6-9f8c-46df-b0d6-89203f1ddd0b")
 
-bulkRequests = requesthelper.getBulkRequest("669b7fb6-9f8c-46df-b0d6-89203f1ddd0b")
+        print(f"Bulk Request: {bulkRequests}")
 
-print(f"Bulk Request: {bulkRequests}")
+        exists = requesthelper.checkBulkRequestFileExists("f21ffc01-4485-4015-abb9-21c100c8d294","e11ffc01-4485-4015-abb9-21c100c8d200","myfile.txt")
 
-exists = requesthelper.checkBulkRequestFileExists("f21ffc01-4485-4015-abb9-21c100c8d294","e11ffc01-4485-4015-abb9-21c100c8d200","myfile.txt")
+        print(f"Exists: {exists}")
 
-print(f"Exists: {exists}")
+        bulkRequest = requesthelper.createBulkRequest("669b7fb6-9f8c-46df-b0d6-89203f1ddd0b","669b7fb6-9f8c-46df-b0d6-89203f1ddd0b")
 
-bulkRequest = requesthelper.createBulkRequest("669b7fb6-9f8c-46df-b0d6-89203f1ddd0b","669b7fb6-9f8c-46df-b0d6-89203f1ddd0b")
+        print(f"Bulk Request: {bulkRequest}")
+    finally:
+        requesthelper.close()
+    return 0
 
-print(f"Bulk Request: {bulkRequest}")
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""AsyncRequestHelper against the stub server"""
+import asyncio
+import time
+
+import httpx
+
+from id_verification_python_requesthelper.async_request_helper import AsyncRequestHelper
+from id_verification_python_requesthelper.metrics import IN_FLIGHT, CallbackMetrics
+from id_verification_python_requesthelper.retry import RetryPolicy
+
+from request_benchmark import BenchmarkUserHelper
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+def createAsyncHelper(server, **options) -> AsyncRequestHelper:
+    return AsyncRequestHelper(BenchmarkUserHelper(), apiUrl=server.apiUrl, **options)
+
+def test_bulk_request_round_trip(server):
+    async def run():
+        async with createAsyncHelper(server) as requestHelper:
+            bulkRequest = await requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+            results = await requestHelper.createBulkRequestDataElements(bulkRequest.bulkRequestId, [("Field", f"value {index}") for index in range(20)])
+            read = await requestHelper.getBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId)
+            streamed = [dataElement async for dataElement in requestHelper.iterBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId, chunkSize=64)]
+            return bulkRequest, results, read, streamed, await requestHelper.getBulkRequest(bulkRequest.bulkRequestId), await requestHelper.getBulkRequest("missing")
+
+    bulkRequest, results, read, streamed, fetched, missing = asyncio.run(run())
+    assert [result.DataValue for result in results] == [f"value {index}" for index in range(20)]
+    assert sorted(dataElement.DataValue for dataElement in read) == sorted(dataElement.DataValue for dataElement in streamed) == sorted(f"value {index}" for index in range(20))
+    assert fetched.bulkRequestId == bulkRequest.bulkRequestId
+    assert missing is None
+
+def test_request_and_file_checks(server):
+    async def run():
+        async with createAsyncHelper(server) as requestHelper:
+            request = await requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+            results = await requestHelper.createRequestDataElements(request.requestId, {'FirstName': "Ada", 'LastName': "Lovelace"}, customerId=CUSTOMER_ID)
+            exists = await requestHelper.checkBulkRequestFilesExist(CUSTOMER_ID, WORKFLOW_ID, ["a.csv", "b.csv", "a.csv"])
+            return request, results, exists
+
+    request, results, exists = asyncio.run(run())
+    assert [result.DataField for result in results] == ['FirstName', 'LastName']
+    assert server.store.requestDataElements[request.requestId][1]['dataValue'] == "Lovelace"
+    assert exists == {"a.csv": False, "b.csv": False}
+
+def test_calls_in_flight_are_capped(server):
+    server.settings = StubSettings(latency=0.05)
+    inFlight = []
+    metrics = CallbackMetrics(lambda kind, name, value, labels: inFlight.append(value) if name == IN_FLIGHT else None)
+
+    async def run():
+        async with createAsyncHelper(server, maxConcurrency=2, metrics=metrics) as requestHelper:
+            return await asyncio.gather(*[requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID) for _ in range(6)])
+
+    started = time.monotonic()
+    requests = asyncio.run(run())
+    assert not any(isinstance(request, Exception) for request in requests)
+    assert max(inFlight) == 2
+    # Three rounds of two calls
+    assert time.monotonic() - started >= 3 * 0.05
+
+def test_calls_without_an_answer_return_the_error(server):
+    server.settings = StubSettings(dropRate=1.0)
+
+    async def run():
+        async with createAsyncHelper(server, retryPolicy=RetryPolicy(maxRetries=1, baseDelay=0.001, jitter=False, budget=False)) as requestHelper:
+            return await requestHelper.getBulkRequest("missing"), await requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+
+    for result in asyncio.run(run()):
+        assert isinstance(result, Exception)
+        assert isinstance(result.__cause__, httpx.TransportError)
@@ -0,0 +1,51 @@
+"""The batch methods of RequestHelper (concurrent calls over the shared pool) against the stub server"""
+import json
+
+import requests
+
+from id_verification_python_requesthelper.retry import RetryPolicy
+from id_verification_python_requesthelper.transport import RequestsTransport
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+class FailingTransport(RequestsTransport):
+    """RequestsTransport that loses the connection on the create calls for failField"""
+    failField = None
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        if 'DataElement/Create' in url and json.loads(data)['dataField'] == self.failField:
+            raise requests.exceptions.ConnectionError("Connection lost")
+        return super().request(method, url, headers, data, timeout, stream)
+
+def test_bulk_request_data_elements_come_back_in_input_order(server, createHelper):
+    requestHelper = createHelper(maxWorkers=4)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    dataElements = [(f"Field {index % 3}", f"value {index}") for index in range(40)]
+    results = requestHelper.createBulkRequestDataElements(bulkRequest.bulkRequestId, dataElements, maxWorkers=8)
+    assert [(result.DataField, result.DataValue) for result in results] == dataElements
+    assert len(server.store.bulkRequestDataElements[bulkRequest.bulkRequestId]) == 40
+
+def test_failed_item_is_returned_in_its_place(server, createHelper):
+    transport = FailingTransport()
+    transport.failField = "LastName"
+    requestHelper = createHelper(transport=transport, retryPolicy=RetryPolicy(maxRetries=0, budget=False))
+    request = requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+    results = requestHelper.createRequestDataElements(request.requestId, {'FirstName': "Ada", 'LastName': "Lovelace", 'DateOfBirth': "1815-12-10"})
+    assert [result.DataField for result in (results[0], results[2])] == ['FirstName', 'DateOfBirth']
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[1].__cause__, requests.exceptions.ConnectionError)
+
+def test_get_bulk_requests_keeps_order_and_not_found(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequestIds = [requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID).bulkRequestId for _ in range(5)]
+    bulkRequests = requestHelper.getBulkRequests(bulkRequestIds[:2] + ["missing"] + bulkRequestIds[2:])
+    assert [bulkRequest.bulkRequestId if bulkRequest is not None else None for bulkRequest in bulkRequests] == bulkRequestIds[:2] + [None] + bulkRequestIds[2:]
+
+def test_file_checks_are_made_once_per_filename(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    requestHelper.createBulkRequestDataElement(bulkRequest.bulkRequestId, "Filename", "used.csv")
+    calls = server.store.calls
+    exists = requestHelper.checkBulkRequestFilesExist(CUSTOMER_ID, WORKFLOW_ID, ["used.csv", "new.csv", "used.csv", "new.csv"])
+    assert exists == {"used.csv": True, "new.csv": False}
+    assert server.store.calls == calls + 2
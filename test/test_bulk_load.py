@@ -0,0 +1,73 @@
+"""idv-bulk-load: splitting a bulk file into parts, checkpoints, and loading the parts against the stub server"""
+import queue
+
+import pytest
+
+from id_verification_python_requesthelper import RequestHelper, bulk_load
+from id_verification_python_requesthelper.bulk_load import Checkpoint, _loadShard, _readPart, _splitFile, _startBulkRequest
+
+from request_benchmark import BenchmarkUserHelper
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+ROWS = [{'FirstName': f'Zoë {index}', 'Address': f'{index} "Main" St\nÅrhus'} for index in range(50)]
+
+def writeFile(tmp_path) -> str:
+    path = tmp_path / "identities.csv"
+    lines = ['FirstName,Address\r\n'] + [f'{row["FirstName"]},"{row["Address"].replace(chr(34), chr(34) * 2)}"\r\n' for row in ROWS]
+    path.write_bytes(('﻿' + ''.join(lines)).encode('utf-8'))
+    return str(path)
+
+@pytest.mark.parametrize('parts', [1, 3, 7, 100])
+def test_parts_hold_every_row_once(tmp_path, parts):
+    path = writeFile(tmp_path)
+    cuts = _splitFile(path, parts)
+    assert len(cuts) == min(parts, len(ROWS))
+    rows = []
+    for offset, firstRowNumber, count in cuts:
+        assert firstRowNumber == len(rows) + 1
+        # Each worker process opens the file for its own part
+        with open(path, 'rb') as file:
+            file.seek(offset)
+            rows.extend(_readPart(file, ['FirstName', 'Address'], count))
+    assert rows == ROWS
+
+def test_checkpoint_keeps_row_ranges(tmp_path):
+    path = str(tmp_path / "load.checkpoint")
+    checkpoint = Checkpoint(path, "identities.csv", CUSTOMER_ID, WORKFLOW_ID)
+    assert not checkpoint.load()
+    checkpoint.bulkRequestId = "bulk"
+    checkpoint.completedRows = {1, 2, 3, 7, 9, 10}
+    checkpoint.save()
+    with open(path) as checkpointFile:
+        assert '"completedRows": [[1, 3], [7, 7], [9, 10]]' in checkpointFile.read()
+    resumed = Checkpoint(path, "identities.csv", CUSTOMER_ID, WORKFLOW_ID)
+    assert resumed.load()
+    assert (resumed.bulkRequestId, resumed.completedRows) == ("bulk", {1, 2, 3, 7, 9, 10})
+    with pytest.raises(ValueError):
+        Checkpoint(path, "identities.csv", "another-customer", WORKFLOW_ID).load()
+
+def test_parts_load_only_the_missing_rows(server, tmp_path, monkeypatch):
+    # Each worker process would sign in with the username and password, here they all use the stub server
+    monkeypatch.setattr(bulk_load, '_createRequestHelper', lambda settings: RequestHelper(BenchmarkUserHelper(), apiUrl=server.apiUrl))
+    path = writeFile(tmp_path)
+    settings = {'file': path, 'customerId': CUSTOMER_ID, 'workflowId': WORKFLOW_ID, 'workers': 4, 'checkFileExists': True, 'journal': None, 'logLevel': 'WARNING'}
+    checkpoint = Checkpoint(str(tmp_path / "load.checkpoint"), path, CUSTOMER_ID, WORKFLOW_ID)
+    _startBulkRequest(settings, checkpoint, None)
+    assert checkpoint.bulkRequestId in server.store.bulkRequests
+    # Rows loaded by an earlier run
+    completedRows = set(range(1, len(ROWS) + 1, 3))
+    settings = dict(settings, bulkRequestId=checkpoint.bulkRequestId, fieldnames=['FirstName', 'Address'])
+    results = queue.Queue()
+    for shard, part in enumerate(_splitFile(path, 3)):
+        _loadShard(settings, shard, part, completedRows, results)
+    loaded = []
+    while not results.empty():
+        kind, value, *rest = results.get()
+        assert kind != 'error', rest
+        if kind == 'row':
+            assert rest[0], rest[2]
+            loaded.append(value)
+    assert sorted(loaded) == [row for row in range(1, len(ROWS) + 1) if row not in completedRows]
+    assert sorted(dataElement['dataValue'] for requestId in server.store.requests for dataElement in server.store.requestDataElements[requestId] if dataElement['dataField'] == 'FirstName') == sorted(ROWS[row - 1]['FirstName'] for row in loaded)
+    assert all(request['bulkRequestId'] == checkpoint.bulkRequestId for request in server.store.requests.values())
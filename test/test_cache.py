@@ -0,0 +1,100 @@
+"""ResponseCache, and the getBulkRequest / checkBulkRequestFileExists caching of RequestHelper against the stub server"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from id_verification_python_requesthelper.cache import ResponseCache
+from id_verification_python_requesthelper.transport import RequestsTransport
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+class HoldingTransport(RequestsTransport):
+    """RequestsTransport that holds the replies to getBulkRequest until release is set (while hold is True)"""
+    hold = False
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.received = threading.Event()
+        self.release = threading.Event()
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        response = super().request(method, url, headers, data, timeout, stream)
+        if self.hold and '/BulkRequest/GetBulkRequestByBulkRequestId?' in url:
+            self.received.set()
+            self.release.wait(5)
+        return response
+
+def test_entries_expire():
+    cache = ResponseCache(ttl=0)
+    cache.put(('key',), 'value')
+    assert cache.lookup(('key',)) == (False, None)
+    assert cache.stats()['expirations'] == 1
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(maxSize=2)
+    cache.put(('a',), 1)
+    cache.put(('b',), 2)
+    cache.lookup(('a',))
+    cache.put(('c',), 3)
+    assert cache.lookup(('b',)) == (False, None)
+    assert cache.lookup(('a',)) == (True, 1)
+    assert cache.stats()['evictions'] == 1
+
+def test_put_after_invalidation_is_dropped():
+    cache = ResponseCache()
+    version = cache.version()
+    cache.invalidate(('a',))
+    cache.put(('a',), 'stale', version=version)
+    cache.put(('b',), 'fresh', version=version)
+    assert cache.lookup(('a',)) == (False, None)
+    assert cache.lookup(('b',)) == (True, 'fresh')
+    cache.put(('a',), 'fresh', version=cache.version())
+    assert cache.lookup(('a',)) == (True, 'fresh')
+
+def test_invalidate_where_drops_every_put_in_flight():
+    cache = ResponseCache()
+    version = cache.version()
+    assert cache.invalidateWhere(lambda key, value: False) == 0
+    cache.put(('a',), 'stale', version=version)
+    assert cache.lookup(('a',)) == (False, None)
+
+def test_dropped_invalidation_records_still_drop_older_puts():
+    cache = ResponseCache(maxSize=1)
+    version = cache.version()
+    cache.invalidate(('a',))
+    cache.invalidate(('b',))
+    cache.put(('a',), 'stale', version=version)
+    assert cache.lookup(('a',)) == (False, None)
+
+def test_cached_bulk_request_is_not_read_again(server, createHelper):
+    requestHelper = createHelper(cache=True)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    calls = server.store.calls
+    assert requestHelper.getBulkRequest(bulkRequest.bulkRequestId).bulkRequestId == bulkRequest.bulkRequestId
+    assert requestHelper.getBulkRequest("missing") is None
+    assert requestHelper.getBulkRequest("missing") is None
+    assert server.store.calls == calls + 1
+    requestHelper.getBulkRequest(bulkRequest.bulkRequestId, useCache=False)
+    assert server.store.calls == calls + 2
+
+def test_write_drops_cached_file_checks(server, createHelper):
+    requestHelper = createHelper(cache=True)
+    assert requestHelper.checkBulkRequestFileExists(CUSTOMER_ID, WORKFLOW_ID, "identities.csv") is False
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    requestHelper.createBulkRequestDataElement(bulkRequest.bulkRequestId, "Filename", "identities.csv")
+    assert requestHelper.checkBulkRequestFileExists(CUSTOMER_ID, WORKFLOW_ID, "identities.csv") is True
+
+def test_read_in_flight_during_write_is_not_cached(server, createHelper):
+    transport = HoldingTransport()
+    requestHelper = createHelper(cache=True, transport=transport)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    transport.hold = True
+    with ThreadPoolExecutor(1) as executor:
+        read = executor.submit(requestHelper.getBulkRequest, bulkRequest.bulkRequestId, False)
+        assert transport.received.wait(5)
+        transport.hold = False
+        requestHelper.createBulkRequestDataElement(bulkRequest.bulkRequestId, "Field", "written during the read")
+        transport.release.set()
+        assert read.result().bulkRequestId == bulkRequest.bulkRequestId
+    calls = server.store.calls
+    requestHelper.getBulkRequest(bulkRequest.bulkRequestId)
+    assert server.store.calls == calls + 1
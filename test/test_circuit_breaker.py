@@ -0,0 +1,107 @@
+"""Circuit breaker state transitions, on their own and through RequestHelper against the stub server"""
+import time
+
+import pytest
+
+from id_verification_python_requesthelper.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, CircuitState
+from id_verification_python_requesthelper.retry import RetryPolicy
+from id_verification_python_requesthelper.transport import RequestsTransport
+
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+ENDPOINT = '/BulkRequest/GetBulkRequestByBulkRequestId'
+RESET_TIMEOUT = 0.2
+
+class Interrupted(BaseException):
+    """Stands in for KeyboardInterrupt or a cancelled task in the middle of a call"""
+
+class InterruptingTransport(RequestsTransport):
+    """RequestsTransport that raises Interrupted instead of sending the next interrupt calls"""
+    interrupt = 0
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        if self.interrupt:
+            self.interrupt -= 1
+            raise Interrupted()
+        return super().request(method, url, headers, data, timeout, stream)
+
+def createBreakers() -> CircuitBreakerRegistry:
+    return CircuitBreakerRegistry(minimumCalls=4, windowSize=4, resetTimeout=RESET_TIMEOUT, halfOpenCalls=1)
+
+def openBreaker(server, requestHelper, breakers: CircuitBreakerRegistry) -> None:
+    server.settings = StubSettings(errorRate=1.0)
+    for _ in range(4):
+        requestHelper.getBulkRequest("missing")
+    assert breakers.get(ENDPOINT).state == CircuitState.Open
+
+def test_breaker_opens_on_failure_rate():
+    breaker = CircuitBreaker(ENDPOINT, failureRate=0.5, minimumCalls=4, windowSize=4, resetTimeout=RESET_TIMEOUT)
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.recordFailure() if failed else breaker.recordSuccess()
+    assert breaker.state == CircuitState.Closed
+    assert breaker.allow()
+    breaker.recordFailure()
+    assert breaker.state == CircuitState.Open
+    assert not breaker.allow()
+    assert 0 < breaker.retryIn() <= RESET_TIMEOUT
+
+def test_half_open_limits_trial_calls():
+    breaker = CircuitBreaker(ENDPOINT, minimumCalls=1, windowSize=1, resetTimeout=0, halfOpenCalls=2)
+    breaker.allow()
+    breaker.recordFailure()
+    assert breaker.state == CircuitState.HalfOpen
+    assert breaker.allow()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+def test_open_breaker_refuses_calls(server, createHelper):
+    breakers = createBreakers()
+    requestHelper = createHelper(circuitBreakers=breakers, retryPolicy=RetryPolicy(maxRetries=0, budget=False), cache=False)
+    openBreaker(server, requestHelper, breakers)
+    calls = server.store.calls
+    error = requestHelper.getBulkRequest("missing")
+    assert isinstance(error.__cause__, CircuitOpenError)
+    assert error.__cause__.endpoint == ENDPOINT
+    assert server.store.calls == calls
+    # Only the failing endpoint is refused
+    assert not isinstance(requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID), CircuitOpenError)
+
+def test_trial_call_closes_breaker(server, createHelper):
+    breakers = createBreakers()
+    requestHelper = createHelper(circuitBreakers=breakers, retryPolicy=RetryPolicy(maxRetries=0, budget=False), cache=False)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    openBreaker(server, requestHelper, breakers)
+    time.sleep(RESET_TIMEOUT)
+    assert breakers.get(ENDPOINT).state == CircuitState.HalfOpen
+    server.settings = StubSettings()
+    assert requestHelper.getBulkRequest(bulkRequest.bulkRequestId).bulkRequestId == bulkRequest.bulkRequestId
+    assert breakers.get(ENDPOINT).state == CircuitState.Closed
+
+def test_failed_trial_call_reopens_breaker(server, createHelper):
+    breakers = createBreakers()
+    requestHelper = createHelper(circuitBreakers=breakers, retryPolicy=RetryPolicy(maxRetries=0, budget=False), cache=False)
+    openBreaker(server, requestHelper, breakers)
+    time.sleep(RESET_TIMEOUT)
+    requestHelper.getBulkRequest("missing")
+    assert breakers.get(ENDPOINT).state == CircuitState.Open
+    assert isinstance(requestHelper.getBulkRequest("missing").__cause__, CircuitOpenError)
+
+def test_interrupted_trial_call_is_given_back(server, createHelper):
+    breakers = createBreakers()
+    transport = InterruptingTransport()
+    requestHelper = createHelper(circuitBreakers=breakers, retryPolicy=RetryPolicy(maxRetries=0, budget=False), cache=False, transport=transport)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    openBreaker(server, requestHelper, breakers)
+    time.sleep(RESET_TIMEOUT)
+    server.settings = StubSettings()
+    transport.interrupt = 1
+    with pytest.raises(Interrupted):
+        requestHelper.getBulkRequest(bulkRequest.bulkRequestId)
+    assert breakers.get(ENDPOINT).state == CircuitState.HalfOpen
+    assert requestHelper.getBulkRequest(bulkRequest.bulkRequestId).bulkRequestId == bulkRequest.bulkRequestId
+    assert breakers.get(ENDPOINT).state == CircuitState.Closed
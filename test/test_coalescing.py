@@ -0,0 +1,71 @@
+"""Single-flight read coalescing, and reads started after a write not joining the read in flight"""
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+ELEMENTS = 50
+# Slow enough that the reply to a read of ELEMENTS Data Elements takes about half a second to transfer
+BANDWIDTH = 20000
+
+def createBulkRequest(requestHelper) -> str:
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    results = requestHelper.createBulkRequestDataElements(bulkRequest.bulkRequestId, [("Field", f"value {index}") for index in range(ELEMENTS)])
+    assert not any(isinstance(result, Exception) for result in results)
+    return bulkRequest.bulkRequestId
+
+def startRead(server, executor, requestHelper, bulkRequestId: str):
+    """
+    Start a read on another thread and wait until the stub has taken its answer
+    """
+    calls = server.store.calls
+    future = executor.submit(requestHelper.getBulkRequestDataElementsByBulkRequestId, bulkRequestId)
+    deadline = time.monotonic() + 5
+    while server.store.calls == calls:
+        assert time.monotonic() < deadline, "the read never reached the stub server"
+        time.sleep(0.005)
+    time.sleep(0.05)
+    return future
+
+def test_concurrent_reads_share_one_call(server, createHelper):
+    requestHelper = createHelper(coalesce=True)
+    bulkRequestId = createBulkRequest(requestHelper)
+    server.settings = StubSettings(bandwidth=BANDWIDTH)
+    calls = server.store.calls
+    with ThreadPoolExecutor(2) as executor:
+        first = startRead(server, executor, requestHelper, bulkRequestId)
+        second = executor.submit(requestHelper.getBulkRequestDataElementsByBulkRequestId, bulkRequestId)
+        assert len(first.result()) == ELEMENTS
+        assert len(second.result()) == ELEMENTS
+    assert server.store.calls == calls + 1
+    assert requestHelper.coalescingStats() == {'calls': 1, 'coalesced': 1, 'inFlight': 0}
+    # Every caller gets its own list
+    assert first.result() is not second.result()
+
+def test_read_after_write_does_not_join_read_in_flight(server, createHelper):
+    requestHelper = createHelper(coalesce=True)
+    bulkRequestId = createBulkRequest(requestHelper)
+    server.settings = StubSettings(bandwidth=BANDWIDTH)
+    with ThreadPoolExecutor(1) as executor:
+        first = startRead(server, executor, requestHelper, bulkRequestId)
+        dataElement = requestHelper.createBulkRequestDataElement(bulkRequestId, "Field", "written during the read")
+        assert not first.done()
+        second = requestHelper.getBulkRequestDataElementsByBulkRequestId(bulkRequestId)
+        assert len(first.result()) == ELEMENTS
+    assert len(second) == ELEMENTS + 1
+    assert dataElement.BulkRequestDataElementId in {element.BulkRequestDataElementId for element in second}
+    assert requestHelper.coalescingStats() == {'calls': 2, 'coalesced': 0, 'inFlight': 0}
+
+def test_uncoalesced_helper_makes_every_call(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequestId = createBulkRequest(requestHelper)
+    server.settings = StubSettings(bandwidth=BANDWIDTH)
+    calls = server.store.calls
+    with ThreadPoolExecutor(2) as executor:
+        first = startRead(server, executor, requestHelper, bulkRequestId)
+        second = executor.submit(requestHelper.getBulkRequestDataElementsByBulkRequestId, bulkRequestId)
+        assert len(first.result()) == len(second.result()) == ELEMENTS
+    assert server.store.calls == calls + 2
+    assert requestHelper.coalescingStats() is None
@@ -0,0 +1,64 @@
+"""Compressed transfer and its byte counting (transferStats) against the stub server"""
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+ELEMENTS = 500
+VALUE = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 150
+
+def readDelta(server, requestHelper, encodings: tuple) -> tuple:
+    """
+    Read a Bulk Request of ELEMENTS Data Elements with the stub answering with encodings
+
+    Returns:
+        tuple: (Data Elements read, transferStats of the read)
+    """
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    results = requestHelper.createBulkRequestDataElements(bulkRequest.bulkRequestId, [("Field", f"value {index}") for index in range(ELEMENTS)])
+    assert not any(isinstance(result, Exception) for result in results)
+    server.settings = StubSettings(encodings=encodings)
+    before = requestHelper.transferStats()
+    dataElements = requestHelper.getBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId)
+    after = requestHelper.transferStats()
+    return dataElements, {name: after[name] - before[name] for name in ('bytesReceived', 'wireBytesReceived', 'decodeSeconds')}
+
+def test_uncompressed_reply_counts_the_same_bytes(server, createHelper):
+    dataElements, delta = readDelta(server, createHelper(compression=True), ())
+    assert len(dataElements) == ELEMENTS
+    assert delta['bytesReceived'] > 0
+    assert delta['wireBytesReceived'] == delta['bytesReceived']
+    assert delta['decodeSeconds'] == 0
+
+def test_gzip_reply_counts_wire_and_decoded_bytes(server, createHelper):
+    dataElements, delta = readDelta(server, createHelper(compression=True), ('gzip',))
+    assert len(dataElements) == ELEMENTS
+    assert {dataElement.DataValue for dataElement in dataElements} == {f"value {index}" for index in range(ELEMENTS)}
+    assert 0 < delta['wireBytesReceived'] < delta['bytesReceived'] / 4
+    assert delta['decodeSeconds'] > 0
+
+def test_ratio_is_decoded_bytes_per_wire_byte(server, createHelper):
+    requestHelper = createHelper(compression=True)
+    readDelta(server, requestHelper, ('gzip',))
+    stats = requestHelper.transferStats()
+    assert stats['ratio'] == stats['bytesReceived'] / stats['wireBytesReceived']
+    assert stats['ratio'] > 1
+
+def test_compressed_request_counts_wire_and_sent_bytes(server, createHelper):
+    requestHelper = createHelper(compressRequests=True)
+    request = requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+    before = requestHelper.transferStats()
+    dataElement = requestHelper.createRequestDataElement(request.requestId, "Notes", VALUE)
+    after = requestHelper.transferStats()
+    assert dataElement.DataValue == VALUE
+    assert server.store.requestDataElements[request.requestId][0]['dataValue'] == VALUE
+    bytesSent = after['bytesSent'] - before['bytesSent']
+    wireBytesSent = after['wireBytesSent'] - before['wireBytesSent']
+    assert bytesSent > len(VALUE)
+    assert 0 < wireBytesSent < bytesSent / 4
+
+def test_small_request_is_sent_uncompressed(server, createHelper):
+    requestHelper = createHelper(compressRequests=True)
+    before = requestHelper.transferStats()
+    requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    after = requestHelper.transferStats()
+    assert after['wireBytesSent'] - before['wireBytesSent'] == after['bytesSent'] - before['bytesSent'] > 0
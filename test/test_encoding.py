@@ -0,0 +1,74 @@
+"""Request body encoding and the streaming JSON array reader"""
+import json
+
+import pytest
+
+from id_verification_python_requesthelper.encoding import JsonArrayReader, dumps, encodeBulkRequestDataElements, encodeRequestDataElements, requestDataElementBody
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+VALUES = [
+    'plain',
+    'say "hello"',
+    'C:\\path\\to\\file',
+    'tab\tnew line\ncarriage return\r',
+    'bell \x07 null \x00 escape \x1b',
+    'café ünïcödé 日本語 🙂',
+    '</script>',
+    '',
+]
+
+def readAll(document: bytes, chunkSize: int) -> list:
+    reader = JsonArrayReader('bulkRequestDataElement')
+    records = []
+    for start in range(0, len(document), chunkSize):
+        records.extend(reader.feed(document[start:start + chunkSize]))
+    reader.close()
+    return records
+
+def test_bulk_request_data_element_bodies_escape_values():
+    bodies = encodeBulkRequestDataElements('bulk "1"', [(f'field {index} "\\', value) for index, value in enumerate(VALUES)])
+    assert [dataField for dataField, body in bodies] == [f'field {index} "\\' for index in range(len(VALUES))]
+    for index, (dataField, body) in enumerate(bodies):
+        assert json.loads(body) == {'bulkRequestId': 'bulk "1"', 'dataField': dataField, 'dataValue': VALUES[index]}
+
+def test_request_data_element_bodies_escape_values():
+    bodies = encodeRequestDataElements('request\\1', {f'field {index}': value for index, value in enumerate(VALUES)})
+    for index, (dataField, body) in enumerate(bodies):
+        assert body == requestDataElementBody('request\\1', dataField, VALUES[index])
+        assert json.loads(body)['dataValue'] == VALUES[index]
+
+def test_non_string_values_are_sent_as_strings():
+    bodies = encodeBulkRequestDataElements('bulk', [('Age', 42), ('Missing', None)])
+    assert json.loads(bodies[0][1])['dataValue'] == '42'
+    assert json.loads(bodies[1][1])['dataValue'] is None
+
+def test_escaped_values_survive_the_api(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    results = requestHelper.createBulkRequestDataElements(bulkRequest.bulkRequestId, [('Value', value) for value in VALUES])
+    assert [result.DataValue for result in results] == VALUES
+    assert sorted(dataElement.DataValue for dataElement in requestHelper.getBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId)) == sorted(VALUES)
+
+def test_dumps_is_compact_utf8():
+    assert dumps({'a': ['é', 1, None]}) == '{"a":["é",1,null]}'.encode()
+
+@pytest.mark.parametrize('chunkSize', [1, 2, 3, 7, 64, 100000])
+def test_reader_decodes_every_split(chunkSize):
+    records = [{'dataValue': value, 'index': index} for index, value in enumerate(VALUES)]
+    document = json.dumps({'other': [1, 2], 'bulkRequestDataElement': records, 'after': True}, ensure_ascii=False).encode()
+    assert readAll(document, chunkSize) == records
+
+@pytest.mark.parametrize('document', [b'{"bulkRequestDataElement":null}', b'{"bulkRequestDataElement" : null, "other": 1}', b'{}', b'{"other":[1,2]}'])
+def test_reader_treats_null_or_missing_array_as_empty(document):
+    assert readAll(document, 3) == []
+
+def test_reader_reads_empty_array():
+    assert readAll(b'{"bulkRequestDataElement":[ ]}', 1) == []
+
+@pytest.mark.parametrize('document', [b'{"bulkRequestDataElement":[{"a":1},', b'{"bulkRequestDataElement":[{"a":1}', b'{"bulkRequestDataElement":nu', b'', b'[1, 2]'])
+def test_reader_rejects_truncated_documents(document):
+    reader = JsonArrayReader('bulkRequestDataElement')
+    reader.feed(document)
+    with pytest.raises(ValueError):
+        reader.close()
@@ -0,0 +1,23 @@
+"""Bulk file ingestion (ingestBulkFile) of CSV files against the stub server"""
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+def ingestedRows(server) -> list:
+    """
+    Get the Data Field to Data Value of each Request the stub server holds
+    """
+    return [{dataElement['dataField']: dataElement['dataValue'] for dataElement in server.store.requestDataElements[requestId]} for requestId in server.store.requests]
+
+def test_utf8_file_with_byte_order_mark(server, createHelper, tmp_path):
+    path = tmp_path / "identities.csv"
+    path.write_bytes('﻿FirstName,LastName\r\nJosé,Müller\r\n"Zoë ""Z""",日本\r\n'.encode('utf-8'))
+    results = list(createHelper().ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, str(path)))
+    assert all(result.succeeded for result in results)
+    assert sorted(ingestedRows(server), key=lambda row: row['FirstName']) == [{'FirstName': 'José', 'LastName': 'Müller'}, {'FirstName': 'Zoë "Z"', 'LastName': '日本'}]
+
+def test_row_with_extra_values_fails(server, createHelper, tmp_path):
+    path = tmp_path / "identities.csv"
+    path.write_text('FirstName,LastName\nAda,Lovelace\nAlan,Turing,extra\n', encoding='utf-8')
+    results = {result.rowNumber: result for result in createHelper().ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, str(path))}
+    assert results[1].succeeded
+    assert isinstance(results[2].error, ValueError)
+    assert ingestedRows(server) == [{'FirstName': 'Ada', 'LastName': 'Lovelace'}]
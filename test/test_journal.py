@@ -0,0 +1,103 @@
+"""Resuming a journaled bulk file ingestion against the stub server"""
+import csv
+import json
+
+import requests
+
+from id_verification_python_requesthelper.journal import IngestionJournal
+from id_verification_python_requesthelper.retry import RetryPolicy
+from id_verification_python_requesthelper.transport import RequestsTransport
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+ROWS = 10
+FIELDS = ('FirstName', 'LastName', 'DateOfBirth')
+
+class FailingTransport(RequestsTransport):
+    """RequestsTransport that loses the connection on the Request Data Element calls for failField"""
+    failField = None
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        if self.failField is not None and '/RequestDataElement/CreateRequestDataElement?' in url and json.loads(data)['dataField'] == self.failField:
+            raise requests.exceptions.ConnectionError("Connection lost")
+        return super().request(method, url, headers, data, timeout, stream)
+
+def writeFile(tmp_path) -> str:
+    path = tmp_path / "identities.csv"
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        for index in range(ROWS):
+            writer.writerow({'FirstName': f"First {index}", 'LastName': f"Last {index}", 'DateOfBirth': f"2000-01-{index + 1:02}"})
+    return str(path)
+
+def assertEveryRowOnce(server) -> None:
+    assert len(server.store.bulkRequests) == 1
+    bulkRequestId = next(iter(server.store.bulkRequests))
+    assert len(server.store.requests) == ROWS
+    for requestId, request in server.store.requests.items():
+        assert request['bulkRequestId'] == bulkRequestId
+        assert sorted(dataElement['dataField'] for dataElement in server.store.requestDataElements[requestId]) == sorted(FIELDS)
+
+def test_resume_skips_finished_rows(server, createHelper, tmp_path):
+    path = writeFile(tmp_path)
+    requestHelper = createHelper()
+    journal = IngestionJournal(str(tmp_path / "journal.db"))
+    try:
+        firstRun = []
+        for result in requestHelper.ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, path, workers=1, journal=journal):
+            assert result.succeeded
+            firstRun.append(result.rowNumber)
+            if len(firstRun) == 3:
+                break
+    finally:
+        journal.close()
+    assert len(server.store.requests) < ROWS
+
+    # A new journal on the same file, as a later run would open it
+    journal = IngestionJournal(str(tmp_path / "journal.db"))
+    try:
+        ingestion = requestHelper.ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, path, workers=4, journal=journal)
+        secondRun = [result.rowNumber for result in ingestion if result.succeeded]
+        assert ingestion.bulkRequest.bulkRequestId in server.store.bulkRequests
+    finally:
+        journal.close()
+    assert not set(firstRun) & set(secondRun)
+    # The row the worker was on when the first run stopped was finished, but not yielded
+    assert ROWS - len(firstRun) - 1 <= len(secondRun) <= ROWS - len(firstRun)
+    assertEveryRowOnce(server)
+
+def test_resume_creates_only_missing_data_elements(server, createHelper, tmp_path):
+    path = writeFile(tmp_path)
+    transport = FailingTransport()
+    transport.failField = 'LastName'
+    requestHelper = createHelper(transport=transport, retryPolicy=RetryPolicy(maxRetries=1, baseDelay=0.001, budget=False))
+    journal = IngestionJournal(str(tmp_path / "journal.db"))
+    try:
+        results = list(requestHelper.ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, path, workers=4, journal=journal))
+        assert len(results) == ROWS
+        assert not any(result.succeeded for result in results)
+        assert len(server.store.requests) == ROWS
+
+        transport.failField = None
+        results = list(requestHelper.ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, path, workers=4, journal=journal))
+    finally:
+        journal.close()
+    assert len(results) == ROWS
+    assert all(result.succeeded for result in results)
+    assert all([dataElement.DataField for dataElement in result.dataElements] == ['LastName'] for result in results)
+    assertEveryRowOnce(server)
+
+def test_finished_file_is_not_ingested_again(server, createHelper, tmp_path):
+    path = writeFile(tmp_path)
+    requestHelper = createHelper()
+    journal = IngestionJournal(str(tmp_path / "journal.db"))
+    try:
+        assert all(result.succeeded for result in requestHelper.ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, path, journal=journal))
+        calls = server.store.calls
+        assert list(requestHelper.ingestBulkFile(CUSTOMER_ID, WORKFLOW_ID, path, journal=journal)) == []
+    finally:
+        journal.close()
+    # Only the Bulk Request is read again
+    assert server.store.calls - calls <= 1
+    assertEveryRowOnce(server)
@@ -0,0 +1,58 @@
+"""MetricsCollector, and the metrics RequestHelper reports against the stub server"""
+from id_verification_python_requesthelper.metrics import BYTES_SENT, IN_FLIGHT, REQUEST_SECONDS, REQUESTS, RETRIES, CallbackMetrics, MetricsCollector
+from id_verification_python_requesthelper.retry import RetryPolicy
+
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+def counters(metrics: MetricsCollector, name: str) -> dict:
+    """
+    Get the values of a counter by their labels (as sorted tuples)
+    """
+    return {tuple(sorted(counter['labels'].items())): counter['value'] for counter in metrics.snapshot()['counters'] if counter['name'] == name}
+
+def test_collector_totals():
+    metrics = MetricsCollector(buckets=(0.1, 1.0))
+    metrics.increment("calls", labels={'endpoint': 'a'})
+    metrics.increment("calls", 2, {'endpoint': 'a'})
+    for value in (0.05, 0.5, 5.0):
+        metrics.observe("latency", value)
+    metrics.setGauge("inFlight", 3)
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == [{'name': 'calls', 'labels': {'endpoint': 'a'}, 'value': 3}]
+    assert snapshot['histograms'] == [{'name': 'latency', 'labels': {}, 'count': 3, 'sum': 5.55, 'mean': 5.55 / 3, 'buckets': {0.1: 1, 1.0: 1, None: 1}}]
+    assert snapshot['gauges'] == [{'name': 'inFlight', 'labels': {}, 'value': 3}]
+    assert "calls {endpoint=a}: 3" in metrics.summary()
+    metrics.reset()
+    assert metrics.snapshot() == {'counters': [], 'histograms': [], 'gauges': []}
+
+def test_helper_reports_calls_by_status(server, createHelper):
+    metrics = MetricsCollector()
+    requestHelper = createHelper(metrics=metrics)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    requestHelper.getBulkRequest(bulkRequest.bulkRequestId)
+    requestHelper.getBulkRequest("missing")
+    requests = counters(metrics, REQUESTS)
+    assert requests[(('endpoint', '/BulkRequest/CreateBulkRequest'), ('method', 'POST'), ('status', '201'))] == 1
+    assert requests[(('endpoint', '/BulkRequest/GetBulkRequestByBulkRequestId'), ('method', 'PUT'), ('status', '200'))] == 1
+    assert requests[(('endpoint', '/BulkRequest/GetBulkRequestByBulkRequestId'), ('method', 'PUT'), ('status', '404'))] == 1
+    latencies = {histogram['labels']['endpoint']: histogram['count'] for histogram in metrics.snapshot()['histograms'] if histogram['name'] == REQUEST_SECONDS}
+    assert latencies == {'/BulkRequest/CreateBulkRequest': 1, '/BulkRequest/GetBulkRequestByBulkRequestId': 2}
+    assert counters(metrics, BYTES_SENT)[(('endpoint', '/BulkRequest/CreateBulkRequest'),)] > 0
+
+def test_helper_reports_retries(server, createHelper):
+    metrics = MetricsCollector()
+    requestHelper = createHelper(metrics=metrics, retryPolicy=RetryPolicy(maxRetries=2, baseDelay=0.001, jitter=False, budget=False))
+    server.settings = StubSettings(errorRate=1.0, errorStatus=503)
+    assert isinstance(requestHelper.getBulkRequest("missing"), Exception)
+    assert counters(metrics, RETRIES) == {(('endpoint', '/BulkRequest/GetBulkRequestByBulkRequestId'), ('reason', '503')): 2}
+    assert counters(metrics, REQUESTS) == {(('endpoint', '/BulkRequest/GetBulkRequestByBulkRequestId'), ('method', 'PUT'), ('status', '503')): 3}
+
+def test_callback_gets_every_measurement(server, createHelper):
+    measurements = []
+    requestHelper = createHelper(metrics=CallbackMetrics(lambda kind, name, value, labels: measurements.append((kind, name))))
+    requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    assert ('counter', REQUESTS) in measurements
+    assert ('histogram', REQUEST_SECONDS) in measurements
+    assert ('gauge', IN_FLIGHT) in measurements
@@ -0,0 +1,52 @@
+"""Token bucket rate limiting, on its own and through RequestHelper against the stub server"""
+import time
+
+import pytest
+
+from id_verification_python_requesthelper.rate_limit import MemoryBucketStore, RateLimiter, RateLimitTimeout, SharedBucketStore
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+def test_burst_then_rate():
+    rateLimiter = RateLimiter(rate=10, burst=3)
+    assert [rateLimiter.tryAcquire() for _ in range(3)] == [0, 0, 0]
+    wait = rateLimiter.tryAcquire()
+    assert 0 < wait <= 0.1
+
+def test_customer_limit_leaves_the_rest_to_other_customers():
+    rateLimiter = RateLimiter(rate=100, customerRate=1)
+    assert rateLimiter.tryAcquire("busy") == 0
+    assert rateLimiter.tryAcquire("busy") > 0
+    assert rateLimiter.tryAcquire("quiet") == 0
+
+def test_refused_call_takes_no_token():
+    rateLimiter = RateLimiter(rate=20, burst=1, customerRate=0.1, store=MemoryBucketStore())
+    assert rateLimiter.tryAcquire("busy") == 0
+    # The global bucket is empty, so the other customer's bucket must not lose its token either
+    assert rateLimiter.tryAcquire("quiet") > 0
+    time.sleep(0.06)
+    assert rateLimiter.tryAcquire("quiet") == 0
+
+def test_acquire_gives_up_after_timeout():
+    rateLimiter = RateLimiter(rate=0.1)
+    rateLimiter.acquire()
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        rateLimiter.acquire(timeout=0.05)
+    assert time.monotonic() - started < 1
+
+def test_shared_store_is_shared_between_limiters(tmp_path):
+    path = str(tmp_path / "rate-limit.db")
+    first = RateLimiter(rate=1, store=SharedBucketStore(path))
+    second = RateLimiter(rate=1, store=SharedBucketStore(path))
+    assert first.tryAcquire() == 0
+    assert second.tryAcquire() > 0
+
+def test_helper_creates_at_the_limited_rate(server, createHelper):
+    requestHelper = createHelper(rateLimiter=RateLimiter(rate=20, burst=1))
+    started = time.monotonic()
+    requests = [requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID) for _ in range(5)]
+    elapsed = time.monotonic() - started
+    assert not any(isinstance(request, Exception) for request in requests)
+    # The first call uses the burst, the other four wait about 1 / rate each
+    assert elapsed >= 4 / 20 * 0.9
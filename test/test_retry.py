@@ -0,0 +1,88 @@
+"""Retries, the retry deadline and the retry budget against the stub server"""
+import time
+
+import requests
+
+from id_verification_python_requesthelper.retry import RetryBudget, RetryPolicy
+
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+def test_retries_until_success(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=20, baseDelay=0.001, jitter=False, budget=False))
+    server.settings = StubSettings(errorRate=0.5)
+    bulkRequests = [requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID) for _ in range(10)]
+    assert not any(isinstance(bulkRequest, Exception) for bulkRequest in bulkRequests)
+    assert len(server.store.bulkRequests) == 10
+    assert server.store.calls > 10
+
+def test_gives_up_after_max_retries(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=3, baseDelay=0.001, jitter=False, budget=False), cache=False)
+    server.settings = StubSettings(errorRate=1.0)
+    result = requestHelper.getBulkRequest("missing")
+    assert isinstance(result, Exception)
+    assert server.store.calls == 4
+
+def test_deadline_stops_retries(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=100, baseDelay=0.1, maxDelay=0.1, deadline=0.35, jitter=False, budget=False), cache=False)
+    server.settings = StubSettings(errorRate=1.0)
+    started = time.monotonic()
+    result = requestHelper.getBulkRequest("missing")
+    elapsed = time.monotonic() - started
+    assert isinstance(result, Exception)
+    assert elapsed < 0.35 + 0.2
+    assert 2 <= server.store.calls <= 4
+
+def test_budget_is_shared_between_calls(server, createHelper):
+    budget = RetryBudget(ratio=0, minPerSecond=0, capacity=2)
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=5, baseDelay=0.001, jitter=False, budget=budget), cache=False)
+    server.settings = StubSettings(errorRate=1.0)
+    assert isinstance(requestHelper.getBulkRequest("missing"), Exception)
+    assert server.store.calls == 3
+    assert isinstance(requestHelper.getBulkRequest("missing"), Exception)
+    assert server.store.calls == 4
+
+def test_budget_refills_with_requests():
+    budget = RetryBudget(ratio=0.5, minPerSecond=0, capacity=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+def test_create_without_retry_sent_retries_only_unprocessed_statuses(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=3, baseDelay=0.001, jitter=False, budget=False))
+    server.settings = StubSettings(errorRate=1.0, errorStatus=500)
+    assert isinstance(requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID, retrySent=False), Exception)
+    assert server.store.calls == 1
+    assert isinstance(requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID), Exception)
+    assert server.store.calls == 1 + 4
+    server.settings = StubSettings(errorRate=1.0, errorStatus=503)
+    assert isinstance(requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID, retrySent=False), Exception)
+    assert server.store.calls == 5 + 4
+
+def test_bulk_request_data_element_without_retry_sent_is_not_sent_again(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=3, baseDelay=0.001, jitter=False, budget=False), cache=False)
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    calls = server.store.calls
+    server.settings = StubSettings(dropRate=1.0)
+    result = requestHelper.createBulkRequestDataElement(bulkRequest.bulkRequestId, "Field", "value", retrySent=False)
+    assert isinstance(result.__cause__, requests.exceptions.ConnectionError)
+    assert server.store.calls == calls + 1
+
+def test_calls_without_an_answer_return_the_error(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=1, baseDelay=0.001, jitter=False, budget=False))
+    bulkRequest = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID)
+    server.settings = StubSettings(dropRate=1.0)
+    results = [
+        requestHelper.getBulkRequest(bulkRequest.bulkRequestId),
+        requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID),
+        requestHelper.getBulkRequestDataElementsByBulkRequestId(bulkRequest.bulkRequestId),
+        requestHelper.checkBulkRequestFileExists(CUSTOMER_ID, WORKFLOW_ID, "identities.csv"),
+        requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID),
+    ]
+    for result in results:
+        assert isinstance(result, Exception)
+        assert isinstance(result.__cause__, requests.exceptions.ConnectionError)
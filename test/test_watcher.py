@@ -0,0 +1,72 @@
+"""Watching Bulk Request status changes (watchBulkRequests) against the stub server"""
+import threading
+import time
+
+from id_verification_python_requesthelper.enums import BulkRequestStatus
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+def setStatus(server, bulkRequestId: str, status: BulkRequestStatus) -> None:
+    """
+    Change the status of a Bulk Request in the stub server, as the API would while processing it
+    """
+    bulkRequest = server.store.bulkRequests[bulkRequestId]
+    bulkRequest['status'] = status.value
+    bulkRequest['updatedOn'] = f"2030-01-01T00:00:{status.value:02}Z"
+
+def collect(watcher) -> list:
+    """
+    Iterate a watcher to the end, stopping it if that takes more than 5 seconds
+    """
+    timer = threading.Timer(5, watcher.stop)
+    timer.start()
+    try:
+        return [(change.bulkRequestId, change.previousStatus, change.status) for change in watcher]
+    finally:
+        timer.cancel()
+
+def test_changes_until_terminal(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequestId = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID).bulkRequestId
+    statuses = iter([BulkRequestStatus.InProgress, BulkRequestStatus.Completed])
+
+    def onChange(change) -> None:
+        # Called on the scheduler thread before the next poll, so every status is seen
+        nextStatus = next(statuses, None)
+        if nextStatus is not None:
+            setStatus(server, bulkRequestId, nextStatus)
+
+    watcher = requestHelper.watchBulkRequests([bulkRequestId], onChange=onChange, interval=0.01)
+    assert collect(watcher) == [
+        (bulkRequestId, None, BulkRequestStatus.New),
+        (bulkRequestId, BulkRequestStatus.New, BulkRequestStatus.InProgress),
+        (bulkRequestId, BulkRequestStatus.InProgress, BulkRequestStatus.Completed),
+    ]
+    assert watcher.watching == 0
+
+def test_missing_bulk_request_stops_being_watched(server, createHelper):
+    requestHelper = createHelper()
+    watcher = requestHelper.watchBulkRequests(["missing"], interval=0.01)
+    assert collect(watcher) == [("missing", None, None)]
+
+def test_unchanged_bulk_request_is_polled_less_often(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequestId = requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID).bulkRequestId
+    calls = server.store.calls
+    with requestHelper.watchBulkRequests([bulkRequestId], onChange=lambda change: None, interval=0.01, backoff=4, maxInterval=10):
+        time.sleep(0.5)
+    # Polls at about 0, 0.01, 0.05, 0.21 and 0.85 seconds, where a fixed interval would make 50
+    assert 3 <= server.store.calls - calls <= 5
+
+def test_bulk_requests_due_together_are_fetched_together(server, createHelper):
+    requestHelper = createHelper()
+    bulkRequestIds = [requestHelper.createBulkRequest(CUSTOMER_ID, WORKFLOW_ID).bulkRequestId for _ in range(5)]
+    changes = []
+    watcher = requestHelper.watchBulkRequests(bulkRequestIds, onChange=changes.append, interval=60)
+    with watcher:
+        deadline = time.monotonic() + 5
+        while len(changes) < len(bulkRequestIds) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        watcher.watch(bulkRequestIds[0])
+    assert sorted(change.bulkRequestId for change in changes) == sorted(bulkRequestIds)
+    assert watcher.watching == len(bulkRequestIds)
@@ -0,0 +1,106 @@
+"""RequestDataElementWriter (bufferedWriter) batching, spilling and failures against the stub server"""
+import os
+import threading
+
+import pytest
+
+from id_verification_python_requesthelper import writer as writerModule
+from id_verification_python_requesthelper.retry import RetryPolicy
+from id_verification_python_requesthelper.transport import RequestsTransport
+
+from stub_server import StubSettings
+
+from conftest import CUSTOMER_ID, WORKFLOW_ID
+
+WRITES = 10
+
+class GateTransport(RequestsTransport):
+    """RequestsTransport that holds the Request Data Element calls until release is set"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.received = threading.Event()
+        self.release = threading.Event()
+
+    def request(self, method: str, url: str, headers: dict, data, timeout=None, stream: bool = False):
+        if '/RequestDataElement/CreateRequestDataElement?' in url:
+            self.received.set()
+            self.release.wait(5)
+        return super().request(method, url, headers, data, timeout, stream)
+
+def spillWrites(requestHelper, transport, requestId: str, spillPath: str):
+    """
+    Write WRITES Data Elements while the first batch is held, so that the rest spill
+
+    Returns:
+        RequestDataElementWriter
+    """
+    writer = requestHelper.bufferedWriter(batchSize=2, maxQueueSize=2, flushInterval=60, flushers=1, spillPath=spillPath)
+    for index in range(WRITES):
+        writer.write(requestId, f"Field {index}", f"value {index}")
+        if index == 1:
+            assert transport.received.wait(5)
+    assert writer.stats()['spilled'] > 0
+    return writer
+
+def test_writes_are_sent_in_batches(server, createHelper):
+    requestHelper = createHelper()
+    request = requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+    with requestHelper.bufferedWriter(batchSize=10, flushInterval=60) as writer:
+        for index in range(25):
+            writer.write(request.requestId, f"Field {index}", f"value {index}")
+        assert writer.flush() == []
+        assert writer.stats()['sent'] == 25
+    assert sorted(dataElement['dataValue'] for dataElement in server.store.requestDataElements[request.requestId]) == sorted(f"value {index}" for index in range(25))
+
+def test_spilled_writes_are_all_sent(server, createHelper, tmp_path):
+    transport = GateTransport()
+    requestHelper = createHelper(transport=transport)
+    request = requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+    spillPath = str(tmp_path / "writes.spill")
+    writer = spillWrites(requestHelper, transport, request.requestId, spillPath)
+    transport.release.set()
+    assert writer.close() == []
+    assert sorted(dataElement['dataValue'] for dataElement in server.store.requestDataElements[request.requestId]) == sorted(f"value {index}" for index in range(WRITES))
+    assert not os.path.exists(spillPath)
+
+def test_failed_writes_are_returned(server, createHelper):
+    requestHelper = createHelper(retryPolicy=RetryPolicy(maxRetries=0, budget=False))
+    request = requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+    server.settings = StubSettings(errorRate=1.0)
+    reported = []
+    writer = requestHelper.bufferedWriter(batchSize=3, onError=reported.append)
+    for index in range(5):
+        writer.write(request.requestId, f"Field {index}", f"value {index}")
+    failures = writer.flush()
+    assert sorted(failure.dataField for failure in failures) == [f"Field {index}" for index in range(5)]
+    assert all(isinstance(failure.error, Exception) for failure in failures)
+    assert writer.close() == []
+    assert len(reported) == 5
+    assert writer.stats()['failed'] == 5
+
+def test_write_that_cannot_be_spilled_fails_in_write(server, createHelper, tmp_path):
+    requestHelper = createHelper()
+    with requestHelper.bufferedWriter(spillPath=str(tmp_path / "writes.spill")) as writer:
+        with pytest.raises(TypeError):
+            writer.write("request", "Field", object())
+        assert writer.stats()['written'] == 0
+
+def test_damaged_spill_file_stops_the_writer(server, createHelper, tmp_path, monkeypatch):
+    def damaged(data):
+        raise ValueError("damaged spill line")
+
+    monkeypatch.setattr(writerModule, 'loads', damaged)
+    transport = GateTransport()
+    requestHelper = createHelper(transport=transport)
+    request = requestHelper.createRequest(CUSTOMER_ID, None, WORKFLOW_ID)
+    spillPath = str(tmp_path / "writes.spill")
+    writer = spillWrites(requestHelper, transport, request.requestId, spillPath)
+    transport.release.set()
+    with pytest.raises(ValueError, match="damaged spill line"):
+        writer.flush()
+    with pytest.raises(ValueError, match="damaged spill line"):
+        writer.write(request.requestId, "Field", "value")
+    with pytest.raises(ValueError, match="damaged spill line"):
+        writer.close()
+    assert not os.path.exists(spillPath)